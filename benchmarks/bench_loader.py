@@ -0,0 +1,154 @@
+"""データベースからの読み込みの速度比較
+
+psycopg2 + pl.read_database（従来）と asyncpg + COPY（DB_DRIVER=asyncpg）で
+同じ問い合わせを読み込み、時間と結果の一致を確認する。
+計測にはベンチマーク専用のデータベース（BENCH_DB_NAME）を使い、DB_NAME の
+データベースには接続しない（--setup で既存のテーブルを削除するため）。
+
+    # BENCH_DB_NAME のデータベースに合成データを作成（既存のテーブルは削除されます）
+    BENCH_DB_NAME=typing_bench python benchmarks/bench_loader.py --setup --rows 2000000
+    BENCH_DB_NAME=typing_bench python benchmarks/bench_loader.py --repeat 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from async_loader import load_data_blocking  # noqa: E402
+from cohort import COHORT_KEYS, CohortFilter  # noqa: E402
+from loader import get_db_connection, load_data_psycopg2  # noqa: E402
+
+SETUP_SQL = """
+DROP TABLE IF EXISTS t_score, t_miss, m_user, m_diff, m_lang CASCADE;
+CREATE TABLE m_diff (diff_id int PRIMARY KEY, diff text);
+CREATE TABLE m_lang (lang_id int PRIMARY KEY, lang text);
+INSERT INTO m_diff VALUES (1, 'イージー'), (2, 'ノーマル'), (3, 'ハード');
+INSERT INTO m_lang VALUES (1, '日本語'), (2, '英語');
+CREATE TABLE m_user (
+    user_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    username text, email text, date_joined timestamptz,
+    created_at timestamptz DEFAULT now(), updated_at timestamptz DEFAULT now(),
+    is_newgraduate boolean
+);
+CREATE TABLE t_score (
+    score_id bigserial PRIMARY KEY, user_id uuid REFERENCES m_user,
+    score int, accuracy double precision, typing_count int, diff_id int, lang_id int,
+    created_at timestamptz, updated_at timestamptz
+);
+CREATE TABLE t_miss (
+    miss_id bigserial PRIMARY KEY, user_id uuid REFERENCES m_user,
+    miss_char text, miss_count int, created_at timestamptz, updated_at timestamptz
+);
+INSERT INTO m_user (username, email, date_joined, is_newgraduate)
+SELECT 'user' || lpad(i::text, 5, '0'), 'user' || i || '@example.com',
+       timestamptz '2024-04-01' - (i %% 3) * interval '1 year', i %% 5 <> 0
+FROM generate_series(1, %(users)s) i;
+CREATE TEMP TABLE user_numbers AS
+SELECT row_number() OVER () AS n, user_id FROM m_user;
+INSERT INTO t_score (user_id, score, accuracy, typing_count, diff_id, lang_id,
+                     created_at, updated_at)
+SELECT u.user_id, 300 + (random() * 2700)::int, 0.8 + random() * 0.2,
+       100 + (random() * 300)::int, 1 + (random() * 2.999)::int %% 3,
+       1 + (random() * 1.999)::int %% 2, g.t, g.t
+FROM (
+    SELECT 1 + (random() * (%(users)s - 1))::int AS n,
+           timestamptz '2023-04-01' + random() * interval '540 days' AS t
+    FROM generate_series(1, %(rows)s)
+) g JOIN user_numbers u USING (n);
+INSERT INTO t_miss (user_id, miss_char, miss_count, created_at, updated_at)
+SELECT u.user_id, substr('abcdefghijklmnopqrstuvwxyzあいうえおかきくけこ', 1 + (random() * 35)::int, 1),
+       1 + (random() * 9)::int, g.t, g.t
+FROM (
+    SELECT 1 + (random() * (%(users)s - 1))::int AS n,
+           timestamptz '2023-04-01' + random() * interval '540 days' AS t
+    FROM generate_series(1, %(misses)s)
+) g JOIN user_numbers u USING (n);
+ANALYZE;
+"""
+
+LOADERS = {
+    "psycopg2 + read_database": load_data_psycopg2,
+    "asyncpg + COPY": load_data_blocking,
+}
+
+
+def use_bench_database() -> str:
+    """接続先を BENCH_DB_NAME のデータベースに切り替える
+
+    Raises:
+        SystemExit: BENCH_DB_NAME が未設定、または DB_NAME と同じ場合
+    """
+    bench_db = os.environ.get("BENCH_DB_NAME", "")
+    if not bench_db:
+        sys.exit("ベンチマーク専用のデータベース名を BENCH_DB_NAME に指定してください")
+    if bench_db == os.environ.get("DB_NAME"):
+        sys.exit(
+            "BENCH_DB_NAME が DB_NAME と同じです"
+            "（--setup でテーブルを削除するため、別のデータベースを指定してください）"
+        )
+    # 読み込み関数は DB_* 環境変数で接続するため、接続先だけを置き換える
+    os.environ["DB_NAME"] = bench_db
+    return bench_db
+
+
+def setup(rows: int, users: int):
+    """合成データのテーブルを作成"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SETUP_SQL, {"rows": rows, "users": users, "misses": rows // 4})
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="データ読み込みの速度比較")
+    parser.add_argument("--setup", action="store_true", help="合成データを作成")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="t_scoreの行数")
+    parser.add_argument("--users", type=int, default=2000, help="ユーザー数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数")
+    parser.add_argument(
+        "--cohort", choices=list(COHORT_KEYS), default="newgraduate", help="対象者"
+    )
+    args = parser.parse_args()
+    bench_db = use_bench_database()
+    print(f"データベース: {bench_db}")
+
+    if args.setup:
+        start = time.perf_counter()
+        setup(args.rows, args.users)
+        print(f"合成データを作成しました（{time.perf_counter() - start:.1f}秒）")
+
+    cohort = CohortFilter.from_params({"cohort": args.cohort})
+    results = {}
+    for name, loader in LOADERS.items():
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            frames = loader(cohort)
+            times.append(time.perf_counter() - start)
+        results[name] = frames
+        rows = frames[0].height
+        median = statistics.median(times)
+        print(
+            f"{name:<26} 中央値 {median:6.2f}秒  最小 {min(times):6.2f}秒  "
+            f"{rows:,}行（{rows / median:,.0f}行/秒）"
+        )
+
+    # 読み込み方法によらず同じ結果になることを確認
+    expected, actual = results.values()
+    for table, left, right in zip(("scores", "misses", "users"), expected, actual):
+        same = left.schema == right.schema and left.sort(left.columns).equals(
+            right.sort(right.columns)
+        )
+        print(f"{table}: {'一致' if same else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""ダッシュボードの同時アクセスの負荷試験
+
+StreamlitのAppTestでN個のセッションを同時に動かし、期間の選択やユーザーの切り替えを
+繰り返したときの再実行時間（p50/p95/p99）、データベースへの問い合わせ回数、
+プロセスのメモリ使用量（RSS）を、セッション数ごとに表示する。
+セッションは実際のサーバーと同じく1つのプロセス内のスレッドで動き、共有キャッシュを使う。
+タブの切り替えはブラウザ内で行われ再実行されない（全タブが毎回描画される）ため、
+各再実行の時間に全タブの描画が含まれる。
+
+    # DB_* 環境変数のPostgresから読み込む
+    python benchmarks/load_test.py --sessions 1,5,10,20
+    # Postgresのデータをスナップショットとして保存し、以降はDBなしで試験する
+    python benchmarks/load_test.py --save-snapshot snapshot/
+    python benchmarks/load_test.py --source snapshot --snapshot snapshot/ --sessions 1,10,30
+    # 合成データで試験する
+    python benchmarks/load_test.py --source synthetic --users 60 --sessions 1,10
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import cache  # noqa: E402
+from cohort import DEFAULT_COHORT  # noqa: E402
+from loader import build_queries, fetch_fingerprint, load_data  # noqa: E402
+from utils.config import CACHE_TTL_SECONDS  # noqa: E402
+from utils.synthetic import make_dataset  # noqa: E402
+
+APP_PATH = SRC_DIR / "main.py"
+SNAPSHOT_TABLES = ("scores", "misses", "users")
+# 1回の読み込みで実行する問い合わせの数（スコア・ミスタイプ・ユーザー）
+QUERIES_PER_LOAD = len(build_queries())
+# 操作の種類（期間の選択2つとユーザーの切り替えを同じ割合で行う）
+ACTIONS = ("growth_month", "avg_month", "user_selector")
+
+
+class CountingSource:
+    """読み込みと指紋の問い合わせの回数を数える"""
+
+    def __init__(self, loader, probe):
+        self._loader = loader
+        self._probe = probe
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.probes = 0
+
+    def load(self, cohort=DEFAULT_COHORT, since=None):
+        with self._lock:
+            self.loads += 1
+        return self._loader(cohort, since)
+
+    def probe(self, cohort=DEFAULT_COHORT):
+        with self._lock:
+            self.probes += 1
+        return self._probe(cohort)
+
+    @property
+    def queries(self) -> int:
+        return self.loads * QUERIES_PER_LOAD + self.probes
+
+
+class RssSampler(threading.Thread):
+    """一定間隔でプロセスのRSSを取得し、最大値を記録する"""
+
+    def __init__(self, interval: float = 0.2):
+        super().__init__(name="rss-sampler", daemon=True)
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self.peak = current_rss()
+
+    def run(self):
+        while not self._stop_event.wait(self._interval):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, current_rss())
+
+
+def current_rss() -> int:
+    """現在のRSS（バイト）。/proc がない環境では最大RSSを返す"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def save_snapshot(path: Path):
+    """Postgresから読み込んだデータをスナップショットとして保存"""
+    path.mkdir(parents=True, exist_ok=True)
+    for table, frame in zip(SNAPSHOT_TABLES, load_data(DEFAULT_COHORT)):
+        frame.write_parquet(path / f"{table}.parquet")
+
+
+def snapshot_source(path: Path):
+    """スナップショットを返す (読み込み関数, 指紋関数)"""
+    frames = tuple(
+        pl.read_parquet(path / f"{table}.parquet") for table in SNAPSHOT_TABLES
+    )
+    return (lambda cohort, since=None: frames), (lambda cohort: "snapshot")
+
+
+def synthetic_source(users: int, scores: int, misses: int):
+    frames = make_dataset(users, scores, misses)
+    return (lambda cohort, since=None: frames), (lambda cohort: "synthetic")
+
+
+def share_streamlit_runtime():
+    """同時に動かすAppTestで、Streamlitのランタイムを共有させる
+
+    AppTestは実行ごとにランタイムを作り、終了時に消すため、ほかのセッションの
+    スクリプトの実行中にランタイムがなくなる。実際のサーバーと同じく
+    1つのランタイムを全セッションで使うよう、最後に作られたものを返し続ける。
+    """
+    from streamlit.runtime.runtime import Runtime
+
+    latest = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest["runtime"] = cls._instance
+        if "runtime" not in latest:
+            raise RuntimeError("Runtime hasn't been created!")
+        return latest["runtime"]
+
+    Runtime.instance = classmethod(instance)
+
+
+def share_script_bytecode(script_path: Path):
+    """同時に動かすAppTestで、スクリプトのバイトコードを共有させる
+
+    AppTestは実行ごとにScriptCacheを作り直すため、再実行のたびにスクリプトを
+    コンパイルする。複数のスレッドで同時にコンパイルすると "AST constructor
+    recursion depth mismatch" の SystemError で実行が失敗することがあるため、
+    試験の前に1回だけコンパイルし、全セッションでそのバイトコードを使う
+    （実際のサーバーも1つのScriptCacheを全セッションで共有する）。
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    script_path = os.path.abspath(script_path)
+    bytecode = ScriptCache().get_bytecode(script_path)
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_bytecode(self, path):
+        if os.path.abspath(path) == script_path:
+            return bytecode
+        return get_bytecode(self, path)
+
+    ScriptCache.get_bytecode = shared_bytecode
+
+
+def run_session(
+    index: int,
+    steps: int,
+    think: float,
+    barrier: threading.Barrier,
+    timings: list,
+    errors: list,
+) -> bool:
+    """1つのセッションで最初の表示と steps 回の操作を行い、再実行時間を記録する
+
+    再実行で例外が出た・何も表示されなかった場合はセッションの失敗とし、以降の操作を
+    行わず、このセッションの再実行時間は記録しない（失敗した速い実行で分位点が
+    下がらないようにするため）。
+
+    Returns:
+        bool: すべての再実行が成功した場合True
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(index)
+    app = AppTest.from_file(str(APP_PATH), default_timeout=600)
+    session_timings = []
+
+    def rerun(action: str, operate=None) -> bool:
+        start = time.perf_counter()
+        try:
+            if operate is None:
+                app.run()
+            else:
+                operate()
+        except Exception as e:
+            errors.append(f"{action}: {str(e)}")
+            return False
+        elapsed = time.perf_counter() - start
+        if len(app.exception) > 0:
+            errors.extend(f"{action}: {e.message}" for e in app.exception)
+            return False
+        if len(app.main) == 0:
+            errors.append(f"{action}: 何も表示されませんでした")
+            return False
+        session_timings.append((action, elapsed))
+        return True
+
+    barrier.wait()
+    if not rerun("initial"):
+        return False
+    for _ in range(steps):
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+        action = rng.choice(ACTIONS)
+        selectbox = next((box for box in app.selectbox if box.key == action), None)
+        if selectbox is None or not selectbox.options:
+            errors.append(f"{action}: 選択肢がありません")
+            continue
+        if action == "user_selector":
+            # 個人タブのユーザーを順番に切り替える
+            option = (selectbox.index + 1) % len(selectbox.options)
+        else:
+            option = rng.randrange(len(selectbox.options))
+        if not rerun(action, lambda: selectbox.select_index(option).run()):
+            return False
+
+    timings.extend(session_timings)
+    return True
+
+
+def run_level(sessions: int, args, source: CountingSource) -> dict:
+    """sessions 個のセッションを同時に実行して結果を集計"""
+    # 段階ごとに共有キャッシュを作り直し、最初の読み込みが集中する状況から始める
+    cache._shared_cache = cache.SharedCache(
+        loader=source.load,
+        probe=source.probe,
+        ttl=args.ttl,
+        store_dir=None,
+    )
+    loads, probes, queries = source.loads, source.probes, source.queries
+
+    timings, errors, failed = [], [], []
+    barrier = threading.Barrier(sessions)
+
+    def session(index: int):
+        if not run_session(index, args.steps, args.think, barrier, timings, errors):
+            failed.append(index)
+
+    threads = [
+        threading.Thread(target=session, args=(i,), name=f"session-{i}")
+        for i in range(sessions)
+    ]
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    peak_rss = sampler.stop()
+
+    latencies = np.array([seconds for _, seconds in timings])
+    initial = np.array([seconds for action, seconds in timings if action == "initial"])
+    p50, p95, p99 = (
+        np.percentile(latencies, [50, 95, 99]) if len(latencies) else [0] * 3
+    )
+    return {
+        "sessions": sessions,
+        "failed_sessions": len(failed),
+        "reruns": len(timings),
+        "errors": errors,
+        "elapsed": elapsed,
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "max": latencies.max() if len(latencies) else 0,
+        "initial_p95": np.percentile(initial, 95) if len(initial) else 0,
+        "loads": source.loads - loads,
+        "probes": source.probes - probes,
+        "queries": source.queries - queries,
+        "peak_rss_mb": peak_rss / 1024**2,
+    }
+
+
+def print_result(result: dict):
+    print(
+        f"{result['sessions']:>8} {result['failed_sessions']:>6} "
+        f"{result['reruns']:>6} {len(result['errors']):>6} "
+        f"{result['p50']:>7.2f} {result['p95']:>7.2f} {result['p99']:>7.2f} "
+        f"{result['max']:>7.2f} {result['initial_p95']:>9.2f} "
+        f"{result['loads']:>6} {result['probes']:>6} {result['queries']:>6} "
+        f"{result['peak_rss_mb']:>8.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="ダッシュボードの同時アクセスの負荷試験"
+    )
+    parser.add_argument(
+        "--sessions",
+        default="1,5,10",
+        help="同時セッション数（カンマ区切りで段階的に増やす）",
+    )
+    parser.add_argument(
+        "--steps", type=int, default=10, help="セッションごとの操作回数"
+    )
+    parser.add_argument(
+        "--think", type=float, default=0.5, help="操作の間隔の平均（秒）"
+    )
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        default=CACHE_TTL_SECONDS,
+        help="共有キャッシュのTTL（秒、短くすると試験中の再読み込みも計測できる）",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["postgres", "snapshot", "synthetic"],
+        default="postgres",
+        help="データの読み込み元",
+    )
+    parser.add_argument("--snapshot", type=Path, help="スナップショットのディレクトリ")
+    parser.add_argument(
+        "--save-snapshot",
+        type=Path,
+        help="Postgresのデータをスナップショットとして保存",
+    )
+    parser.add_argument("--users", type=int, default=60, help="合成データのユーザー数")
+    parser.add_argument(
+        "--scores", type=int, default=50_000, help="合成データのスコア数"
+    )
+    parser.add_argument("--misses", type=int, default=20_000, help="合成データのミス数")
+    parser.add_argument("--json", type=Path, help="結果をJSONで保存")
+    args = parser.parse_args()
+
+    if args.save_snapshot:
+        save_snapshot(args.save_snapshot)
+        print(f"スナップショットを保存しました: {args.save_snapshot}")
+        return
+
+    if args.source == "snapshot":
+        if args.snapshot is None:
+            parser.error("--source snapshot には --snapshot が必要です")
+        loader, probe = snapshot_source(args.snapshot)
+    elif args.source == "synthetic":
+        loader, probe = synthetic_source(args.users, args.scores, args.misses)
+    else:
+        loader, probe = load_data, fetch_fingerprint
+    source = CountingSource(loader, probe)
+
+    # AppTestの実行ごとに出る警告を抑える
+    from streamlit import config, logger
+
+    config.set_option("logger.level", "error")
+    logger.set_log_level(logging.ERROR)
+    share_streamlit_runtime()
+    share_script_bytecode(APP_PATH)
+
+    print(
+        f"{'sessions':>8} {'failed':>6} {'reruns':>6} {'errors':>6} "
+        f"{'p50(s)':>7} {'p95(s)':>7} "
+        f"{'p99(s)':>7} {'max(s)':>7} {'初回p95(s)':>8} "
+        f"{'loads':>6} {'probes':>6} {'queries':>6} {'RSS(MB)':>8}"
+    )
+    results = []
+    for sessions in [int(value) for value in args.sessions.split(",")]:
+        result = run_level(sessions, args, source)
+        results.append(result)
+        print_result(result)
+        for error in sorted(set(result["errors"]))[:5]:
+            print(f"    エラー: {error}")
+
+    if args.json:
+        args.json.write_text(
+            json.dumps(results, ensure_ascii=False, indent=2, default=float),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
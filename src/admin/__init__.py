@@ -0,0 +1,3 @@
+from .anomalies import show_anomalies
+
+__all__ = ["show_anomalies"]
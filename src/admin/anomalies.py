@@ -0,0 +1,75 @@
+import streamlit as st
+import polars as pl
+from analytics import ANOMALY_REASONS
+from utils.config import ANOMALY_ACTION, ANOMALY_Z_THRESHOLD
+
+# 表示する列: 表示名
+ANOMALY_COLUMNS = {
+    "created_at": "プレイ日時",
+    "username": "ユーザー",
+    "language": "言語",
+    "difficulty": "難易度",
+    "score": "スコア",
+    "accuracy": "正確度",
+    "typing_count": "タイピング数",
+    "robust_z": "ロバストz",
+    "reason": "理由",
+}
+
+
+def show_anomalies(anomalies: pl.DataFrame):
+    """検出した異常なスコアの一覧を表示（Dataset.anomalies）"""
+    if anomalies is None:
+        st.info("異常なスコアの検出は無効です（ANOMALY_ACTION=off）")
+        return
+
+    handling = (
+        "いずれも集計から除いています"
+        if ANOMALY_ACTION == "exclude"
+        else "いずれも集計に含めています"
+    )
+    st.caption(
+        f"正確度・タイピング数が不正なスコアと、ユーザー×モードごとのプレイの傾向（移動中央値）"
+        f"から飛び抜けた（ロバストzスコアが±{ANOMALY_Z_THRESHOLD}を超える）スコアを検出し、{handling}"
+    )
+
+    # 理由ごとの件数
+    counts = dict(anomalies["anomaly"].value_counts().iter_rows())
+    items = [
+        f"""
+        <div class="summary-item">
+            <div class="summary-label">{label}</div>
+            <div class="summary-value">{counts.get(reason, 0):,}<span class="summary-unit">件</span></div>
+        </div>
+        """
+        for reason, label in ANOMALY_REASONS.items()
+    ]
+    st.markdown(
+        f"""
+        <div class="summary-container">
+            {"".join(items)}
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    if len(anomalies) == 0:
+        st.success("異常なスコアは見つかりませんでした")
+        return
+
+    table = (
+        anomalies.sort("created_at", descending=True)
+        .with_columns(
+            pl.col("anomaly").replace_strict(ANOMALY_REASONS).alias("reason"),
+            pl.col("robust_z").round(2),
+        )
+        .select(
+            [
+                name
+                for name in ANOMALY_COLUMNS
+                if name in anomalies.columns or name == "reason"
+            ]
+        )
+        .rename(lambda name: ANOMALY_COLUMNS[name])
+    )
+    st.dataframe(table, hide_index=True, use_container_width=True)
@@ -0,0 +1,174 @@
+import argparse
+import datetime
+import hashlib
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from analytics.anomaly import separate_anomalies
+from analytics.incremental import RunningAggregates, compare_with_full
+from analytics.preprocess import cast_types, prepare_data
+from cohort import DEFAULT_COHORT, CohortFilter, add_cohort_arguments
+from loader import DataLoadError, load_data
+from utils.config import CHECKPOINT_DIR, INCREMENTAL_OVERLAP_SECONDS
+
+
+def checkpoint_path(cohort: CohortFilter, checkpoint_dir=CHECKPOINT_DIR) -> Path:
+    """対象者・期間ごとのチェックポイントの保存先"""
+    digest = hashlib.sha1(repr(cohort).encode("utf-8")).hexdigest()[:16]
+    return Path(checkpoint_dir) / digest
+
+
+class IncrementalAggregator:
+    """集計値を差分の行だけで更新し、チェックポイントに保存する
+
+    前回取り込んだupdated_atから overlap_seconds 遡った時刻以降に更新された行のみを
+    読み込み、チェックポイントには差分の集計値だけを追記するため、更新にかかる時間は
+    新しいプレイの件数に比例する。遡って読んだ取り込み済みの行は、遡る範囲だけ
+    保持している行のキーで除き、コミットが遅れた行も取りこぼさない。
+    既存の行の更新を検出した場合は全件から集計し直す（削除は検出できないため、
+    verify で全件からの再計算と比較して確認する）。前後のプレイと比較する外れた
+    スコアは全件から集計するときにだけ除くため、差分に含まれた外れ値も verify で
+    不一致になる（rebuild で除く）。
+    """
+
+    def __init__(
+        self,
+        cohort: CohortFilter = DEFAULT_COHORT,
+        loader: Callable = load_data,
+        checkpoint_dir=CHECKPOINT_DIR,
+        overlap_seconds: float = INCREMENTAL_OVERLAP_SECONDS,
+    ):
+        self.cohort = cohort
+        self._loader = loader
+        self._overlap = datetime.timedelta(seconds=overlap_seconds)
+        self._path = checkpoint_path(cohort, checkpoint_dir) if checkpoint_dir else None
+        self._lock = threading.Lock()
+        self.aggregates = None
+        self.refreshed_at = None
+
+    @property
+    def age(self) -> float:
+        """最後の更新からの経過秒数（未更新の場合は無限大）"""
+        if self.refreshed_at is None:
+            return float("inf")
+        return time.time() - self.refreshed_at
+
+    def refresh(self) -> RunningAggregates:
+        """差分を読み込んで集計値を更新する
+
+        Returns:
+            RunningAggregates: 更新後の集計値。対象のユーザーがいない場合はNone
+
+        Raises:
+            DataLoadError: データベースから読み込めなかった場合
+        """
+        with self._lock:
+            aggregates = self.aggregates
+            if aggregates is None and self._path is not None:
+                aggregates = RunningAggregates.load(self._path)
+
+            since = None
+            if aggregates is not None:
+                since = {
+                    name: watermark - self._overlap if watermark else None
+                    for name, watermark in aggregates.watermarks.items()
+                }
+            scores, misses, users = cast_types(*self._loader(self.cohort, since))
+            if users.height == 0:
+                return None
+
+            full = aggregates is None
+            if not full:
+                scores, misses, rewritten = aggregates.select_unseen(
+                    scores, misses, since
+                )
+                if rewritten:
+                    # 既存の行が更新されたため、差分ではなく全件から集計し直す
+                    aggregates, full = None, True
+                    scores, misses, users = cast_types(*self._loader(self.cohort))
+
+            delta = RunningAggregates.from_frames(scores, misses, users, full=full)
+            aggregates = (
+                (aggregates or RunningAggregates())
+                .merge(delta)
+                .prune_rows(self._overlap)
+            )
+            if self._path is not None:
+                if full:
+                    aggregates.save(self._path)
+                elif scores.height > 0 or misses.height > 0:
+                    aggregates.append(self._path, delta)
+
+            self.aggregates = aggregates
+            self.refreshed_at = time.time()
+            return aggregates
+
+    def rebuild(self) -> RunningAggregates:
+        """チェックポイントを使わず全件から集計し直す"""
+        with self._lock:
+            self.aggregates = None
+            if self._path is not None:
+                shutil.rmtree(self._path, ignore_errors=True)
+        return self.refresh()
+
+    def verify(self) -> list:
+        """差分で更新した集計値と、全件から再計算した結果を比較する
+
+        Returns:
+            list: 一致しなかった項目の説明（一致した場合は空）
+        """
+        aggregates = self.refresh()
+        scores, misses, _ = prepare_data(*self._loader(self.cohort))
+        if aggregates is None or scores is None:
+            return ["対象のデータがありません"]
+        scores, _ = separate_anomalies(scores)
+        return compare_with_full(aggregates, scores, misses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="差分更新する集計値の更新・検証")
+    add_cohort_arguments(parser)
+    parser.add_argument(
+        "--rebuild", action="store_true", help="チェックポイントを破棄して全件から集計"
+    )
+    parser.add_argument(
+        "--verify", action="store_true", help="全件からの再計算と一致するか確認"
+    )
+    args = parser.parse_args()
+
+    try:
+        cohort = CohortFilter.from_params(vars(args))
+    except ValueError as e:
+        parser.error(str(e))
+
+    aggregator = IncrementalAggregator(cohort)
+    start = time.perf_counter()
+    try:
+        aggregates = aggregator.rebuild() if args.rebuild else aggregator.refresh()
+    except DataLoadError as e:
+        raise SystemExit(f"データの読み込みに失敗しました: {str(e)}")
+    if aggregates is None:
+        raise SystemExit("対象のデータがありません")
+    print(
+        f"集計値を更新しました: {cohort.describe()} "
+        f"(スコア {aggregates.scores_watermark} まで, "
+        f"{time.perf_counter() - start:.2f}秒)"
+    )
+
+    if args.verify:
+        try:
+            mismatches = aggregator.verify()
+        except DataLoadError as e:
+            raise SystemExit(f"データの読み込みに失敗しました: {str(e)}")
+        for mismatch in mismatches:
+            print(f"不一致: {mismatch}")
+        if mismatches:
+            raise SystemExit(1)
+        print("全件からの再計算と一致しました")
+
+
+if __name__ == "__main__":
+    main()
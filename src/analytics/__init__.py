@@ -0,0 +1,110 @@
+from .preprocess import (
+    prepare_data,
+    fill_unknown_usernames,
+    filter_month,
+    list_periods,
+    filter_period,
+    format_period,
+)
+from .ranking import calculate_average_score, calculate_growth_ranking
+from .growth import calculate_mode_growth, list_modes
+from .rank_history import calculate_rank_history
+from .learning_curve import calculate_learning_curves, learning_curve_values
+from .similarity import build_user_features, SimilarityIndex
+from .anomaly import (
+    ANOMALY_REASONS,
+    drop_invalid_scores,
+    flag_anomalies,
+    separate_anomalies,
+)
+from .resampling import bootstrap_best_time, bootstrap_difficulty_language_intervals
+from .miss import analyze_misses
+from .miss_trend import MissCube
+from .keyboard import KeyboardIndex
+from .compare import UserPartitions, compare_users
+from .topk import top_k, bottom_k, page_count, RankIndex
+from .summary import calculate_overall_metrics, calculate_user_metrics
+from .heatmap import (
+    calculate_best_score_times,
+    calculate_hourly_best_counts,
+    calculate_weekday_hour_matrix,
+    calculate_difficulty_language_matrix,
+    find_best_time,
+)
+from .incremental import (
+    RunningAggregates,
+    aggregate_overall_metrics,
+    aggregate_user_metrics,
+    aggregate_average_score,
+    aggregate_growth_ranking,
+    aggregate_misses,
+    aggregate_hourly_best_counts,
+    compare_with_full,
+)
+
+from utils.config import ANALYTICS_BACKEND
+
+if ANALYTICS_BACKEND == "duckdb":
+    # 集計をDuckDBで実行する（duckdbは選択した場合のみ読み込む）
+    from .duckdb_backend import (
+        calculate_average_score,
+        calculate_growth_ranking,
+        analyze_misses,
+        calculate_best_score_times,
+        calculate_hourly_best_counts,
+        calculate_weekday_hour_matrix,
+        calculate_difficulty_language_matrix,
+        find_best_time,
+    )
+elif ANALYTICS_BACKEND != "polars":
+    raise ValueError(
+        f"ANALYTICS_BACKEND は polars または duckdb を指定してください: {ANALYTICS_BACKEND}"
+    )
+
+__all__ = [
+    "prepare_data",
+    "fill_unknown_usernames",
+    "filter_month",
+    "list_periods",
+    "filter_period",
+    "format_period",
+    "calculate_average_score",
+    "calculate_growth_ranking",
+    "calculate_mode_growth",
+    "list_modes",
+    "calculate_rank_history",
+    "calculate_learning_curves",
+    "learning_curve_values",
+    "build_user_features",
+    "SimilarityIndex",
+    "ANOMALY_REASONS",
+    "drop_invalid_scores",
+    "flag_anomalies",
+    "separate_anomalies",
+    "bootstrap_best_time",
+    "bootstrap_difficulty_language_intervals",
+    "analyze_misses",
+    "MissCube",
+    "KeyboardIndex",
+    "UserPartitions",
+    "compare_users",
+    "top_k",
+    "bottom_k",
+    "page_count",
+    "RankIndex",
+    "calculate_overall_metrics",
+    "calculate_user_metrics",
+    "calculate_best_score_times",
+    "calculate_hourly_best_counts",
+    "calculate_weekday_hour_matrix",
+    "calculate_difficulty_language_matrix",
+    "find_best_time",
+    "RunningAggregates",
+    "aggregate_overall_metrics",
+    "aggregate_user_metrics",
+    "aggregate_average_score",
+    "aggregate_growth_ranking",
+    "aggregate_misses",
+    "aggregate_hourly_best_counts",
+    "compare_with_full",
+]
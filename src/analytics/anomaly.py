@@ -0,0 +1,143 @@
+import polars as pl
+from utils.config import ANOMALY_ACTION, ANOMALY_Z_THRESHOLD
+
+from .growth import MODE_KEYS
+
+# 異常の種類: 表示名
+ANOMALY_REASONS = {
+    "accuracy": "正確度が範囲外（0以下または1超）",
+    "typing_count": "タイピング数が0以下",
+    "score_outlier": "前後のプレイから飛び抜けて高い・低いスコア",
+}
+# 1行だけで判定できる（値としてありえない）異常。差分の行にも同じ基準で適用できる
+INVALID_REASONS = ("accuracy", "typing_count")
+ANOMALY_ACTIONS = ("exclude", "flag", "off")
+# ロバストzスコアを計算する最小のプレイ回数（ユーザー×モードごと）
+MIN_PLAYS = 5
+# スコアの傾向とする移動中央値のプレイ数（前後を含む）
+ROLLING_PLAYS = 7
+# MADを正規分布の標準偏差に換算する係数
+MAD_SCALE = 0.6745
+# 傾向より低い側は、この割合を下回るスコアだけを異常とする
+# （上達による数回のうちの伸びはこれより小さい）
+LOW_SCORE_RATIO = 0.25
+
+
+def _invalid_reason() -> pl.Expr:
+    """1行だけで判定できる異常の種類（INVALID_REASONS のキー、正常な行はNone）"""
+    accuracy, typing_count = pl.col("accuracy"), pl.col("typing_count")
+    return (
+        pl.when(accuracy.is_null() | (accuracy <= 0) | (accuracy > 1))
+        .then(pl.lit("accuracy"))
+        .when(typing_count.is_null() | (typing_count <= 0))
+        .then(pl.lit("typing_count"))
+    )
+
+
+def flag_anomalies(
+    scores: pl.DataFrame, threshold: float = ANOMALY_Z_THRESHOLD
+) -> pl.DataFrame:
+    """スコアの各行に異常の種類とロバストzスコアを追加
+
+    ロバストzスコアは、ユーザー×モードごとのプレイ順の移動中央値（前後を含む
+    ROLLING_PLAYS 回）からの残差を、スコアの中央絶対偏差（MAD）で割った
+    0.6745 * (score - 移動中央値) / MAD で求める。上達による傾向は移動中央値が吸収するため、
+    上達中のユーザーの初期の低いスコアは外れ値にならない。高い側はロバストzスコアが
+    threshold を超えるスコア、低い側はさらに傾向の LOW_SCORE_RATIO 未満のスコアを
+    異常とする（最初・最後のプレイの外れ値は成長率を大きく歪める）。
+    ウィンドウ関数として全ユーザー分をまとめて計算する。
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+        threshold (float): 異常とするロバストzスコア
+
+    Returns:
+        pl.DataFrame: scores に anomaly（ANOMALY_REASONS のキー、正常な行はNone）と
+            robust_z（プレイ回数が少ない・MADが0の場合はNone）を追加したもの
+    """
+    keys = ["user_id", *MODE_KEYS]
+    score = pl.col("score")
+    trend = score.rolling_median(ROLLING_PLAYS, min_samples=1, center=True)
+    mad = (score - score.median()).abs().median()
+    robust_z = (
+        pl.when((pl.len() >= MIN_PLAYS) & (mad > 0))
+        .then(MAD_SCALE * (score - trend) / mad)
+        .over(keys)
+    )
+    # 低い側の判定に使う、傾向に対するスコアの割合
+    trend_ratio = (score / trend).over(keys)
+
+    return (
+        scores.with_row_index("_row")
+        # 移動中央値はユーザー×モードごとのプレイ順に計算し、最後に元の順に戻す
+        .sort([*keys, "created_at", "_row"])
+        .with_columns(robust_z.alias("robust_z"), trend_ratio.alias("_ratio"))
+        .sort("_row")
+        .with_columns(
+            _invalid_reason()
+            .when(
+                (pl.col("robust_z") > threshold)
+                | (
+                    (pl.col("robust_z") < -threshold)
+                    & (pl.col("_ratio") < LOW_SCORE_RATIO)
+                )
+            )
+            .then(pl.lit("score_outlier"))
+            .alias("anomaly")
+        )
+        .drop("_row", "_ratio")
+    )
+
+
+def drop_invalid_scores(
+    scores: pl.DataFrame, action: str = ANOMALY_ACTION
+) -> pl.DataFrame:
+    """値としてありえないスコア（INVALID_REASONS）を、action が "exclude" の場合に除く
+
+    1行だけで判定できるため、差分の行だけを取り込む集計値
+    （analytics.incremental.RunningAggregates）にも同じ基準で適用できる。
+    前後のプレイと比較する外れ値（score_outlier）は除かない（separate_anomalies を参照）。
+    """
+    _check_action(action)
+    if action != "exclude":
+        return scores
+    return scores.filter(_invalid_reason().is_null())
+
+
+def _check_action(action: str):
+    if action not in ANOMALY_ACTIONS:
+        raise ValueError(
+            f"ANOMALY_ACTION は {', '.join(ANOMALY_ACTIONS)} のいずれかを指定してください: {action}"
+        )
+
+
+def separate_anomalies(
+    scores: pl.DataFrame,
+    action: str = ANOMALY_ACTION,
+    threshold: float = ANOMALY_Z_THRESHOLD,
+) -> tuple:
+    """異常なスコアを検出し、設定に応じて集計対象から除く
+
+    "exclude" では値としてありえないスコア（INVALID_REASONS）と外れたスコア
+    （score_outlier）を除く。外れたスコアは前後のプレイとの比較で決まるため、
+    差分の行だけを取り込む集計値では全件から集計し直すときにだけ除かれる
+    （analytics.incremental.RunningAggregates.from_frames を参照）。
+
+    Args:
+        scores (pl.DataFrame): 前処理済みのスコアデータ
+        action (str): "exclude"（除く）、"flag"（残す）、"off"（検出しない）
+        threshold (float): 異常とするロバストzスコア
+
+    Returns:
+        tuple: (集計に使うスコア, 異常なスコアの一覧（anomaly・robust_z 付き）)。
+            "off" の場合、一覧はNone
+    """
+    _check_action(action)
+    if action == "off":
+        return scores, None
+
+    flagged = flag_anomalies(scores, threshold)
+    anomalies = flagged.filter(pl.col("anomaly").is_not_null())
+    if action == "exclude" and anomalies.height > 0:
+        scores = flagged.filter(pl.col("anomaly").is_null()).drop("robust_z", "anomaly")
+    return scores, anomalies
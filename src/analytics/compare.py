@@ -0,0 +1,111 @@
+import polars as pl
+
+from .growth import MODE_KEYS, calculate_mode_growth
+
+# 比較するユーザーごとのミスタイプの多い文字の数
+COMPARE_MISS_CHARS = 5
+
+
+def _partition_by_user(df: pl.DataFrame) -> dict:
+    """ユーザーIDごとにデータフレームを分割"""
+    return {
+        key[0]: part for key, part in df.partition_by("user_id", as_dict=True).items()
+    }
+
+
+class UserPartitions:
+    """ユーザーIDごとに分割したスコア・ミスタイプ
+
+    作成時に1回だけ分割しておき、比較するユーザーの行は分割の連結で取り出す
+    （全体を絞り込まないため、取り出す時間は選んだユーザーの行数に比例する）。
+    """
+
+    def __init__(self, scores: pl.DataFrame, misses: pl.DataFrame):
+        self._scores = _partition_by_user(scores)
+        self._misses = _partition_by_user(misses)
+        self._empty_scores = scores.clear()
+        self._empty_misses = misses.clear()
+
+    def select(self, user_ids: list) -> tuple:
+        """指定したユーザーのスコアとミスタイプ
+
+        Returns:
+            tuple: (scores, misses)。データのないユーザーは含まない
+        """
+        scores = [self._scores[i] for i in user_ids if i in self._scores]
+        misses = [self._misses[i] for i in user_ids if i in self._misses]
+        return (
+            pl.concat([self._empty_scores, *scores]),
+            pl.concat([self._empty_misses, *misses]),
+        )
+
+
+def compare_users(
+    scores: pl.DataFrame, misses: pl.DataFrame, miss_chars: int = COMPARE_MISS_CHARS
+) -> dict:
+    """複数のユーザーのサマリー・モードごとの成長率・ミスタイプ・スコアの推移を計算
+
+    比較するユーザーのデータ（UserPartitions.select の結果）を受け取り、各集計を
+    ユーザーIDでの1回のグループ化で全員分まとめて求める（ユーザーごとのループはない）。
+
+    Args:
+        scores (pl.DataFrame): 比較するユーザーのスコアデータ
+        misses (pl.DataFrame): 比較するユーザーのミスタイプデータ
+        miss_chars (int): ユーザーごとのミスタイプの多い文字の数
+
+    Returns:
+        dict: 次のデータフレーム（いずれもユーザー名の順）
+            - metrics: user_id, username と calculate_user_metrics と同じ項目
+            - growth: user_id, lang_id, diff_id と calculate_mode_growth と同じ項目
+            - misses: user_id, miss_char, miss_count（ユーザーごとに多い順に miss_chars 件）
+            - trend: user_id, username, date, average_score（日ごとの平均スコア）
+    """
+    metrics = (
+        scores.group_by("user_id")
+        .agg(
+            pl.col("username").first(),
+            pl.len().alias("total_plays"),
+            pl.col("score").mean().alias("average_score"),
+            pl.col("accuracy").mean().alias("average_accuracy"),
+            pl.col("typing_count").mean().alias("average_typing_count"),
+        )
+        .join(
+            misses.group_by("user_id").agg(
+                pl.col("miss_count").sum().alias("total_misses")
+            ),
+            on="user_id",
+            how="left",
+        )
+        .with_columns(pl.col("total_misses").fill_null(0))
+        .sort(["username", "user_id"])
+    )
+    order = metrics.select("user_id", pl.int_range(pl.len()).alias("order"))
+
+    def by_user(frame: pl.DataFrame, keys: list) -> pl.DataFrame:
+        # 比較するユーザーの順（ユーザー名の順）に並べる
+        return (
+            frame.join(order, on="user_id", maintain_order="left")
+            .sort(["order", *keys], maintain_order=True)
+            .drop("order")
+        )
+
+    growth = by_user(calculate_mode_growth(scores, by=["user_id"]), MODE_KEYS)
+    miss_top = (
+        misses.group_by(["user_id", "miss_char"])
+        .agg(pl.col("miss_count").sum())
+        .sort(["user_id", "miss_count", "miss_char"], descending=[False, True, False])
+        .group_by("user_id", maintain_order=True)
+        .head(miss_chars)
+    )
+    trend = (
+        scores.group_by(["user_id", pl.col("created_at").dt.date().alias("date")])
+        .agg(pl.col("score").mean().alias("average_score"))
+        .join(metrics.select("user_id", "username"), on="user_id")
+        .select("user_id", "username", "date", "average_score")
+    )
+    return {
+        "metrics": metrics,
+        "growth": growth,
+        "misses": by_user(miss_top, []).select("user_id", "miss_char", "miss_count"),
+        "trend": by_user(trend, ["date"]),
+    }
@@ -0,0 +1,204 @@
+"""DuckDBで集計する実装（ANALYTICS_BACKEND=duckdb で選択）
+
+Polarsの実装（ranking・miss・heatmap）と同じ引数・同じ結果を返す。
+データはPolarsのデータフレーム（コピーせずに参照する）のほか、
+Parquetファイルのパスのリスト（PartitionedStore.files）も渡せる。
+パスを渡した場合は必要な列だけをファイルから読み、メモリに収まらない分は
+DUCKDB_TEMP_DIR に書き出しながら集計する。
+"""
+
+import threading
+
+import duckdb
+import polars as pl
+from utils.config import DUCKDB_MEMORY_LIMIT, DUCKDB_TEMP_DIR, DUCKDB_THREADS
+
+from .heatmap import (
+    END_HOUR,
+    START_HOUR,
+    _best_time,
+    _difficulty_language_grid,
+    _hourly_counts,
+    _weekday_hour_counts,
+)
+
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def get_connection() -> duckdb.DuckDBPyConnection:
+    """プロセス内で共有するDuckDBの接続（インメモリ）"""
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            config = {"temp_directory": DUCKDB_TEMP_DIR}
+            if DUCKDB_THREADS:
+                config["threads"] = DUCKDB_THREADS
+            if DUCKDB_MEMORY_LIMIT:
+                config["memory_limit"] = DUCKDB_MEMORY_LIMIT
+            _connection = duckdb.connect(config=config)
+        return _connection
+
+
+def _time_zone(data) -> str:
+    """日時の抽出に使うタイムゾーン（Polarsと同じく created_at 列のタイムゾーン）"""
+    if isinstance(data, pl.DataFrame):
+        dtype = data.schema.get("created_at")
+        if isinstance(dtype, pl.Datetime) and dtype.time_zone:
+            return dtype.time_zone
+    return "UTC"
+
+
+def query(sql: str, params: list = None, **tables) -> pl.DataFrame:
+    """テーブル名=データ で指定したデータに対してSQLを実行する
+
+    Args:
+        sql (str): SQL
+        params (list): SQLのパラメータ
+        **tables: テーブル名とデータ（pl.DataFrame またはParquetファイルのパスのリスト）
+
+    Returns:
+        pl.DataFrame: 実行結果
+    """
+    # 接続はスレッド間で共有できないため、呼び出しごとにカーソルを作る
+    cursor = get_connection().cursor()
+    try:
+        time_zone = _time_zone(next(iter(tables.values()), None))
+        cursor.execute(f"SET TimeZone = '{time_zone}'")
+        for name, data in tables.items():
+            if isinstance(data, pl.DataFrame):
+                cursor.register(name, data)
+            else:
+                paths = [str(path) for path in data]
+                cursor.read_parquet(paths, hive_partitioning=False).create_view(name)
+        return cursor.execute(sql, params).pl()
+    finally:
+        cursor.close()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def calculate_average_score(scores) -> pl.DataFrame:
+    """平均スコアランキングを計算（analytics.ranking と同じ結果）"""
+    return query(
+        """
+        SELECT username,
+               avg(score) AS average_score,
+               count(score)::UINTEGER AS play_count
+        FROM scores
+        GROUP BY username
+        ORDER BY average_score DESC NULLS FIRST
+        """,
+        scores=scores,
+    )
+
+
+def calculate_growth_ranking(scores) -> pl.DataFrame:
+    """成長率ランキングを計算（analytics.ranking と同じ結果）
+
+    データに含まれるモード（言語×難易度）ごとに最初と最後のスコアから成長率を求めて合計する。
+    first_score・last_score は最初・最後のモードの値。
+    """
+    growth = query(
+        """
+        WITH modes AS (
+            SELECT username, lang_id, diff_id,
+                   arg_min(score, created_at) AS first_score,
+                   arg_max(score, created_at) AS last_score
+            FROM scores
+            WHERE username IS NOT NULL
+            GROUP BY username, lang_id, diff_id
+        )
+        SELECT username,
+               arg_min(first_score, (lang_id, diff_id)) AS first_score,
+               arg_max(last_score, (lang_id, diff_id)) AS last_score,
+               sum((last_score - first_score) / first_score * 100)
+                   AS total_growth_rate
+        FROM modes
+        GROUP BY username
+        ORDER BY total_growth_rate DESC NULLS FIRST
+        """,
+        scores=scores,
+    )
+    if growth.height == 0:
+        return pl.DataFrame({"username": [], "total_growth_rate": []})
+    return growth
+
+
+def analyze_misses(misses, limit: int = None) -> pl.DataFrame:
+    """ミスタイプを分析（analytics.miss と同じ結果）"""
+    return query(
+        """
+        SELECT sum(miss_count)::BIGINT AS miss_count, miss_char AS char
+        FROM misses
+        GROUP BY miss_char
+        ORDER BY miss_count DESC NULLS FIRST, char
+        LIMIT ?
+        """,
+        [limit],
+        misses=misses,
+    )
+
+
+def calculate_best_score_times(scores) -> pl.DataFrame:
+    """各ユーザーの各難易度・モードの最高スコアと、その時間帯・曜日を取得
+
+    最高スコアが同点の場合は最も早いプレイを使う。
+    """
+    return query(
+        """
+        WITH best AS (
+            SELECT user_id, diff_id, lang_id,
+                   max(score) AS max_score,
+                   arg_min(created_at, (-score, created_at)) AS best_time
+            FROM scores
+            GROUP BY user_id, diff_id, lang_id
+        )
+        SELECT *,
+               -- UTC+9に変換（日本時間）
+               ((hour(best_time) + 9) % 24)::BIGINT AS hour,
+               -- 0=月曜日
+               (isodow(best_time) - 1)::BIGINT AS weekday
+        FROM best
+        """,
+        scores=scores,
+    )
+
+
+def calculate_hourly_best_counts(
+    scores, start_hour: int = START_HOUR, end_hour: int = END_HOUR
+) -> tuple:
+    """時間帯ごとの最高スコア数を集計（analytics.heatmap と同じ結果）"""
+    return _hourly_counts(calculate_best_score_times(scores), start_hour, end_hour)
+
+
+def calculate_weekday_hour_matrix(
+    scores, start_hour: int = START_HOUR, end_hour: int = END_HOUR
+) -> tuple:
+    """曜日×時間帯ごとの最高スコア数を集計（analytics.heatmap と同じ結果）"""
+    return _weekday_hour_counts(
+        calculate_best_score_times(scores), start_hour, end_hour
+    )
+
+
+def find_best_time(scores, is_weekday: bool) -> dict:
+    """最高スコアが出やすい時間帯を特定（analytics.heatmap と同じ結果）"""
+    return _best_time(calculate_best_score_times(scores), is_weekday)
+
+
+def calculate_difficulty_language_matrix(
+    scores, value_col: str, languages: list = None
+) -> tuple:
+    """難易度×言語ごとの平均値の2次元配列を作成（analytics.heatmap と同じ結果）"""
+    grouped = query(
+        f"""
+        SELECT difficulty, language, avg({_quote(value_col)}) AS value
+        FROM scores
+        GROUP BY difficulty, language
+        ORDER BY difficulty NULLS FIRST, language NULLS FIRST
+        """,
+        scores=scores,
+    )
+    return _difficulty_language_grid(grouped, languages)
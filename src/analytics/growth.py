@@ -0,0 +1,78 @@
+import polars as pl
+from utils.config import DIFFICULTY_NAMES, LANGUAGE_NAMES
+
+MODE_KEYS = ["lang_id", "diff_id"]
+
+
+def list_modes(scores: pl.DataFrame) -> pl.DataFrame:
+    """データに含まれるモード（言語×難易度）を取得
+
+    言語・難易度の名前は読み込み時に m_lang・m_diff から結合した列を使い、
+    ない場合は utils.config の名前（それもなければID）を使う。
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+
+    Returns:
+        pl.DataFrame: lang_id, diff_id, language, difficulty, mode_name（IDの順）
+    """
+    names = [name for name in ("language", "difficulty") if name in scores.columns]
+    modes = (
+        scores.group_by(MODE_KEYS)
+        .agg([pl.col(name).drop_nulls().first() for name in names])
+        .sort(MODE_KEYS)
+    )
+    for name, id_col, defaults in [
+        ("language", "lang_id", LANGUAGE_NAMES),
+        ("difficulty", "diff_id", DIFFICULTY_NAMES),
+    ]:
+        default = (
+            pl.col(id_col)
+            .replace_strict(defaults, default=None, return_dtype=pl.String)
+            .fill_null(pl.col(id_col).cast(pl.String))
+        )
+        if name in modes.columns:
+            default = pl.col(name).fill_null(default)
+        modes = modes.with_columns(default.alias(name))
+
+    return modes.with_columns(
+        pl.format("{} - {}", "language", "difficulty").alias("mode_name")
+    )
+
+
+def calculate_mode_growth(user_scores: pl.DataFrame, by: list = None) -> pl.DataFrame:
+    """モード（言語×難易度）ごとの初回スコア・最高スコア・成長率を計算
+
+    Args:
+        user_scores (pl.DataFrame): ユーザーのスコアデータ
+        by (list): モードに加えてグループ化する列（例: ["username"] で全ユーザー分を1回で計算）
+
+    Returns:
+        pl.DataFrame: (by), lang_id, diff_id, first_score, max_score, play_count, growth_rate
+    """
+    keys = [*(by or []), *MODE_KEYS]
+    return (
+        user_scores.group_by(keys)
+        .agg(
+            [
+                pl.col("score")
+                .sort_by("created_at", maintain_order=True)
+                .first()
+                .alias("first_score"),
+                pl.col("score").max().alias("max_score"),
+                pl.len().alias("play_count"),
+            ]
+        )
+        .with_columns(
+            # 初回スコアから最高スコアまでの成長率
+            pl.when(pl.col("first_score") != 0)
+            .then(
+                (pl.col("max_score") - pl.col("first_score"))
+                / pl.col("first_score")
+                * 100
+            )
+            .otherwise(0.0)
+            .alias("growth_rate")
+        )
+        .sort(keys)
+    )
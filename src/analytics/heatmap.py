@@ -0,0 +1,189 @@
+import polars as pl
+from utils.config import DIFFICULTY_NAMES
+
+# 表示する時間範囲（8:00-20:00）
+START_HOUR = 8
+END_HOUR = 21  # 20:00を含めるため
+WEEKDAY_NAMES = ["月", "火", "水", "木", "金"]
+
+
+def calculate_best_score_times(scores: pl.DataFrame) -> pl.DataFrame:
+    """各ユーザーの各難易度・モードの最高スコアと、その時間帯・曜日を取得
+
+    最高スコアが同点の場合は最も早いプレイを使う（行の並び順によらない）。
+    """
+    best_scores = scores.group_by(["user_id", "diff_id", "lang_id"]).agg(
+        pl.col("score").max().alias("max_score"),
+        pl.col("created_at")
+        .filter(pl.col("score") == pl.col("score").max())
+        .min()
+        .alias("best_time"),
+    )
+
+    # 日時型から時間と曜日を抽出
+    return best_scores.with_columns(
+        [
+            ((pl.col("best_time").dt.hour().cast(pl.Int64) + 9) % 24).alias(
+                "hour"
+            ),  # UTC+9に変換（日本時間）
+            ((pl.col("best_time").dt.weekday().cast(pl.Int64) - 1) % 7).alias(
+                "weekday"
+            ),  # 0=月曜日
+        ]
+    )
+
+
+def calculate_hourly_best_counts(
+    scores: pl.DataFrame, start_hour: int = START_HOUR, end_hour: int = END_HOUR
+) -> tuple:
+    """時間帯ごとの最高スコア数を集計
+
+    Returns:
+        tuple: (hours, counts) 時間帯のリストと最高スコア数のリスト
+    """
+    return _hourly_counts(calculate_best_score_times(scores), start_hour, end_hour)
+
+
+def _hourly_counts(best_scores: pl.DataFrame, start_hour: int, end_hour: int) -> tuple:
+    """最高スコアの一覧（calculate_best_score_times の結果）を時間帯ごとに数える"""
+    hours = list(range(start_hour, end_hour))
+    counts = [0] * len(hours)
+
+    # 時間帯ごとに集計
+    time_scores = (
+        best_scores.filter((pl.col("hour") >= start_hour) & (pl.col("hour") < end_hour))
+        .group_by("hour")
+        .agg(pl.col("max_score").count().alias("count"))
+        .sort("hour")
+    )
+
+    # データを埋める
+    for row in time_scores.iter_rows(named=True):
+        counts[int(row["hour"]) - start_hour] = row["count"]
+
+    return hours, counts
+
+
+def calculate_weekday_hour_matrix(
+    scores: pl.DataFrame, start_hour: int = START_HOUR, end_hour: int = END_HOUR
+) -> tuple:
+    """曜日×時間帯ごとの最高スコア数を集計（土日を除外）
+
+    Returns:
+        tuple: (hours, weekdays, z) 時間帯、曜日名、5×時間帯の2次元リスト
+    """
+    return _weekday_hour_counts(
+        calculate_best_score_times(scores), start_hour, end_hour
+    )
+
+
+def _weekday_hour_counts(
+    best_scores: pl.DataFrame, start_hour: int, end_hour: int
+) -> tuple:
+    """最高スコアの一覧を曜日×時間帯ごとに数える"""
+    hours = list(range(start_hour, end_hour))
+
+    heatmap_data = (
+        best_scores.filter(
+            (pl.col("hour") >= start_hour)
+            & (pl.col("hour") < end_hour)
+            & (pl.col("weekday") < 5)  # 土日を除外（0-4が月-金）
+        )
+        .group_by(["weekday", "hour"])
+        .agg(pl.col("max_score").count().alias("count"))
+        .sort(["weekday", "hour"])
+    )
+
+    # ヒートマップ用の2次元配列を作成
+    z = [[0] * len(hours) for _ in range(len(WEEKDAY_NAMES))]
+    for row in heatmap_data.iter_rows(named=True):
+        z[int(row["weekday"])][int(row["hour"]) - start_hour] = row["count"]
+
+    return hours, list(WEEKDAY_NAMES), z
+
+
+def find_best_time(scores: pl.DataFrame, is_weekday: bool) -> dict:
+    """最高スコアが出やすい時間帯（is_weekdayの場合は曜日×時間帯）を特定
+
+    Returns:
+        dict: {"weekday", "hour", "count"}。該当データがない場合はNone
+    """
+    return _best_time(calculate_best_score_times(scores), is_weekday)
+
+
+def _best_time(best_scores: pl.DataFrame, is_weekday: bool) -> dict:
+    """最高スコアの一覧から、最も多い時間帯（曜日×時間帯）を選ぶ"""
+    best_scores = best_scores.filter(
+        (pl.col("hour") >= START_HOUR) & (pl.col("hour") < END_HOUR)
+    )
+
+    if is_weekday:
+        group_cols = ["weekday", "hour"]
+        best_scores = best_scores.filter(pl.col("weekday") < 5)  # 土日を除外
+    else:
+        group_cols = ["hour"]
+
+    time_scores = (
+        best_scores.group_by(group_cols)
+        .agg(pl.col("max_score").count().alias("count"))
+        .sort(group_cols)
+    )
+
+    if len(time_scores) == 0:
+        return None
+
+    best_row = time_scores.filter(pl.col("count") == time_scores["count"].max()).row(
+        0, named=True
+    )
+
+    return {
+        "weekday": int(best_row["weekday"]) if is_weekday else None,
+        "hour": int(best_row["hour"]),
+        "count": int(best_row["count"]),
+    }
+
+
+def calculate_difficulty_language_matrix(
+    scores: pl.DataFrame, value_col: str, languages: list = None
+) -> tuple:
+    """難易度×言語ごとの平均値の2次元配列を作成
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+        value_col (str): 平均を取る列（"score" または "accuracy"）
+        languages (list): 列に並べる言語名（データにだけある言語は後ろに追加）。
+            Noneの場合はデータから取得
+
+    Returns:
+        tuple: (difficulties, languages, z) データがない組み合わせは0
+    """
+    grouped = (
+        scores.group_by(["difficulty", "language"])
+        .agg(pl.col(value_col).mean().alias("value"))
+        .sort(["difficulty", "language"])
+    )
+    return _difficulty_language_grid(grouped, languages)
+
+
+def _difficulty_language_grid(grouped: pl.DataFrame, languages: list) -> tuple:
+    """難易度×言語ごとの平均値（difficulty, language, value）を2次元配列に並べる"""
+    # 難易度の順序を指定（イージーからハードへ、設定にない難易度は後ろに追加）
+    difficulties = _with_extra(list(DIFFICULTY_NAMES.values()), grouped["difficulty"])
+    if languages is None:
+        languages = grouped["language"].unique(maintain_order=True).to_list()
+    else:
+        languages = _with_extra(list(languages), grouped["language"])
+
+    values = {
+        (row["difficulty"], row["language"]): row["value"]
+        for row in grouped.iter_rows(named=True)
+    }
+    z = [[values.get((diff, lang)) or 0 for lang in languages] for diff in difficulties]
+
+    return difficulties, languages, z
+
+
+def _with_extra(names: list, found: pl.Series) -> list:
+    """names の後に、データにだけある名前を名前順に追加"""
+    extra = sorted(set(found.drop_nulls().to_list()) - set(names))
+    return names + extra
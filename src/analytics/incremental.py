@@ -0,0 +1,682 @@
+import datetime
+import json
+import math
+import os
+import shutil
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+import polars as pl
+from utils.config import ANOMALY_ACTION
+
+from .anomaly import drop_invalid_scores, separate_anomalies
+from .heatmap import END_HOUR, START_HOUR, calculate_hourly_best_counts
+from .miss import analyze_misses
+from .preprocess import fill_unknown_usernames, filter_period, list_periods
+from .ranking import calculate_average_score, calculate_growth_ranking
+from .summary import calculate_overall_metrics, calculate_user_metrics
+
+# スコア集計のキー（年・月はfilter_periodと同じくcreated_atの年・月）
+SCORE_KEYS = ["user_id", "year", "month", "lang_id", "diff_id"]
+MISS_KEYS = ["user_id", "miss_char"]
+# 取り込んだ行を識別するキー（loader.FINGERPRINT_TABLES のチェックサムと同じ列）
+SCORE_ROW_KEYS = ["user_id", "created_at"]
+MISS_ROW_KEYS = ["user_id", "miss_char", "created_at"]
+
+SCORE_SCHEMA = {
+    "user_id": pl.Utf8,
+    "year": pl.Int32,
+    "month": pl.Int8,
+    "lang_id": pl.Int64,
+    "diff_id": pl.Int64,
+    "play_count": pl.UInt32,
+    "score_sum": pl.Float64,
+    "accuracy_sum": pl.Float64,
+    "typing_count_sum": pl.Int64,
+    "score_min": pl.Float64,
+    "score_max": pl.Float64,
+    "first_at": pl.Datetime,
+    "first_score": pl.Float64,
+    "last_at": pl.Datetime,
+    "last_score": pl.Float64,
+    "best_at": pl.Datetime,
+}
+# 日時の列はタイムゾーンを読み込み時のまま保持する
+SCORE_VALUE_SCHEMA = {
+    name: dtype for name, dtype in SCORE_SCHEMA.items() if dtype != pl.Datetime
+}
+MISS_SCHEMA = {"user_id": pl.Utf8, "miss_char": pl.Utf8, "miss_count": pl.Int64}
+USER_SCHEMA = {"user_id": pl.Utf8, "username": pl.Utf8}
+# 取り込んだ行の一覧（行のキーと取り込んだ時点のupdated_at）
+SCORE_ROW_SCHEMA = {
+    "user_id": pl.Utf8,
+    "created_at": pl.Datetime,
+    "updated_at": pl.Datetime,
+}
+MISS_ROW_SCHEMA = {
+    "user_id": pl.Utf8,
+    "miss_char": pl.Utf8,
+    "created_at": pl.Datetime,
+    "updated_at": pl.Datetime,
+}
+
+CHECKPOINT_META = "meta.json"
+# 最後の分割だけに保存する（以前の分割のものは追記時に削除する）ファイル
+ROW_FILES = ("users.parquet", "score_rows.parquet", "miss_rows.parquet")
+# チェックポイントに追記した差分の数がこれに達したら、1つにまとめて書き直す
+CHECKPOINT_MAX_PARTS = 32
+
+
+def _merge_expressions() -> list:
+    """集計済みの行同士をまとめる式（件数・合計は加算、最初・最後・最高は時刻で選ぶ）"""
+    return [
+        pl.col("play_count").sum(),
+        pl.col("score_sum").sum(),
+        pl.col("accuracy_sum").sum(),
+        pl.col("typing_count_sum").sum(),
+        pl.col("score_min").min(),
+        pl.col("score_max").max(),
+        pl.col("first_at").min(),
+        pl.col("first_score").sort_by("first_at").first(),
+        pl.col("last_at").max(),
+        pl.col("last_score").sort_by("last_at").last(),
+        # 最高スコアが同点の場合は最も早い時刻
+        pl.col("best_at")
+        .filter(pl.col("score_max") == pl.col("score_max").max())
+        .min(),
+    ]
+
+
+@dataclass(frozen=True)
+class RunningAggregates:
+    """差分の行だけで更新できる集計値
+
+    スコアはユーザー×年×月×言語×難易度ごとの件数・合計・最小・最大・最初・最後、
+    ミスタイプはユーザー×文字ごとの合計を保持する。
+    同じ行を2回取り込まない限り、分割して集計した結果をmergeすると
+    全行から集計した結果と一致する（2回取り込まないよう、差分読み込みで遡って
+    読み直す範囲の行のキーを保持する。prune_rows を参照）。
+
+    Attributes:
+        scores (pl.DataFrame): スコアの集計値（SCORE_SCHEMA）
+        misses (pl.DataFrame): ミスタイプの集計値（MISS_SCHEMA）
+        users (pl.DataFrame): user_idとusername（最新の読み込み結果）
+        score_rows (pl.DataFrame): 遡って読み直す範囲の取り込んだスコアの行（SCORE_ROW_SCHEMA）
+        miss_rows (pl.DataFrame): 遡って読み直す範囲の取り込んだミスタイプの行（MISS_ROW_SCHEMA）
+        scores_watermark (datetime.datetime): 取り込み済みスコアのupdated_atの最大値
+        misses_watermark (datetime.datetime): 取り込み済みミスタイプのupdated_atの最大値
+    """
+
+    scores: pl.DataFrame = field(
+        default_factory=lambda: pl.DataFrame(schema=SCORE_SCHEMA)
+    )
+    misses: pl.DataFrame = field(
+        default_factory=lambda: pl.DataFrame(schema=MISS_SCHEMA)
+    )
+    users: pl.DataFrame = field(
+        default_factory=lambda: pl.DataFrame(schema=USER_SCHEMA)
+    )
+    score_rows: pl.DataFrame = field(
+        default_factory=lambda: pl.DataFrame(schema=SCORE_ROW_SCHEMA)
+    )
+    miss_rows: pl.DataFrame = field(
+        default_factory=lambda: pl.DataFrame(schema=MISS_ROW_SCHEMA)
+    )
+    scores_watermark: datetime.datetime = None
+    misses_watermark: datetime.datetime = None
+
+    @property
+    def watermarks(self) -> dict:
+        """差分読み込みの起点 {"scores": ..., "misses": ...}"""
+        return {"scores": self.scores_watermark, "misses": self.misses_watermark}
+
+    def select_unseen(
+        self, scores: pl.DataFrame, misses: pl.DataFrame, since: dict
+    ) -> tuple:
+        """差分として読み込んだ行から、取り込み済みの行を除く
+
+        差分は since 以降に更新された行のため、遡って読んだ取り込み済みの行も含まれる。
+        キーとupdated_atが同じ行は取り込み済みとして除く。キーが同じでupdated_atが
+        異なる行は既存の行の更新で、差分では追従できない。保持していないキーの行でも、
+        作成日時が since より前の行は、キーを捨てた古い行の更新の可能性があるため
+        同じく扱う（比較するのは保持している範囲のキーだけで、全履歴とは比較しない）。
+
+        Args:
+            scores (pl.DataFrame): 差分のスコア
+            misses (pl.DataFrame): 差分のミスタイプ
+            since (dict): 差分読み込みの起点 {"scores": ..., "misses": ...}
+
+        Returns:
+            tuple: (scores, misses, rewritten)。rewritten は既存の行が更新されていた場合True
+        """
+        scores, scores_rewritten = _unseen(
+            scores, self.score_rows, SCORE_ROW_KEYS, since.get("scores")
+        )
+        misses, misses_rewritten = _unseen(
+            misses, self.miss_rows, MISS_ROW_KEYS, since.get("misses")
+        )
+        return scores, misses, scores_rewritten or misses_rewritten
+
+    def prune_rows(self, overlap: datetime.timedelta) -> "RunningAggregates":
+        """次の差分読み込みで遡って読み直す範囲（updated_at が取り込み済みの時刻から
+        overlap 以内）の行のキーだけを残す"""
+        return replace(
+            self,
+            score_rows=_recent_rows(self.score_rows, self.scores_watermark, overlap),
+            miss_rows=_recent_rows(self.miss_rows, self.misses_watermark, overlap),
+        )
+
+    @classmethod
+    def from_frames(
+        cls,
+        scores: pl.DataFrame,
+        misses: pl.DataFrame,
+        users: pl.DataFrame,
+        anomaly_action: str = ANOMALY_ACTION,
+        full: bool = False,
+    ) -> "RunningAggregates":
+        """前処理済みの行（全件または差分）から集計値を作成
+
+        値としてありえないスコアは、データセットと同じ基準で除く
+        （analytics.drop_invalid_scores を参照）。前後のプレイと比較する外れ値は
+        全件の場合（full=True）にだけ analytics.separate_anomalies で除く。差分の行に
+        含まれる外れ値は次に全件から集計し直すまで集計に残り、compare_with_full
+        （データセットと同じく separate_anomalies で除いた全件との比較）で不一致になる。
+        """
+        score_aggregates = pl.DataFrame(schema=SCORE_SCHEMA)
+        score_rows = pl.DataFrame(schema=SCORE_ROW_SCHEMA)
+        scores_watermark = None
+        if scores is not None and scores.height > 0:
+            # 除いた行も取り込み済みとして、次回の差分に含めない
+            scores_watermark = scores["updated_at"].max()
+            score_rows = scores.select(*SCORE_ROW_KEYS, "updated_at")
+            if full:
+                scores, _ = separate_anomalies(scores, anomaly_action)
+            else:
+                scores = drop_invalid_scores(scores, anomaly_action)
+            score_aggregates = (
+                scores.with_columns(
+                    pl.col("created_at").dt.year().alias("year"),
+                    pl.col("created_at").dt.month().alias("month"),
+                )
+                .group_by(SCORE_KEYS)
+                .agg(
+                    [
+                        pl.len().alias("play_count"),
+                        pl.col("score").sum().alias("score_sum"),
+                        pl.col("accuracy").sum().alias("accuracy_sum"),
+                        pl.col("typing_count").sum().alias("typing_count_sum"),
+                        pl.col("score").min().alias("score_min"),
+                        pl.col("score").max().alias("score_max"),
+                        pl.col("created_at").min().alias("first_at"),
+                        pl.col("score")
+                        .sort_by("created_at")
+                        .first()
+                        .alias("first_score"),
+                        pl.col("created_at").max().alias("last_at"),
+                        pl.col("score")
+                        .sort_by("created_at")
+                        .last()
+                        .alias("last_score"),
+                        pl.col("created_at")
+                        .filter(pl.col("score") == pl.col("score").max())
+                        .min()
+                        .alias("best_at"),
+                    ]
+                )
+                .cast(SCORE_VALUE_SCHEMA)
+                .select(SCORE_SCHEMA.keys())
+            )
+
+        miss_aggregates = pl.DataFrame(schema=MISS_SCHEMA)
+        miss_rows = pl.DataFrame(schema=MISS_ROW_SCHEMA)
+        misses_watermark = None
+        if misses is not None and misses.height > 0:
+            miss_aggregates = (
+                misses.group_by(MISS_KEYS)
+                .agg(pl.col("miss_count").sum())
+                .cast(MISS_SCHEMA)
+            )
+            miss_rows = misses.select(*MISS_ROW_KEYS, "updated_at")
+            misses_watermark = misses["updated_at"].max()
+
+        return cls(
+            scores=score_aggregates,
+            misses=miss_aggregates,
+            users=users.select(USER_SCHEMA.keys()).cast(USER_SCHEMA),
+            score_rows=score_rows,
+            miss_rows=miss_rows,
+            scores_watermark=scores_watermark,
+            misses_watermark=misses_watermark,
+        )
+
+    def merge(self, delta: "RunningAggregates") -> "RunningAggregates":
+        """差分の集計値を取り込んだ新しい集計値を返す（ユーザー情報はdelta側を使う）"""
+        return RunningAggregates(
+            scores=_merge_scores([self.scores, delta.scores]),
+            misses=_merge_misses([self.misses, delta.misses]),
+            users=delta.users if delta.users.height > 0 else self.users,
+            score_rows=_append_rows(self.score_rows, delta.score_rows),
+            miss_rows=_append_rows(self.miss_rows, delta.miss_rows),
+            scores_watermark=_latest(self.scores_watermark, delta.scores_watermark),
+            misses_watermark=_latest(self.misses_watermark, delta.misses_watermark),
+        )
+
+    def save(self, path: Path):
+        """チェックポイントとしてディレクトリに保存（1つの分割に書き直す）
+
+        書き込み途中の状態は残さない。差分だけを追記する場合は append を使う。
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        if tmp_path.exists():
+            shutil.rmtree(tmp_path)
+        tmp_path.mkdir(parents=True)
+
+        name = _part_name(0)
+        self._write_part(tmp_path / name, self)
+        _write_meta(tmp_path, self, [name])
+
+        if path.exists():
+            shutil.rmtree(path)
+        tmp_path.rename(path)
+
+    def append(self, path: Path, delta: "RunningAggregates"):
+        """差分の集計値をチェックポイントに追記する（self は delta をmergeした集計値）
+
+        追記するのは差分の集計値と、遡って読み直す範囲の行のキー・ユーザー情報だけで、
+        保存済みの集計値は書き直さない。統計情報（meta.json）を最後に書き換えるため、
+        途中で失敗しても以前の状態のまま読み込める。追記した差分が CHECKPOINT_MAX_PARTS
+        に達した場合や、チェックポイントがない場合は save で1つにまとめる。
+        """
+        path = Path(path)
+        parts = _read_meta(path).get("parts")
+        if not parts or len(parts) >= CHECKPOINT_MAX_PARTS:
+            self.save(path)
+            return
+
+        name = _part_name(int(parts[-1].split("-")[1]) + 1)
+        tmp_part = path / (name + ".tmp")
+        if tmp_part.exists():
+            shutil.rmtree(tmp_part)
+        self._write_part(tmp_part, delta)
+        if (path / name).exists():
+            # 前回統計情報を書き換える前に失敗した分割
+            shutil.rmtree(path / name)
+        tmp_part.rename(path / name)
+        _write_meta(path, self, [*parts, name])
+
+        # 以前の分割の行のキー・ユーザー情報は最後の分割のもので置き換わった
+        for previous in parts:
+            for file in ROW_FILES:
+                (path / previous / file).unlink(missing_ok=True)
+
+    def _write_part(self, part_path: Path, aggregates: "RunningAggregates"):
+        """分割を書き込む（集計値は aggregates、行のキー・ユーザー情報は self のもの）"""
+        part_path.mkdir(parents=True)
+        aggregates.scores.write_parquet(part_path / "scores.parquet")
+        aggregates.misses.write_parquet(part_path / "misses.parquet")
+        self.users.write_parquet(part_path / "users.parquet")
+        self.score_rows.write_parquet(part_path / "score_rows.parquet")
+        self.miss_rows.write_parquet(part_path / "miss_rows.parquet")
+
+    @classmethod
+    def load(cls, path: Path) -> "RunningAggregates":
+        """保存したチェックポイントを読み込む（存在しない・形式が古い場合はNone）
+
+        分割ごとの集計値はmergeし、行のキー・ユーザー情報は最後の分割のものを使う。
+        """
+        path = Path(path)
+        meta = _read_meta(path)
+        parts = [path / name for name in meta.get("parts", [])]
+        if not parts:
+            # 分割のない形式は、全件から集計し直す
+            return None
+        scores = [pl.read_parquet(part / "scores.parquet") for part in parts]
+        if any(frame.columns != list(SCORE_SCHEMA) for frame in scores):
+            # 集計のキーが異なる形式は、全件から集計し直す
+            return None
+
+        last = parts[-1]
+        return cls(
+            scores=_merge_scores(scores),
+            misses=_merge_misses(
+                [pl.read_parquet(part / "misses.parquet") for part in parts]
+            ),
+            users=pl.read_parquet(last / "users.parquet"),
+            score_rows=pl.read_parquet(last / "score_rows.parquet"),
+            miss_rows=pl.read_parquet(last / "miss_rows.parquet"),
+            scores_watermark=_parse_watermark(meta["scores"]),
+            misses_watermark=_parse_watermark(meta["misses"]),
+        )
+
+
+def _part_name(number: int) -> str:
+    return f"part-{number:06d}"
+
+
+def _read_meta(path: Path) -> dict:
+    meta_path = path / CHECKPOINT_META
+    if not meta_path.exists():
+        return {}
+    return json.loads(meta_path.read_text(encoding="utf-8"))
+
+
+def _write_meta(path: Path, aggregates: RunningAggregates, parts: list):
+    """取り込み済みの時刻と分割の一覧を書き換える（書き込み途中の状態は残さない）"""
+    meta = {
+        name: watermark.isoformat() if watermark else None
+        for name, watermark in aggregates.watermarks.items()
+    }
+    meta["parts"] = parts
+    tmp_meta = path / (CHECKPOINT_META + ".tmp")
+    tmp_meta.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp_meta, path / CHECKPOINT_META)
+
+
+def _merge_scores(frames: list) -> pl.DataFrame:
+    """スコアの集計値をまとめる（空の集計値は除く）"""
+    frames = [frame for frame in frames if frame.height > 0]
+    if not frames:
+        return pl.DataFrame(schema=SCORE_SCHEMA)
+    if len(frames) == 1:
+        return frames[0]
+    schema = frames[0].schema
+    return (
+        pl.concat([frame.cast(schema) for frame in frames])
+        .group_by(SCORE_KEYS)
+        .agg(_merge_expressions())
+        .select(schema.names())
+    )
+
+
+def _merge_misses(frames: list) -> pl.DataFrame:
+    """ミスタイプの集計値をまとめる（空の集計値は除く）"""
+    frames = [frame for frame in frames if frame.height > 0]
+    if not frames:
+        return pl.DataFrame(schema=MISS_SCHEMA)
+    if len(frames) == 1:
+        return frames[0]
+    return (
+        pl.concat([frame.cast(MISS_SCHEMA) for frame in frames])
+        .group_by(MISS_KEYS)
+        .agg(pl.col("miss_count").sum())
+    )
+
+
+def _unseen(
+    rows: pl.DataFrame, ingested: pl.DataFrame, keys: list, since: datetime.datetime
+) -> tuple:
+    """取り込み済みの行を除いた行と、既存の行が更新されていた（可能性がある）か"""
+    if rows is None or rows.height == 0:
+        return rows, False
+    rewritten = False
+    if ingested.height > 0:
+        ingested = ingested.cast(rows.select(ingested.columns).schema)
+        matched = rows.join(ingested, on=keys, how="inner", suffix="_ingested")
+        rewritten = (matched["updated_at"] != matched["updated_at_ingested"]).any()
+        rows = rows.join(ingested, on=keys, how="anti")
+    if since is not None:
+        # キーを捨てた範囲の行（作成日時が起点より前）は、既存の行の更新とみなす
+        rewritten = rewritten or (rows["created_at"] < since).any()
+    return rows, bool(rewritten)
+
+
+def _recent_rows(
+    rows: pl.DataFrame, watermark: datetime.datetime, overlap: datetime.timedelta
+) -> pl.DataFrame:
+    """updated_at が watermark - overlap 以降の行"""
+    if watermark is None or rows.height == 0:
+        return rows
+    return rows.filter(pl.col("updated_at") >= watermark - overlap)
+
+
+def _append_rows(rows: pl.DataFrame, delta: pl.DataFrame) -> pl.DataFrame:
+    if rows.height == 0:
+        return delta
+    if delta.height == 0:
+        return rows
+    return pl.concat([rows, delta.cast(rows.schema)])
+
+
+def _latest(a: datetime.datetime, b: datetime.datetime) -> datetime.datetime:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def _parse_watermark(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+def _named_scores(aggregates: RunningAggregates, period: tuple = None) -> pl.DataFrame:
+    """スコアの集計値にusernameを付ける（読み込み時と同じくユーザーが存在する行のみ）
+
+    period（年, 月）を指定した場合はその期間の集計値だけにする（Noneの場合は全期間）。
+    """
+    scores = aggregates.scores
+    if period is not None:
+        year, month = period
+        scores = scores.filter((pl.col("year") == year) & (pl.col("month") == month))
+    return fill_unknown_usernames(
+        scores.join(aggregates.users, on="user_id", how="inner")
+    )
+
+
+def aggregate_overall_metrics(aggregates: RunningAggregates) -> dict:
+    """集計値から calculate_overall_metrics と同じ全体メトリクスを計算"""
+    scores = _named_scores(aggregates)
+    return _metrics(scores) | {"total_misses": _total_misses(aggregates)}
+
+
+def aggregate_user_metrics(aggregates: RunningAggregates, user_id: str) -> dict:
+    """集計値から calculate_user_metrics と同じ個人メトリクスを計算（データがない場合はNone）"""
+    scores = _named_scores(aggregates).filter(pl.col("user_id") == user_id)
+    if scores.height == 0:
+        return None
+    return _metrics(scores) | {"total_misses": _total_misses(aggregates, user_id)}
+
+
+def _metrics(scores: pl.DataFrame) -> dict:
+    total = scores["play_count"].sum()
+    if total == 0:
+        return {
+            "total_plays": 0,
+            "average_score": None,
+            "average_accuracy": None,
+            "average_typing_count": None,
+        }
+    return {
+        "total_plays": total,
+        "average_score": scores["score_sum"].sum() / total,
+        "average_accuracy": scores["accuracy_sum"].sum() / total,
+        "average_typing_count": scores["typing_count_sum"].sum() / total,
+    }
+
+
+def _total_misses(aggregates: RunningAggregates, user_id: str = None) -> int:
+    misses = aggregates.misses.join(aggregates.users, on="user_id", how="semi")
+    if user_id is not None:
+        misses = misses.filter(pl.col("user_id") == user_id)
+    return misses["miss_count"].sum()
+
+
+def aggregate_average_score(
+    aggregates: RunningAggregates, period: tuple = None
+) -> pl.DataFrame:
+    """集計値から calculate_average_score と同じランキングを計算（period は（年, 月））"""
+    return (
+        _named_scores(aggregates, period)
+        .group_by("username")
+        .agg(
+            [
+                (pl.col("score_sum").sum() / pl.col("play_count").sum()).alias(
+                    "average_score"
+                ),
+                pl.col("play_count").sum(),
+            ]
+        )
+        .sort("average_score", descending=True)
+    )
+
+
+def aggregate_growth_ranking(
+    aggregates: RunningAggregates, period: tuple = None
+) -> pl.DataFrame:
+    """集計値から calculate_growth_ranking と同じランキングを計算（period は（年, 月））"""
+    scores = _named_scores(aggregates, period)
+    if scores.height == 0:
+        return pl.DataFrame({"username": [], "total_growth_rate": []})
+
+    mode_growth = (
+        scores.group_by(["username", "lang_id", "diff_id"])
+        .agg(
+            [
+                pl.col("first_score").sort_by("first_at").first(),
+                pl.col("last_score").sort_by("last_at").last(),
+            ]
+        )
+        .with_columns(
+            (
+                (pl.col("last_score") - pl.col("first_score"))
+                / pl.col("first_score")
+                * 100
+            ).alias("growth_rate")
+        )
+        # calculate_growth_ranking と同じモード順で並べる
+        .sort(["lang_id", "diff_id"])
+    )
+    return (
+        mode_growth.group_by("username", maintain_order=True)
+        .agg(
+            [
+                pl.col("first_score").first(),
+                pl.col("last_score").last(),
+                pl.col("growth_rate").sum().alias("total_growth_rate"),
+            ]
+        )
+        .sort("total_growth_rate", descending=True)
+    )
+
+
+def aggregate_misses(
+    aggregates: RunningAggregates, user_id: str = None
+) -> pl.DataFrame:
+    """集計値から analyze_misses と同じミスタイプ文字ランキングを計算"""
+    misses = aggregates.misses.join(aggregates.users, on="user_id", how="semi")
+    if user_id is not None:
+        misses = misses.filter(pl.col("user_id") == user_id)
+    return analyze_misses(misses)
+
+
+def aggregate_hourly_best_counts(
+    aggregates: RunningAggregates,
+    start_hour: int = START_HOUR,
+    end_hour: int = END_HOUR,
+) -> tuple:
+    """集計値から calculate_hourly_best_counts と同じ時間帯別の最高スコア数を計算
+
+    最高スコアが同点の場合は最も早いプレイの時間帯を使う。
+    """
+    # 月ごとの最高スコアの行をユーザー×モードの最高スコアとしてまとめ直す
+    best_rows = (
+        _named_scores(aggregates)
+        .group_by(["user_id", "diff_id", "lang_id"])
+        .agg(
+            pl.col("score_max").max().alias("score"),
+            pl.col("best_at")
+            .filter(pl.col("score_max") == pl.col("score_max").max())
+            .min()
+            .alias("created_at"),
+        )
+    )
+    return calculate_hourly_best_counts(best_rows, start_hour, end_hour)
+
+
+def compare_with_full(
+    aggregates: RunningAggregates,
+    scores: pl.DataFrame,
+    misses: pl.DataFrame,
+    tolerance: float = 1e-6,
+) -> list:
+    """集計値から計算した結果と、全行から再計算した結果を比較する
+
+    Args:
+        aggregates (RunningAggregates): 差分で更新してきた集計値
+        scores (pl.DataFrame): 同じ時点の全スコアデータ（前処理済み、
+            analytics.separate_anomalies で集計から除く行を除いたもの）
+        misses (pl.DataFrame): 同じ時点の全ミスタイプデータ（前処理済み）
+        tolerance (float): 浮動小数点の相対誤差の許容値
+
+    Returns:
+        list: 一致しなかった項目の説明（一致した場合は空）
+    """
+    scores = fill_unknown_usernames(scores)
+    mismatches = []
+
+    def check(name, expected, actual):
+        if not _equal(expected, actual, tolerance):
+            mismatches.append(f"{name}: 全件={expected!r} 集計値={actual!r}")
+
+    check(
+        "overall_metrics",
+        calculate_overall_metrics(scores, misses),
+        aggregate_overall_metrics(aggregates),
+    )
+    for period in [None, *list_periods(scores)]:
+        check(
+            f"average_score(period={period})",
+            _rows(calculate_average_score(filter_period(scores, period)), "username"),
+            _rows(aggregate_average_score(aggregates, period), "username"),
+        )
+        check(
+            f"growth_ranking(period={period})",
+            _rows(calculate_growth_ranking(filter_period(scores, period)), "username"),
+            _rows(aggregate_growth_ranking(aggregates, period), "username"),
+        )
+    check(
+        "misses",
+        _rows(analyze_misses(misses), "char"),
+        _rows(aggregate_misses(aggregates), "char"),
+    )
+    # 同点の最高スコアは最も早いプレイに揃えて比較する
+    check(
+        "hourly_best_counts",
+        calculate_hourly_best_counts(scores.sort("created_at")),
+        aggregate_hourly_best_counts(aggregates),
+    )
+
+    for user_id in scores["user_id"].unique().to_list():
+        user_scores = scores.filter(pl.col("user_id") == user_id)
+        user_misses = misses.filter(pl.col("user_id") == user_id)
+        check(
+            f"user_metrics({user_id})",
+            calculate_user_metrics(user_scores, user_misses),
+            aggregate_user_metrics(aggregates, user_id),
+        )
+    return mismatches
+
+
+def _rows(df: pl.DataFrame, key: str) -> list:
+    """順序に依存せず比較するため、キー順に並べた行のリストにする"""
+    if df.height == 0:
+        return []
+    return df.sort(key).rows()
+
+
+def _equal(expected, actual, tolerance: float) -> bool:
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return expected.keys() == actual.keys() and all(
+            _equal(expected[k], actual[k], tolerance) for k in expected
+        )
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        return len(expected) == len(actual) and all(
+            _equal(e, a, tolerance) for e, a in zip(expected, actual)
+        )
+    if isinstance(expected, float) or isinstance(actual, float):
+        if expected is None or actual is None:
+            return expected is None and actual is None
+        return math.isclose(expected, actual, rel_tol=tolerance, abs_tol=tolerance)
+    return expected == actual
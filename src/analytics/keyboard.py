@@ -0,0 +1,245 @@
+import unicodedata
+from functools import lru_cache
+
+import polars as pl
+
+from utils.config import KANA_INPUT
+
+# JISキーボードの文字キー（行ごと、左から）。各行の左端の位置はキーの幅を1としたずれ
+KEY_ROWS = [
+    ("1234567890-^¥", 0.0),
+    ("qwertyuiop@[", 0.5),
+    ("asdfghjkl;:]", 0.75),
+    ("zxcvbnm,./\\", 1.25),
+]
+SPACE_KEY = "space"
+# 指の名前（表示順）
+FINGER_NAMES = [
+    "左小指",
+    "左薬指",
+    "左中指",
+    "左人差し指",
+    "右人差し指",
+    "右中指",
+    "右薬指",
+    "右小指",
+    "親指",
+]
+# 行の左から何番目のキーをどの指で押すか（ホームポジション、これより右は右小指）
+_COLUMN_FINGERS = [0, 1, 2, 3, 3, 4, 4, 5, 6]
+
+# Shiftを押して入力する記号と、そのキー
+_SHIFTED = dict(zip("!\"#$%&'()=~|`{+*}<>?_", "123456789-^¥@[;:],./\\"))
+
+# かなのローマ字（最短の綴り）
+_ROMAJI = {
+    **dict(zip("あいうえお", ["a", "i", "u", "e", "o"])),
+    **{
+        kana: consonant + vowel
+        for consonant, row in [
+            ("k", "かきくけこ"),
+            ("s", "さしすせそ"),
+            ("t", "たちつてと"),
+            ("n", "なにぬねの"),
+            ("h", "はひふへほ"),
+            ("m", "まみむめも"),
+            ("r", "らりるれろ"),
+            ("g", "がぎぐげご"),
+            ("z", "ざじずぜぞ"),
+            ("d", "だぢづでど"),
+            ("b", "ばびぶべぼ"),
+            ("p", "ぱぴぷぺぽ"),
+            ("x", "ぁぃぅぇぉ"),
+        ]
+        for kana, vowel in zip(row, "aiueo")
+    },
+    **dict(zip("やゆよゃゅょ", ["ya", "yu", "yo", "xya", "xyu", "xyo"])),
+    **dict(zip("わをんっゎゔ", ["wa", "wo", "nn", "xtu", "xwa", "vu"])),
+    **dict(zip("ー、。「」・", "-,.[]/")),
+}
+
+# JISかな入力のキーの配置（KEY_ROWS と同じ並び）と、Shiftを押して入力するかな
+_KANA_ROWS = [
+    "ぬふあうえおやゆよわほへー",
+    "たていすかんなにらせ゛゜",
+    "ちとしはきくまのりれけむ",
+    "つさそひこみもねるめろ",
+]
+_KANA_SHIFTED = dict(zip("ぁぃぅぇぉゃゅょをっ「」、。・", "3e4567890z[],./"))
+
+
+def _build_layout() -> pl.DataFrame:
+    """キーの配置と押す指の表（key, row, x, finger）"""
+    rows = []
+    for row, (keys, offset) in enumerate(KEY_ROWS):
+        for column, key in enumerate(keys):
+            finger = _COLUMN_FINGERS[column] if column < len(_COLUMN_FINGERS) else 7
+            rows.append((key, row, offset + column, FINGER_NAMES[finger]))
+    rows.append((SPACE_KEY, len(KEY_ROWS), 5.5, FINGER_NAMES[-1]))
+    return pl.DataFrame(
+        rows,
+        schema={
+            "key": pl.String,
+            "row": pl.Int64,
+            "x": pl.Float64,
+            "finger": pl.String,
+        },
+        orient="row",
+    )
+
+
+KEY_LAYOUT = _build_layout()
+_KEYS = set(KEY_LAYOUT["key"].to_list()) - {SPACE_KEY}
+
+
+def _build_kana_keys() -> dict:
+    """JISかな入力の、かなを入力するキー（濁音・半濁音は清音のキーと濁点・半濁点のキー）"""
+    kana_keys = {
+        kana: [key]
+        for kana_row, (keys, _) in zip(_KANA_ROWS, KEY_ROWS)
+        for kana, key in zip(kana_row, keys)
+    }
+    kana_keys.update({kana: [key] for kana, key in _KANA_SHIFTED.items()})
+    marks = {"\u3099": "゛", "\u309a": "゜"}
+    for kana in _ROMAJI:
+        base = unicodedata.normalize("NFD", kana)
+        if len(base) == 2 and base[0] in kana_keys and base[1] in marks:
+            kana_keys[kana] = kana_keys[base[0]] + kana_keys[marks[base[1]]]
+    return kana_keys
+
+
+_KANA_KEYS = _build_kana_keys()
+
+
+def char_keys(char: str, method: str = KANA_INPUT) -> list:
+    """1文字を入力するキーの一覧（対応するキーがない場合は空）
+
+    英数字・記号はそのキー（大文字・Shiftで入力する記号も同じキー）、かなは
+    ローマ字入力ではローマ字の各文字のキー、JISかな入力ではかなのキーに対応付ける。
+    全角の英数字・記号とカタカナは、半角・ひらがなにしてから対応付ける。
+
+    Args:
+        char (str): ミスタイプの文字
+        method (str): かなの入力方式（"romaji" または "kana"）
+    """
+    if method not in ("romaji", "kana"):
+        raise ValueError(f"かなの入力方式が不正です: {method}")
+
+    char = unicodedata.normalize("NFKC", char).lower()
+    if len(char) != 1:
+        return []
+    if "ァ" <= char <= "ヶ":
+        char = chr(ord(char) - 0x60)
+
+    if char == " ":
+        return [SPACE_KEY]
+    if char in _SHIFTED:
+        return [_SHIFTED[char]]
+    if char in _KEYS:
+        return [char]
+    if method == "kana":
+        return list(_KANA_KEYS.get(char, []))
+    return [_SHIFTED.get(c, c) for c in _ROMAJI.get(char, "")]
+
+
+@lru_cache(maxsize=4096)
+def _char_key_rows(char: str, method: str) -> tuple:
+    keys = char_keys(char, method)
+    return tuple((char, key, 1 / len(keys)) for key in keys)
+
+
+def map_miss_chars(chars, method: str = KANA_INPUT) -> pl.DataFrame:
+    """ミスタイプの文字とキーの対応表を作成
+
+    1文字を複数のキーで入力する場合は、ミスタイプ回数をキーの数で等分する重みを付ける
+    （キーごとの合計は文字ごとの合計と一致する）。文字ごとの対応は一度求めたら再利用する。
+
+    Args:
+        chars: ミスタイプの文字（重複なし）
+        method (str): かなの入力方式（"romaji" または "kana"）
+
+    Returns:
+        pl.DataFrame: miss_char, key, weight（対応するキーがない文字は含まない）
+    """
+    return pl.DataFrame(
+        [row for char in chars for row in _char_key_rows(char, method)],
+        schema={"miss_char": pl.String, "key": pl.String, "weight": pl.Float64},
+        orient="row",
+    )
+
+
+class KeyboardIndex:
+    """ユーザー×キーごとのミスタイプ回数の索引
+
+    作成時にユーザー×文字ごとのミスタイプ回数を1回集計し、文字とキーの対応表と
+    1回結合してユーザー×キーの回数にしておく。全体・ユーザーごとのキー・指の
+    集計は、この小さな表の切り出しで求める（ユーザーを切り替えても再集計しない）。
+    """
+
+    def __init__(self, misses: pl.DataFrame, method: str = KANA_INPUT):
+        per_char = misses.group_by(["user_id", "miss_char"]).agg(
+            pl.col("miss_count").sum()
+        )
+        table = map_miss_chars(per_char["miss_char"].unique().to_list(), method)
+        keys = per_char.join(table, on="miss_char", how="left")
+        # user_id, key, miss_count（1文字を複数のキーで入力する場合は等分した回数）
+        self.key_counts = (
+            keys.filter(pl.col("key").is_not_null())
+            .group_by(["user_id", "key"])
+            .agg((pl.col("miss_count") * pl.col("weight")).sum().alias("miss_count"))
+            .sort(["user_id", "key"])
+        )
+        # user_id, miss_count（キーに対応付けられなかった文字の回数）
+        self.unmapped_counts = (
+            keys.filter(pl.col("key").is_null())
+            .group_by("user_id")
+            .agg(pl.col("miss_count").sum())
+        )
+
+    def _slice(self, frame: pl.DataFrame, user_id: str = None) -> pl.DataFrame:
+        if user_id is None:
+            return frame
+        return frame.filter(pl.col("user_id") == user_id)
+
+    def key_misses(self, user_id: str = None) -> pl.DataFrame:
+        """キーごとのミスタイプ回数（Noneの場合は全体）
+
+        Returns:
+            pl.DataFrame: key, row, x, finger, miss_count, share（全キーを配置順に含む）
+        """
+        counts = (
+            self._slice(self.key_counts, user_id)
+            .group_by("key")
+            .agg(pl.col("miss_count").sum())
+        )
+        return (
+            KEY_LAYOUT.join(counts, on="key", how="left", maintain_order="left")
+            .with_columns(pl.col("miss_count").fill_null(0.0))
+            .with_columns(
+                (pl.col("miss_count") / pl.col("miss_count").sum())
+                .fill_nan(0.0)
+                .alias("share")
+            )
+        )
+
+    def finger_misses(self, user_id: str = None) -> pl.DataFrame:
+        """指ごとのミスタイプ回数（Noneの場合は全体）
+
+        Returns:
+            pl.DataFrame: finger, miss_count, share（FINGER_NAMES の順）
+        """
+        return (
+            self.key_misses(user_id)
+            .group_by("finger")
+            .agg(pl.col("miss_count").sum(), pl.col("share").sum())
+            .join(
+                pl.DataFrame({"finger": FINGER_NAMES}),
+                on="finger",
+                how="right",
+            )
+            .select("finger", "miss_count", "share")
+        )
+
+    def unmapped(self, user_id: str = None) -> int:
+        """キーに対応付けられなかった文字のミスタイプ回数"""
+        return int(self._slice(self.unmapped_counts, user_id)["miss_count"].sum())
@@ -0,0 +1,132 @@
+import numpy as np
+import polars as pl
+
+from .growth import MODE_KEYS
+
+# 学習率の候補（この中から残差が最小になる値を選ぶ）
+RATE_GRID = np.geomspace(0.05, 2.0, 32)
+# 学習曲線を当てはめる最小のプレイ回数
+MIN_PLAYS = 5
+# 予測するプレイ回数（現在のプレイ回数からの追加分）
+PROJECTION_PLAYS = 50
+
+
+def calculate_learning_curves(
+    scores: pl.DataFrame,
+    projection_plays: int = PROJECTION_PLAYS,
+    min_plays: int = MIN_PLAYS,
+) -> pl.DataFrame:
+    """ユーザー×モードごとに学習曲線（べき乗則）を当てはめる
+
+    n回目のプレイのスコアを score = plateau - gain * n ** (-learning_rate) で近似する。
+    学習率を固定すると plateau・gain は最小二乗法で解けるため、学習率の候補ごとに
+    全グループの集計値を NumPy の np.bincount で1回ずつ求め、残差が最小の候補を選ぶ
+    （ユーザーごとのループはない）。gain は0以上に制約する（負になる場合は gain=0 の
+    平坦なモデル）。
+
+    次の場合は収束しなかったとして、当てはめた値をNoneにする（converged=False）。
+    - 伸びがない（gain=0）、または平坦なモデルよりBICが小さくならない
+    - 選んだ学習率が候補の端（候補の範囲外に最適な値がある可能性がある）
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+        projection_plays (int): 予測するプレイ回数（現在のプレイ回数からの追加分）
+        min_plays (int): 当てはめる最小のプレイ回数（未満のグループは値がNone）
+
+    Returns:
+        pl.DataFrame: username, lang_id, diff_id, play_count, converged, plateau,
+            gain, learning_rate, current_score, projected_score（ユーザー名・モード順）。
+            プレイ回数が少ないグループの converged はNone
+    """
+    keys = ["username", *MODE_KEYS]
+    plays = (
+        scores.filter(pl.col("username").is_not_null())
+        .sort([*keys, "created_at"], maintain_order=True)
+        .select(
+            *keys,
+            pl.struct(keys).rle_id().alias("group"),
+            pl.int_range(1, pl.len() + 1).over(keys).alias("play_index"),
+            pl.col("score").cast(pl.Float64),
+        )
+    )
+    # グループごとの最後の行（プレイ回数 = 最後のプレイの番号）
+    groups = plays.filter(pl.col("group") != pl.col("group").shift(-1).fill_null(-1))
+    result = groups.select(
+        *keys, pl.col("play_index").cast(pl.UInt32).alias("play_count")
+    )
+    if len(groups) == 0:
+        return result.with_columns(
+            pl.lit(None, dtype=pl.Boolean).alias("converged"),
+            *(
+                pl.lit(None, dtype=pl.Float64).alias(name)
+                for name in [
+                    "plateau",
+                    "gain",
+                    "learning_rate",
+                    "current_score",
+                    "projected_score",
+                ]
+            ),
+        )
+
+    group = plays["group"].to_numpy()
+    n = plays["play_index"].to_numpy().astype(np.float64)
+    y = plays["score"].to_numpy()
+    count = groups["play_index"].to_numpy().astype(np.float64)
+    n_groups = len(groups)
+
+    def group_sum(weights):
+        return np.bincount(group, weights=weights, minlength=n_groups)
+
+    y_mean = group_sum(y) / count
+    y_centered = y - y_mean[group]
+    syy = group_sum(y_centered * y_centered)
+
+    best_sse = np.full(n_groups, np.inf)
+    best = np.zeros((3, n_groups))  # plateau, gain, learning_rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for rate in RATE_GRID:
+            x = n**-rate
+            x_mean = group_sum(x) / count
+            x_centered = x - x_mean[group]
+            sxx = group_sum(x_centered * x_centered)
+            sxy = group_sum(x_centered * y_centered)
+            # gain = -slope を0以上にする（制約した最適解は slope=0 の平坦なモデル）
+            slope = np.minimum(np.where(sxx > 0, sxy / sxx, 0.0), 0.0)
+            sse = syy - slope * sxy
+            better = sse < best_sse
+            best_sse = np.where(better, sse, best_sse)
+            best[0] = np.where(better, y_mean - slope * x_mean, best[0])
+            best[1] = np.where(better, -slope, best[1])
+            best[2] = np.where(better, rate, best[2])
+
+    plateau, gain, rate = best
+    fitted = count >= min_plays
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 平坦なモデル（パラメーター1個）との比較。gain・学習率の2個分の罰則を超えて
+        # 残差が減った場合のみ伸びがあるとする
+        improved = (gain > 0) & (
+            count * np.log(syy / np.maximum(best_sse, 0.0)) > 2 * np.log(count)
+        )
+    interior = (rate > RATE_GRID[0]) & (rate < RATE_GRID[-1])
+    converged = fitted & improved & interior
+    curve = {
+        "plateau": plateau,
+        "gain": gain,
+        "learning_rate": rate,
+        "current_score": plateau - gain * count**-rate,
+        "projected_score": plateau - gain * (count + projection_plays) ** -rate,
+    }
+    return result.with_columns(
+        pl.when(pl.Series(fitted)).then(pl.Series(converged)).alias("converged"),
+        *(
+            pl.Series(name, np.where(converged, values, np.nan)).fill_nan(None)
+            for name, values in curve.items()
+        ),
+    )
+
+
+def learning_curve_values(curve: dict, play_indices) -> np.ndarray:
+    """学習曲線の当てはめ結果（calculate_learning_curves の1行）から、指定したプレイ番号のスコアを計算"""
+    n = np.asarray(play_indices, dtype=np.float64)
+    return curve["plateau"] - curve["gain"] * n ** -curve["learning_rate"]
@@ -0,0 +1,25 @@
+import polars as pl
+
+from .topk import top_k
+
+
+def analyze_misses(misses: pl.DataFrame, limit: int = None) -> pl.DataFrame:
+    """ミスタイプを分析
+
+    Args:
+        misses (pl.DataFrame): ミスタイプデータ
+        limit (int): 指定した場合は上位の件数だけを返す（全文字を並べ替えない）
+    """
+    # 文字ごとのミスタイプ回数を集計
+    miss_chars = misses.group_by("miss_char").agg(pl.col("miss_count").sum())
+    if limit is None:
+        miss_chars = miss_chars.sort("miss_count", descending=True)
+    else:
+        miss_chars = top_k(miss_chars, "miss_count", limit, key="miss_char")
+
+    # インデックスを文字に設定
+    miss_chars = miss_chars.with_columns(pl.col("miss_char").alias("char")).drop(
+        "miss_char"
+    )
+
+    return miss_chars
@@ -0,0 +1,123 @@
+import polars as pl
+
+# 集計する期間の単位
+TREND_PERIOD = "1w"
+# 悪化している文字の判定で「最近」とする期間の数
+RECENT_PERIODS = 4
+
+
+def _weekly(frame: pl.DataFrame, keys: list, agg: pl.Expr) -> pl.DataFrame:
+    """作成日時を週（月曜日始まり）ごとにまとめて集計"""
+    return (
+        frame.sort("created_at")
+        .group_by_dynamic("created_at", every=TREND_PERIOD, group_by=keys)
+        .agg(agg)
+        .rename({"created_at": "week"})
+    )
+
+
+class MissCube:
+    """週×ユーザー×文字のミスタイプ回数の集計（キューブ）
+
+    作成時にミスタイプとスコアを1回ずつ週ごとにまとめておき、ユーザー・全体の
+    文字ごとの推移や悪化している文字は、このキューブの切り出しと集計で求める
+    （ミスタイプの全件は読み直さない）。ミスタイプ回数はプレイ回数の違いを
+    揃えるため、1プレイあたりの回数（misses_per_play）でも比べる。
+    """
+
+    def __init__(self, misses: pl.DataFrame, scores: pl.DataFrame):
+        # week, user_id, miss_char, miss_count
+        self.misses = _weekly(
+            misses, ["user_id", "miss_char"], pl.col("miss_count").sum()
+        ).sort(["week", "user_id", "miss_char"])
+        # week, user_id, plays
+        self.plays = _weekly(scores, ["user_id"], pl.len().alias("plays")).sort(
+            ["week", "user_id"]
+        )
+
+    def _slice(self, frame: pl.DataFrame, user_id: str = None) -> pl.DataFrame:
+        if user_id is None:
+            return frame
+        return frame.filter(pl.col("user_id") == user_id)
+
+    def totals(self, user_id: str = None) -> pl.DataFrame:
+        """文字ごとのミスタイプ回数の合計（Noneの場合は全体、多い順）"""
+        return (
+            self._slice(self.misses, user_id)
+            .group_by("miss_char")
+            .agg(pl.col("miss_count").sum())
+            .sort(["miss_count", "miss_char"], descending=[True, False])
+        )
+
+    def trend(self, user_id: str = None, chars: list = None) -> pl.DataFrame:
+        """文字ごとの週ごとのミスタイプ回数と1プレイあたりの回数
+
+        Args:
+            user_id (str): ユーザーID（Noneの場合は全体）
+            chars (list): 文字（Noneの場合はすべて）
+
+        Returns:
+            pl.DataFrame: week, miss_char, miss_count, plays, misses_per_play
+                （プレイのあった週はミスがなくても0として含む。週・文字順）
+        """
+        misses = self._slice(self.misses, user_id)
+        if chars is not None:
+            misses = misses.filter(pl.col("miss_char").is_in(chars))
+        counts = misses.group_by(["week", "miss_char"]).agg(pl.col("miss_count").sum())
+        plays = (
+            self._slice(self.plays, user_id).group_by("week").agg(pl.col("plays").sum())
+        )
+        char_names = (
+            pl.DataFrame({"miss_char": chars}, schema={"miss_char": pl.String})
+            if chars is not None
+            else counts.select("miss_char").unique()
+        )
+        return (
+            plays.join(char_names, how="cross")
+            .join(counts, on=["week", "miss_char"], how="left")
+            .with_columns(pl.col("miss_count").fill_null(0))
+            .with_columns(
+                (pl.col("miss_count") / pl.col("plays")).alias("misses_per_play")
+            )
+            .select("week", "miss_char", "miss_count", "plays", "misses_per_play")
+            .sort(["week", "miss_char"])
+        )
+
+    def worsening(
+        self, user_id: str = None, recent: int = RECENT_PERIODS, limit: int = 5
+    ) -> pl.DataFrame:
+        """最近の週で1プレイあたりのミスタイプ回数が増えている文字
+
+        最後の recent 週とそれより前を比べ、増えた文字を増加量の多い順に返す。
+
+        Returns:
+            pl.DataFrame: miss_char, before, recent, change（1プレイあたりの回数）
+        """
+        trend = self.trend(user_id)
+        weeks = trend["week"].unique().sort()
+        if len(weeks) <= recent:
+            return pl.DataFrame(
+                schema={
+                    "miss_char": pl.String,
+                    "before": pl.Float64,
+                    "recent": pl.Float64,
+                    "change": pl.Float64,
+                }
+            )
+
+        is_recent = pl.col("week") >= weeks[-recent]
+
+        def rate(condition: pl.Expr) -> pl.Expr:
+            return (
+                pl.col("miss_count").filter(condition).sum()
+                / pl.col("plays").filter(condition).sum()
+            )
+
+        return (
+            trend.group_by("miss_char")
+            .agg(rate(~is_recent).alias("before"), rate(is_recent).alias("recent"))
+            .with_columns((pl.col("recent") - pl.col("before")).alias("change"))
+            .filter(pl.col("change") > 0)
+            .sort(["change", "miss_char"], descending=[True, False])
+            .head(limit)
+        )
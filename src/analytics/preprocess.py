@@ -0,0 +1,99 @@
+import polars as pl
+
+
+def prepare_data(scores: pl.DataFrame, misses: pl.DataFrame, users: pl.DataFrame):
+    """読み込んだデータの型を揃える
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+        misses (pl.DataFrame): ミスタイプデータ
+        users (pl.DataFrame): ユーザーデータ
+
+    Returns:
+        tuple: 型変換済みの (scores, misses, users)。いずれかが空の場合は (None, None, None)
+    """
+    if scores is None or misses is None or users is None:
+        return None, None, None
+
+    # データの存在確認
+    if scores.shape[0] == 0 or misses.shape[0] == 0 or users.shape[0] == 0:
+        return None, None, None
+
+    return cast_types(scores, misses, users)
+
+
+def cast_types(scores: pl.DataFrame, misses: pl.DataFrame, users: pl.DataFrame):
+    """データの型を揃える（空のデータフレームもそのまま変換する）
+
+    Returns:
+        tuple: 型変換済みの (scores, misses, users)
+    """
+    scores = scores.with_columns(
+        [
+            pl.col("score").cast(pl.Float64),
+            pl.col("user_id").cast(pl.Utf8),
+            pl.col("diff_id").cast(pl.Int64),
+            pl.col("lang_id").cast(pl.Int64),
+            pl.col("accuracy").cast(pl.Float64),
+            pl.col("typing_count").cast(pl.Int64),
+        ]
+    )
+
+    misses = misses.with_columns(
+        [
+            pl.col("user_id").cast(pl.Utf8),
+            pl.col("miss_count").cast(pl.Int64),
+        ]
+    )
+
+    users = users.with_columns(
+        [
+            pl.col("user_id").cast(pl.Utf8),
+        ]
+    )
+
+    return scores, misses, users
+
+
+def fill_unknown_usernames(df: pl.DataFrame) -> pl.DataFrame:
+    """usernameがnullの行に"不明"を設定する"""
+    return df.with_columns(pl.col("username").fill_null("不明"))
+
+
+def filter_month(scores: pl.DataFrame, month: int = None) -> pl.DataFrame:
+    """作成月でスコアを絞り込む（Noneの場合は全期間）"""
+    if month is None:
+        return scores
+    return scores.filter(pl.col("created_at").dt.month() == month)
+
+
+def list_periods(scores: pl.DataFrame) -> list:
+    """データに含まれる期間（年, 月）を古い順に取得"""
+    periods = (
+        scores.select(
+            pl.col("created_at").dt.year().alias("year"),
+            pl.col("created_at").dt.month().alias("month"),
+        )
+        .unique()
+        .sort(["year", "month"])
+    )
+    return list(periods.iter_rows())
+
+
+def filter_period(scores: pl.DataFrame, period: tuple = None) -> pl.DataFrame:
+    """作成年月でスコアを絞り込む（Noneの場合は全期間）"""
+    if period is None:
+        return scores
+    year, month = period
+    return scores.filter(
+        (pl.col("created_at").dt.year() == year)
+        & (pl.col("created_at").dt.month() == month)
+    )
+
+
+def format_period(period: tuple = None) -> str:
+    """期間の表示名（例: "2024年4月"、Noneの場合は"全体"）"""
+    if period is None:
+        return "全体"
+    year, month = period
+    return f"{year}年{month}月"
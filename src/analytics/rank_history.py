@@ -0,0 +1,84 @@
+import polars as pl
+
+from .growth import MODE_KEYS
+
+
+def calculate_rank_history(scores: pl.DataFrame) -> pl.DataFrame:
+    """日ごとの平均スコアランキング・成長率ランキングの順位を計算
+
+    スコアを日時順に1回だけ並べ、ユーザーごとの累積平均と、モードごとの成長率の
+    変化量の累積和（ウィンドウ関数）から各プレイの時点の値を求め、その日の最後の値を
+    日ごとの値とする。プレイしなかった日は前日までの値を引き継ぐ。
+    各日の値と順位は、その日までのスコアで calculate_average_score・
+    calculate_growth_ranking を計算した場合と同じ（同点は同じ順位）。
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+
+    Returns:
+        pl.DataFrame: date, username, average_score, average_rank,
+            total_growth_rate, growth_rank（プレイのあった日のみ、日付・ユーザー名順）
+    """
+    mode_keys = ["username", *MODE_KEYS]
+    first_score = pl.col("score").first().over(mode_keys)
+    plays = (
+        scores.filter(pl.col("username").is_not_null())
+        .sort("created_at", maintain_order=True)
+        .with_columns(
+            pl.col("created_at").dt.date().alias("date"),
+            # その時点までの平均スコア
+            (
+                pl.col("score").cum_sum().over("username")
+                / pl.col("score").cum_count().over("username")
+            ).alias("average_score"),
+            # モードの最初のスコアからこのプレイのスコアまでの成長率
+            ((pl.col("score") - first_score) / first_score * 100).alias("mode_growth"),
+        )
+        .with_columns(
+            # 全モードの成長率の合計（モードの成長率の変化量を累積する）
+            (pl.col("mode_growth") - pl.col("mode_growth").shift(1).over(mode_keys))
+            .fill_null(pl.col("mode_growth"))
+            .cum_sum()
+            .over("username")
+            .alias("total_growth_rate")
+        )
+    )
+
+    # 日ごとの最後の値
+    daily = plays.group_by(["date", "username"]).agg(
+        pl.col("average_score").last(), pl.col("total_growth_rate").last()
+    )
+
+    # プレイのあった日×ユーザーに広げ、プレイしなかった日は前日までの値を引き継ぐ
+    dates = daily.select("date").unique()
+    users = daily.select("username").unique()
+    return (
+        dates.join(users, how="cross")
+        .join(daily, on=["date", "username"], how="left")
+        .sort(["username", "date"])
+        .with_columns(
+            pl.col("average_score", "total_growth_rate").forward_fill().over("username")
+        )
+        .filter(pl.col("average_score").is_not_null())
+        .with_columns(
+            pl.col("average_score")
+            .rank("min", descending=True)
+            .over("date")
+            .cast(pl.UInt32)
+            .alias("average_rank"),
+            pl.col("total_growth_rate")
+            .rank("min", descending=True)
+            .over("date")
+            .cast(pl.UInt32)
+            .alias("growth_rank"),
+        )
+        .select(
+            "date",
+            "username",
+            "average_score",
+            "average_rank",
+            "total_growth_rate",
+            "growth_rank",
+        )
+        .sort(["date", "username"])
+    )
@@ -0,0 +1,70 @@
+import polars as pl
+
+
+def calculate_average_score(scores: pl.DataFrame) -> pl.DataFrame:
+    """平均スコアランキングを計算"""
+    # ユーザーごとの平均スコアを計算
+    avg_scores = (
+        scores.group_by("username")
+        .agg(
+            [
+                pl.col("score").mean().alias("average_score"),
+                pl.col("score").count().alias("play_count"),
+            ]
+        )
+        .sort("average_score", descending=True)
+    )
+
+    return avg_scores
+
+
+def calculate_growth_ranking(scores: pl.DataFrame) -> pl.DataFrame:
+    """成長率ランキングを計算
+
+    データに含まれるモード（言語×難易度）ごとに最初と最後のスコアから成長率を求めて合計する。
+    全モードを1回のグループ化で計算する。first_score・last_score は最初・最後のモードの値。
+    """
+    # ユーザー×モードごとの最初と最後のスコアから成長率を計算
+    mode_growth = (
+        scores.filter(pl.col("username").is_not_null())
+        .group_by(["username", "lang_id", "diff_id"])
+        .agg(
+            [
+                pl.col("score")
+                .sort_by("created_at", maintain_order=True)
+                .first()
+                .alias("first_score"),
+                pl.col("score")
+                .sort_by("created_at", maintain_order=True)
+                .last()
+                .alias("last_score"),
+            ]
+        )
+        .with_columns(
+            (
+                (pl.col("last_score") - pl.col("first_score"))
+                / pl.col("first_score")
+                * 100
+            ).alias("growth_rate")
+        )
+        # モード順（言語、難易度の順）に並べる
+        .sort(["lang_id", "diff_id"])
+    )
+
+    if mode_growth.height == 0:
+        return pl.DataFrame({"username": [], "total_growth_rate": []})
+
+    # ユーザーごとに成長率の合計を計算
+    total_growth = (
+        mode_growth.group_by("username")
+        .agg(
+            [
+                pl.col("first_score").first(),
+                pl.col("last_score").last(),
+                pl.col("growth_rate").sum().alias("total_growth_rate"),
+            ]
+        )
+        .sort("total_growth_rate", descending=True)
+    )
+
+    return total_growth
@@ -0,0 +1,175 @@
+import numpy as np
+import polars as pl
+
+from .heatmap import (
+    END_HOUR,
+    START_HOUR,
+    WEEKDAY_NAMES,
+    _best_time,
+    calculate_best_score_times,
+)
+
+# 再標本化の回数
+N_RESAMPLES = 1000
+# 信頼区間の信頼度
+CONFIDENCE = 0.95
+# 偏りを有意とする有意水準
+SIGNIFICANCE_LEVEL = 0.05
+
+
+def _user_weights(n_users: int, n_resamples: int, rng) -> np.ndarray:
+    """ユーザー単位のブートストラップの重み（再標本化ごとの各ユーザーの選ばれた回数）
+
+    同じユーザーのスコアは独立ではないため、ユーザーを単位に復元抽出する。
+    重みの行列を使うと、再標本化した集計値は「重み × ユーザーごとの集計値」の
+    行列積1回で全再標本化分を求められる。
+
+    Returns:
+        np.ndarray: (n_resamples, n_users)
+    """
+    return rng.multinomial(
+        n_users, np.full(n_users, 1 / n_users), size=n_resamples
+    ).astype(np.float64)
+
+
+def _interval(samples: np.ndarray, confidence: float = CONFIDENCE) -> tuple:
+    """再標本化した値の列ごとのパーセンタイル信頼区間 (下限, 上限)"""
+    alpha = (1 - confidence) / 2
+    low, high = np.nanquantile(samples, [alpha, 1 - alpha], axis=0)
+    return low, high
+
+
+def bootstrap_best_time(
+    scores: pl.DataFrame,
+    is_weekday: bool,
+    n_resamples: int = N_RESAMPLES,
+    seed: int = 0,
+) -> dict:
+    """最高スコアが出やすい時間帯と、その確からしさを再標本化で求める
+
+    最高スコアの一覧（calculate_best_score_times）をユーザー単位でブートストラップし、
+    最も多い時間帯の割合の信頼区間と、再標本化でもその時間帯が最多になる割合を求める。
+    また、時間帯に偏りがない（どの時間帯も同じ確率）場合に、最多の時間帯の件数が
+    観測値以上になる確率（p値）を多項分布のシミュレーションで求める。
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+        is_weekday (bool): Trueの場合は曜日×時間帯（土日を除く）
+        n_resamples (int): 再標本化の回数
+        seed (int): 乱数のシード（同じデータなら同じ結果）
+
+    Returns:
+        dict: find_best_time の結果に share（割合）, share_low, share_high（信頼区間）,
+            top_probability（最多になる割合）, p_value, significant を追加したもの。
+            該当データがない場合はNone
+    """
+    best_scores = calculate_best_score_times(scores)
+    best_time = _best_time(best_scores, is_weekday)
+    if best_time is None:
+        return None
+
+    # 最高スコアごとのセル（時間帯、または曜日×時間帯）の番号
+    n_hours = END_HOUR - START_HOUR
+    cell = pl.col("hour") - START_HOUR
+    condition = (pl.col("hour") >= START_HOUR) & (pl.col("hour") < END_HOUR)
+    n_cells = n_hours
+    if is_weekday:
+        cell = pl.col("weekday") * n_hours + cell
+        condition &= pl.col("weekday") < len(WEEKDAY_NAMES)
+        n_cells = n_hours * len(WEEKDAY_NAMES)
+    best_scores = best_scores.filter(condition).select(
+        pl.col("user_id").rank("dense").cast(pl.Int64) - 1, cell.alias("cell")
+    )
+
+    # ユーザー×セルの件数
+    users = best_scores["user_id"].to_numpy()
+    cells = best_scores["cell"].to_numpy()
+    n_users = int(users.max()) + 1
+    counts = np.zeros((n_users, n_cells))
+    np.add.at(counts, (users, cells), 1)
+
+    best_cell = best_time["hour"] - START_HOUR
+    if is_weekday:
+        best_cell += best_time["weekday"] * n_hours
+    total = counts.sum()
+
+    rng = np.random.default_rng(seed)
+    resampled = _user_weights(n_users, n_resamples, rng) @ counts
+    with np.errstate(invalid="ignore"):
+        shares = resampled[:, best_cell] / resampled.sum(axis=1)
+    share_low, share_high = _interval(shares)
+    top_probability = float(np.mean(resampled[:, best_cell] >= resampled.max(axis=1)))
+
+    # 偏りがない場合の最多のセルの件数
+    uniform_max = rng.multinomial(
+        int(total), np.full(n_cells, 1 / n_cells), size=n_resamples
+    ).max(axis=1)
+    p_value = float((np.sum(uniform_max >= best_time["count"]) + 1) / (n_resamples + 1))
+
+    return {
+        **best_time,
+        "share": float(best_time["count"] / total),
+        "share_low": float(share_low),
+        "share_high": float(share_high),
+        "top_probability": top_probability,
+        "p_value": p_value,
+        "significant": p_value < SIGNIFICANCE_LEVEL,
+    }
+
+
+def bootstrap_difficulty_language_intervals(
+    scores: pl.DataFrame,
+    value_col: str,
+    n_resamples: int = N_RESAMPLES,
+    seed: int = 0,
+) -> dict:
+    """難易度×言語ごとの平均値の信頼区間をユーザー単位のブートストラップで求める
+
+    ユーザー×セルの合計と件数を1回だけ集計し、全再標本化分の平均を
+    重みの行列との積で一度に求める（再標本化ごとのループはない）。
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+        value_col (str): 平均を取る列（"score" または "accuracy"）
+        n_resamples (int): 再標本化の回数
+        seed (int): 乱数のシード（同じデータなら同じ結果）
+
+    Returns:
+        dict: {(難易度, 言語): (下限, 上限)}
+    """
+    per_user = (
+        scores.filter(
+            pl.col("difficulty").is_not_null() & pl.col("language").is_not_null()
+        )
+        .group_by(["user_id", "difficulty", "language"])
+        .agg(
+            pl.col(value_col).sum().alias("total"), pl.col(value_col).count().alias("n")
+        )
+        .with_columns(
+            (pl.col("user_id").rank("dense").cast(pl.Int64) - 1).alias("user"),
+            (
+                pl.struct("difficulty", "language").rank("dense").cast(pl.Int64) - 1
+            ).alias("cell"),
+        )
+    )
+    if len(per_user) == 0:
+        return {}
+
+    n_users = int(per_user["user"].max()) + 1
+    cell_names = (
+        per_user.select("cell", "difficulty", "language").unique().sort("cell").rows()
+    )
+    shape = (n_users, len(cell_names))
+    index = (per_user["user"].to_numpy(), per_user["cell"].to_numpy())
+    totals, counts = np.zeros(shape), np.zeros(shape)
+    totals[index] = per_user["total"].to_numpy()
+    counts[index] = per_user["n"].to_numpy()
+
+    weights = _user_weights(n_users, n_resamples, np.random.default_rng(seed))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (weights @ totals) / (weights @ counts)
+    low, high = _interval(means)
+    return {
+        (difficulty, language): (float(low[cell]), float(high[cell]))
+        for cell, difficulty, language in cell_names
+    }
@@ -0,0 +1,154 @@
+import numpy as np
+import polars as pl
+
+from .growth import MODE_KEYS, calculate_mode_growth
+
+# ミスタイプの分布に使う文字数（全体でミスの多い順）
+MISS_FEATURE_CHARS = 30
+
+
+def build_user_features(
+    scores: pl.DataFrame, misses: pl.DataFrame, miss_chars: int = MISS_FEATURE_CHARS
+) -> pl.DataFrame:
+    """ユーザーごとの特徴量（類似ユーザーの検索に使う）を作成
+
+    特徴量の列は「種類:名前」の形式で、種類ごとに次の値を持つ。
+
+    - score: モードごとの平均スコア
+    - accuracy: モードごとの平均正確度
+    - growth: モードごとの成長率
+    - miss: ミスの多い文字ごとの、ユーザーのミス全体に占める割合
+
+    Args:
+        scores (pl.DataFrame): スコアデータ
+        misses (pl.DataFrame): ミスタイプデータ
+        miss_chars (int): ミスタイプの分布に使う文字数
+
+    Returns:
+        pl.DataFrame: username と特徴量の列（スコアのあるユーザーのみ、ユーザー名順）。
+            プレイしていないモードの値はNone
+    """
+    scores = scores.filter(pl.col("username").is_not_null())
+    mode = pl.format("{}-{}", *MODE_KEYS).alias("mode")
+
+    mode_stats = (
+        scores.group_by(["username", *MODE_KEYS])
+        .agg(pl.col("score").mean(), pl.col("accuracy").mean())
+        .join(
+            calculate_mode_growth(scores, by=["username"]).select(
+                "username", *MODE_KEYS, pl.col("growth_rate").alias("growth")
+            ),
+            on=["username", *MODE_KEYS],
+        )
+        .sort(MODE_KEYS)
+        .select("username", mode, "score", "accuracy", "growth")
+    )
+    features = mode_stats.pivot(
+        on="mode", index="username", values=["score", "accuracy", "growth"]
+    )
+    features = features.rename(
+        {
+            name: name.replace("_", ":", 1)
+            for name in features.columns
+            if name != "username"
+        }
+    )
+
+    # ミスの多い文字ごとの割合（ユーザーごとの分布）
+    misses = misses.filter(pl.col("username").is_not_null())
+    chars = (
+        misses.group_by("miss_char")
+        .agg(pl.col("miss_count").sum())
+        .top_k(miss_chars, by=["miss_count", "miss_char"], reverse=[False, True])
+        .sort(["miss_count", "miss_char"], descending=[True, False])["miss_char"]
+    )
+    miss_share = (
+        misses.group_by(["username", "miss_char"])
+        .agg(pl.col("miss_count").sum())
+        .with_columns(
+            (pl.col("miss_count") / pl.col("miss_count").sum().over("username")).alias(
+                "share"
+            )
+        )
+        .filter(pl.col("miss_char").is_in(chars.implode()))
+        .with_columns(pl.format("miss:{}", "miss_char").alias("feature"))
+        .pivot(on="feature", index="username", values="share")
+    )
+    miss_columns = [f"miss:{char}" for char in chars]
+    features = features.join(miss_share, on="username", how="left").with_columns(
+        pl.col(name).fill_null(0.0)
+        if name in miss_share.columns
+        else pl.lit(0.0).alias(name)
+        for name in miss_columns
+    )
+
+    return features.select(
+        "username",
+        *[
+            name
+            for name in features.columns
+            if not name.startswith(("username", "miss:"))
+        ],
+        *miss_columns,
+    ).sort("username")
+
+
+class SimilarityIndex:
+    """類似ユーザーの検索用の索引
+
+    作成時に特徴量を標準化した密な行列（ユーザー数×特徴量数）を1回だけ作り、
+    検索はコサイン類似度（正規化した行列と1行の積）と部分選択で行う。
+    特徴量の種類ごとに重みを揃えるため、列の多い種類が類似度を支配しない。
+    """
+
+    def __init__(self, features: pl.DataFrame, key: str = "username"):
+        self.key = key
+        self.names = features[key].to_list()
+        self.columns = [name for name in features.columns if name != key]
+        self._rows = {name: i for i, name in enumerate(self.names)}
+
+        matrix = features.select(self.columns).to_numpy().astype(np.float64)
+        with np.errstate(invalid="ignore"):
+            # 列ごとに標準化（プレイしていないモードは平均＝0とみなす）
+            mean = np.nanmean(matrix, axis=0) if len(matrix) else 0.0
+            std = np.nanstd(matrix, axis=0) if len(matrix) else 1.0
+            matrix = np.nan_to_num((matrix - mean) / np.where(std > 0, std, 1.0))
+
+        # 種類ごとの列数の平方根で割り、各種類の寄与を揃える
+        kinds = [name.split(":", 1)[0] for name in self.columns]
+        counts = {kind: kinds.count(kind) for kind in kinds}
+        matrix /= np.sqrt([counts[kind] for kind in kinds])
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = (matrix / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def similar(self, name, k: int = 5) -> pl.DataFrame:
+        """類似度の高いユーザーk人（本人を除く）
+
+        Args:
+            name: 検索するユーザー（key列の値）
+            k (int): 人数
+
+        Returns:
+            pl.DataFrame: key列, similarity（-1〜1、類似度の高い順）。索引にない場合は0件
+        """
+        row = self._rows.get(name)
+        if row is None or k <= 0:
+            return pl.DataFrame(schema={self.key: pl.String, "similarity": pl.Float64})
+
+        similarity = self.matrix @ self.matrix[row]
+        similarity[row] = -np.inf
+        k = min(k, len(self.names) - 1)
+        # 上位k件だけを部分選択してから並べ替える
+        candidates = np.argpartition(-similarity, k - 1)[:k] if k > 0 else []
+        order = sorted(candidates, key=lambda i: (-similarity[i], self.names[i]))
+        return pl.DataFrame(
+            {
+                self.key: [self.names[i] for i in order],
+                "similarity": [float(similarity[i]) for i in order],
+            },
+            schema={self.key: pl.String, "similarity": pl.Float64},
+        )
@@ -0,0 +1,39 @@
+import polars as pl
+
+
+def calculate_overall_metrics(
+    scores: pl.DataFrame, misses: pl.DataFrame = None
+) -> dict:
+    """全体メトリクスを計算"""
+    metrics = {
+        "total_plays": scores.height,
+        "average_score": scores["score"].mean(),
+        "average_accuracy": scores["accuracy"].mean(),
+        "average_typing_count": scores["typing_count"].mean(),
+    }
+
+    if misses is not None:
+        metrics["total_misses"] = misses["miss_count"].sum()
+
+    return metrics
+
+
+def calculate_user_metrics(
+    user_scores: pl.DataFrame, user_misses: pl.DataFrame
+) -> dict:
+    """ユーザーメトリクスを計算
+
+    Args:
+        user_scores (pl.DataFrame): ユーザーのスコアデータ
+        user_misses (pl.DataFrame): ユーザーのミスタイプデータ
+
+    Returns:
+        dict: ユーザーメトリクス
+    """
+    return {
+        "total_plays": user_scores.height,
+        "average_score": user_scores["score"].mean(),
+        "average_accuracy": user_scores["accuracy"].mean(),
+        "total_misses": user_misses["miss_count"].sum(),
+        "average_typing_count": user_scores["typing_count"].mean(),
+    }
@@ -0,0 +1,77 @@
+import polars as pl
+
+
+def top_k(
+    ranking: pl.DataFrame,
+    by: str,
+    k: int,
+    key: str = "username",
+    descending: bool = True,
+) -> pl.DataFrame:
+    """上位k件を取得（全体を並べ替えず、部分選択したk件だけを並べ替える）
+
+    Args:
+        ranking (pl.DataFrame): ランキングの元データ（並び順は問わない）
+        by (str): 順位を決める列
+        k (int): 件数
+        key (str): 同点の場合に昇順で並べる列
+        descending (bool): Trueの場合は大きい順、Falseの場合は小さい順（下位k件）
+
+    Returns:
+        pl.DataFrame: 順位順のk件
+    """
+    if k <= 0:
+        return ranking.clear()
+    selected = ranking.top_k(k, by=[by, key], reverse=[not descending, True])
+    return selected.sort([by, key], descending=[descending, False], nulls_last=True)
+
+
+def bottom_k(
+    ranking: pl.DataFrame, by: str, k: int, key: str = "username"
+) -> pl.DataFrame:
+    """下位k件を小さい順に取得"""
+    return top_k(ranking, by, k, key, descending=False)
+
+
+def page_count(total: int, page_size: int) -> int:
+    """total件を page_size 件ずつに分けたページ数（0件でも1ページ）"""
+    return max(1, -(-total // page_size))
+
+
+class RankIndex:
+    """ランキングの順位の索引
+
+    作成時に1回だけ並べ替え、以降の順位の取得とページの切り出しは
+    ランキングの件数によらない時間で行う。同点は同じ順位（1位, 1位, 3位...）。
+    """
+
+    def __init__(
+        self,
+        ranking: pl.DataFrame,
+        by: str,
+        key: str = "username",
+        descending: bool = True,
+    ):
+        self.by = by
+        self.key = key
+        self.ranking = ranking.sort(
+            [by, key], descending=[descending, False], nulls_last=True
+        ).with_columns(
+            pl.col(by).rank("min", descending=descending).cast(pl.UInt32).alias("rank")
+        )
+        self._ranks = dict(zip(self.ranking[key], self.ranking["rank"]))
+
+    def __len__(self) -> int:
+        return self.ranking.height
+
+    def rank(self, value) -> int:
+        """key列の値の順位（ランキングにない場合はNone）"""
+        return self._ranks.get(value)
+
+    def top(self, k: int) -> pl.DataFrame:
+        """上位k件"""
+        return self.ranking.head(k)
+
+    def page(self, page: int, page_size: int) -> pl.DataFrame:
+        """ページ（1始まり）の行を取得"""
+        return self.ranking.slice((page - 1) * page_size, page_size)
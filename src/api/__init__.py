@@ -0,0 +1,7 @@
+from .server import AnalyticsServer
+from .routes import ROUTES
+
+__all__ = [
+    "AnalyticsServer",
+    "ROUTES",
+]
@@ -0,0 +1,238 @@
+import re
+from dataclasses import dataclass
+from typing import Iterator
+
+from analytics import (
+    aggregate_average_score,
+    aggregate_growth_ranking,
+    aggregate_hourly_best_counts,
+    aggregate_misses,
+    aggregate_overall_metrics,
+    aggregate_user_metrics,
+    calculate_difficulty_language_matrix,
+    calculate_weekday_hour_matrix,
+    top_k,
+)
+from cache import DataUnavailableError, SharedCache
+from cohort import CohortFilter
+from export import EXPORT_FORMATS, EXPORT_TABLES, export_frame, iter_export
+
+
+class HttpError(Exception):
+    """HTTPエラーレスポンスとして返す例外"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class StreamResponse:
+    """チャンクに分けて返すレスポンス（ファイルのダウンロード）
+
+    Attributes:
+        content_type (str): Content-Type
+        filename (str): 保存するファイル名
+        chunks (Iterator[bytes]): 本文（送信しながら順に作成する）
+    """
+
+    content_type: str
+    filename: str
+    chunks: Iterator[bytes]
+
+
+def _period_param(params: dict) -> tuple:
+    """クエリパラメータ year・month で期間（年, 月）を取得（未指定の場合は全期間）"""
+    year, month = params.get("year"), params.get("month")
+    if year in (None, "") and month in (None, ""):
+        return None
+    if year in (None, "") or month in (None, ""):
+        raise HttpError(400, "year と month は両方指定してください")
+    if not year.isdigit():
+        raise HttpError(400, "year は西暦の整数で指定してください")
+    if not month.isdigit() or not 1 <= int(month) <= 12:
+        raise HttpError(400, "month は1〜12で指定してください")
+    return int(year), int(month)
+
+
+def _limit(params: dict, ranking, by: str, key: str = "username"):
+    """クエリパラメータ limit・order で上位（下位）の件数だけに絞り込む"""
+    limit = params.get("limit")
+    order = params.get("order", "top")
+    if order not in ("top", "bottom"):
+        raise HttpError(400, "order は top または bottom で指定してください")
+    if limit in (None, ""):
+        if order == "bottom":
+            return ranking.reverse()
+        return ranking
+    if not limit.isdigit() or int(limit) < 1:
+        raise HttpError(400, "limit は1以上の整数で指定してください")
+    return top_k(ranking, by, int(limit), key, descending=order == "top")
+
+
+def _cohort_param(params: dict) -> CohortFilter:
+    """クエリパラメータから対象者と期間を取得"""
+    try:
+        return CohortFilter.from_params(params)
+    except ValueError as e:
+        raise HttpError(400, f"対象者・期間の指定が正しくありません: {e}")
+
+
+def _compute(cache: SharedCache, params: dict, key: tuple, func):
+    """指定された対象者のデータセットで計算し、結果をキャッシュする"""
+    dataset = cache.get_dataset(_cohort_param(params))
+    if dataset is None:
+        raise DataUnavailableError("データセットを読み込めませんでした")
+    return cache.compute(key, func, dataset)
+
+
+def _aggregates(cache: SharedCache, params: dict):
+    """指定された対象者の差分更新する集計値を取得"""
+    aggregates = cache.get_aggregates(_cohort_param(params))
+    if aggregates is None:
+        raise DataUnavailableError("集計値を読み込めませんでした")
+    return aggregates
+
+
+def overall_summary(cache: SharedCache, params: dict, path_args: dict):
+    """全体メトリクス"""
+    return aggregate_overall_metrics(_aggregates(cache, params))
+
+
+def average_ranking(cache: SharedCache, params: dict, path_args: dict):
+    """平均スコアランキング"""
+    period = _period_param(params)
+    ranking = aggregate_average_score(_aggregates(cache, params), period)
+    return _limit(params, ranking, "average_score")
+
+
+def growth_ranking(cache: SharedCache, params: dict, path_args: dict):
+    """成長率ランキング"""
+    period = _period_param(params)
+    ranking = aggregate_growth_ranking(_aggregates(cache, params), period)
+    return _limit(params, ranking, "total_growth_rate")
+
+
+def misses(cache: SharedCache, params: dict, path_args: dict):
+    """ミスタイプ文字ランキング（user_id指定時は個人）"""
+    user_id = params.get("user_id") or None
+    miss_chars = aggregate_misses(_aggregates(cache, params), user_id)
+    return _limit(params, miss_chars, "miss_count", key="char")
+
+
+def user_summary(cache: SharedCache, params: dict, path_args: dict):
+    """個人メトリクス"""
+    user_id = path_args["user_id"]
+    metrics = aggregate_user_metrics(_aggregates(cache, params), user_id)
+    if metrics is None:
+        raise HttpError(404, f"ユーザー {user_id} のスコアデータが見つかりません")
+    return metrics
+
+
+def hourly_heatmap(cache: SharedCache, params: dict, path_args: dict):
+    """時間帯別の最高スコア数"""
+    hours, counts = aggregate_hourly_best_counts(_aggregates(cache, params))
+    return {"hours": hours, "counts": counts}
+
+
+def weekday_hour_heatmap(cache: SharedCache, params: dict, path_args: dict):
+    """曜日×時間帯別の最高スコア数"""
+
+    def _build(ds):
+        hours, weekdays, z = calculate_weekday_hour_matrix(ds.scores)
+        return {"hours": hours, "weekdays": weekdays, "z": z}
+
+    return _compute(cache, params, ("weekday_hour_heatmap",), _build)
+
+
+def difficulty_language_heatmap(cache: SharedCache, params: dict, path_args: dict):
+    """難易度×言語別の平均スコア・正確率"""
+    value = params.get("value", "score")
+    if value not in ("score", "accuracy"):
+        raise HttpError(400, "value は score または accuracy で指定してください")
+
+    def _build(ds):
+        difficulties, languages, z = calculate_difficulty_language_matrix(
+            ds.scores, value
+        )
+        return {"difficulties": difficulties, "languages": languages, "z": z}
+
+    return _compute(cache, params, ("difficulty_language_heatmap", value), _build)
+
+
+def anomalies(cache: SharedCache, params: dict, path_args: dict):
+    """検出した異常なスコア（検出しない設定の場合は空）"""
+    dataset = cache.get_dataset(_cohort_param(params))
+    if dataset is None:
+        raise DataUnavailableError("データセットを読み込めませんでした")
+    if dataset.anomalies is None:
+        return []
+    return dataset.anomalies.sort("created_at", descending=True)
+
+
+def export(cache: SharedCache, params: dict, path_args: dict):
+    """スコア・ミスタイプ・ランキングの書き出し（format: csv, parquet, arrow）"""
+    table = path_args["table"]
+    if table not in EXPORT_TABLES:
+        raise HttpError(404, f"書き出せるデータは {', '.join(EXPORT_TABLES)} です")
+    fmt = params.get("format") or "csv"
+    if fmt not in EXPORT_FORMATS:
+        raise HttpError(
+            400, f"format は {', '.join(EXPORT_FORMATS)} のいずれかで指定してください"
+        )
+
+    dataset = cache.get_dataset(_cohort_param(params))
+    if dataset is None:
+        raise DataUnavailableError("データセットを読み込めませんでした")
+    content_type, extension = EXPORT_FORMATS[fmt]
+    return StreamResponse(
+        content_type,
+        f"{table}.{extension}",
+        iter_export(export_frame(cache, dataset, table), fmt),
+    )
+
+
+def refresh(cache: SharedCache, params: dict, path_args: dict):
+    """キャッシュを破棄して再読み込み"""
+    cache.invalidate()
+    dataset = cache.get_dataset(_cohort_param(params))
+    if dataset is None:
+        raise DataUnavailableError("データセットを読み込めませんでした")
+    return {"version": dataset.version}
+
+
+# (メソッド, パス, ハンドラー)
+ROUTES = [
+    ("GET", r"/api/summary", overall_summary),
+    ("GET", r"/api/rankings/average", average_ranking),
+    ("GET", r"/api/rankings/growth", growth_ranking),
+    ("GET", r"/api/misses", misses),
+    ("GET", r"/api/users/(?P<user_id>[^/]+)/summary", user_summary),
+    ("GET", r"/api/heatmaps/hourly", hourly_heatmap),
+    ("GET", r"/api/heatmaps/weekday-hour", weekday_hour_heatmap),
+    ("GET", r"/api/heatmaps/difficulty-language", difficulty_language_heatmap),
+    ("GET", r"/api/anomalies", anomalies),
+    ("GET", r"/api/export/(?P<table>[^/]+)", export),
+    ("POST", r"/api/refresh", refresh),
+]
+
+_COMPILED_ROUTES = [
+    (method, re.compile(f"^{pattern}$"), handler) for method, pattern, handler in ROUTES
+]
+
+
+def resolve(method: str, path: str):
+    """パスに対応するハンドラーとパスパラメータを取得"""
+    path_matched = False
+    for route_method, pattern, handler in _COMPILED_ROUTES:
+        match = pattern.match(path)
+        if match is None:
+            continue
+        path_matched = True
+        if route_method == method:
+            return handler, match.groupdict()
+
+    if path_matched:
+        raise HttpError(405, "許可されていないメソッドです")
+    raise HttpError(404, "見つかりません")
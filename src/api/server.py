@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from cache import DataUnavailableError, SharedCache, get_shared_cache
+from utils.config import API_HOST, API_PORT
+from utils.serialization import encode_json
+
+from .routes import HttpError, StreamResponse, resolve
+
+# リクエストヘッダーの最大サイズ
+MAX_HEADER_BYTES = 16 * 1024
+
+STATUS_TEXTS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class AnalyticsServer:
+    """分析結果をJSONで返す非同期HTTPサーバー
+
+    計算はスレッドプールで実行し、結果は共有キャッシュから返す。
+    """
+
+    def __init__(self, cache: SharedCache = None):
+        self.cache = cache or get_shared_cache()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            status, payload = await self._dispatch(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            status, payload = 400, {"error": "不正なリクエストです"}
+
+        if isinstance(payload, StreamResponse):
+            await self._stream(writer, payload)
+            return
+
+        body = encode_json(payload)
+        header = (
+            f"HTTP/1.1 {status} {STATUS_TEXTS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(header.encode("latin-1") + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter, response: StreamResponse):
+        """チャンク転送でレスポンスを返す
+
+        チャンクの作成はスレッドで実行し、1チャンクごとに送信が追いつくまで待つ
+        （遅いクライアントでも送信待ちのチャンクが溜まらず、他の接続も止めない）。
+        """
+        header = (
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f'Content-Disposition: attachment; filename="{response.filename}"\r\n'
+            "Transfer-Encoding: chunked\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(header.encode("latin-1"))
+            while True:
+                chunk = await asyncio.to_thread(next, response.chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    writer.write(
+                        f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n"
+                    )
+                    await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except Exception as e:
+            # 送信を始めた後はステータスを変えられないため、終端を送らずに接続を閉じる
+            print(f"APIエラー: {str(e)}")
+        finally:
+            close = getattr(response.chunks, "close", None)
+            if close is not None:
+                close()
+            writer.close()
+
+    async def _dispatch(self, reader: asyncio.StreamReader) -> tuple:
+        raw = await reader.readuntil(b"\r\n\r\n")
+        request_line = raw.split(b"\r\n", 1)[0].decode("latin-1")
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            return 400, {"error": "不正なリクエストです"}
+
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {
+                "status": "ok",
+                "database": self.cache.breaker.state,
+                "last_error": self.cache.last_error,
+            }
+
+        params = dict(parse_qsl(url.query))
+        try:
+            handler, path_args = resolve(method, unquote(url.path))
+            path_args = {key: unquote(value) for key, value in path_args.items()}
+            # 計算はイベントループを止めないようにスレッドで実行
+            data = await asyncio.to_thread(handler, self.cache, params, path_args)
+        except HttpError as e:
+            return e.status, {"error": e.message}
+        except DataUnavailableError as e:
+            return 503, {"error": str(e)}
+        except Exception as e:
+            print(f"APIエラー: {str(e)}")
+            return 500, {"error": "サーバーエラーが発生しました"}
+
+        if isinstance(data, StreamResponse):
+            return 200, data
+        return 200, {"data": data}
+
+    async def serve(self, host: str = API_HOST, port: int = API_PORT):
+        server = await asyncio.start_server(
+            self.handle, host, port, limit=MAX_HEADER_BYTES
+        )
+        print(f"分析APIを起動しました: http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="タイピング分析API")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    asyncio.run(AnalyticsServer().serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import asyncio
+import io
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncpg
+import polars as pl
+from cohort import DEFAULT_COHORT, CohortFilter
+from loader import DataLoadError, attach_usernames, build_queries
+
+# Postgresの型とデータフレームの型の対応（ここにない型は文字列のまま）
+NUMERIC_TYPES = {
+    "int2": pl.Int64,
+    "int4": pl.Int64,
+    "int8": pl.Int64,
+    "float4": pl.Float64,
+    "float8": pl.Float64,
+    "numeric": pl.Float64,
+}
+# セッションのタイムゾーンをUTCにしているため、オフセットは常に+00
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S%.f%#z"
+
+
+async def get_async_connection() -> asyncpg.Connection:
+    """
+    非同期のデータベース接続を取得する（get_db_connection と同じ環境変数を使う）
+
+    Returns:
+        asyncpg.Connection: データベース接続オブジェクト
+    """
+    return await asyncpg.connect(
+        host=os.environ.get("DB_HOST", "db"),
+        port=os.environ.get("DB_PORT") or None,
+        database=os.environ.get("DB_NAME"),
+        user=os.environ.get("DB_USER"),
+        password=os.environ.get("DB_PASSWORD"),
+        timeout=float(os.environ.get("DB_CONNECT_TIMEOUT", "10")),
+        # 日時の文字列表現を固定して、型を指定して変換できるようにする
+        server_settings={"DateStyle": "ISO", "TimeZone": "UTC"},
+    )
+
+
+def to_positional(query: str, params: dict) -> tuple:
+    """%(name)s 形式のパラメータを asyncpg の $n 形式に変換
+
+    Returns:
+        tuple: (SQL, 引数のリスト)
+    """
+    names = []
+
+    def replace(match):
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    return re.sub(r"%\((\w+)\)s", replace, query), [params[name] for name in names]
+
+
+async def read_table_async(conn: asyncpg.Connection, query: str, params: dict):
+    """SQLの結果をCOPYで受け取り、列ごとにデータフレームへ変換する
+
+    行ごとにPythonのオブジェクトを作らず、COPYの出力をPolarsのCSVパーサーで
+    まとめて列に変換する。型は問い合わせ結果の列の型から決める。
+    """
+    query, args = to_positional(query, params)
+    attributes = (await conn.prepare(query)).get_attributes()
+    types = {attribute.name: attribute.type.name for attribute in attributes}
+
+    buffer = io.BytesIO()
+    await conn.copy_from_query(query, *args, output=buffer, format="csv", header=True)
+    buffer.seek(0)
+
+    schema = {
+        name: NUMERIC_TYPES.get(pg_type, pl.Utf8) for name, pg_type in types.items()
+    }
+    df = pl.read_csv(buffer, schema=schema)
+
+    conversions = []
+    for name, pg_type in types.items():
+        if pg_type == "bool":
+            conversions.append(
+                pl.when(pl.col(name).is_null())
+                .then(None)
+                .otherwise(pl.col(name) == "t")
+                .alias(name)
+            )
+        elif pg_type == "timestamptz":
+            conversions.append(
+                pl.col(name)
+                .str.to_datetime(TIMESTAMP_FORMAT, time_unit="us")
+                .dt.convert_time_zone("UTC")
+            )
+        elif pg_type == "timestamp":
+            conversions.append(pl.col(name).str.to_datetime(time_unit="us"))
+        elif pg_type == "date":
+            conversions.append(pl.col(name).str.to_date())
+    return df.with_columns(conversions) if conversions else df
+
+
+async def load_data_async(cohort: CohortFilter = DEFAULT_COHORT, since: dict = None):
+    """
+    タイピングデータを非同期ドライバーで読み込む（load_data と同じ結果を返す）
+
+    3つの問い合わせは別々の接続で同時に実行する。
+
+    Args:
+        cohort (CohortFilter): 対象者と期間
+        since (dict): 差分読み込みの起点（build_queries を参照）
+
+    Returns:
+        tuple: (scores, misses, users)
+
+    Raises:
+        DataLoadError: データベースから読み込めなかった場合
+    """
+    queries = build_queries(cohort, since)
+
+    async def read(name: str) -> pl.DataFrame:
+        conn = await get_async_connection()
+        try:
+            return await read_table_async(conn, *queries[name])
+        finally:
+            await conn.close()
+
+    try:
+        scores, misses, users = await asyncio.gather(
+            read("scores"), read("misses"), read("users")
+        )
+    except Exception as e:
+        raise DataLoadError(f"データベース接続エラー: {str(e)}") from e
+
+    return attach_usernames(scores, misses, users)
+
+
+def load_data_blocking(cohort: CohortFilter = DEFAULT_COHORT, since: dict = None):
+    """load_data_async を同期的に実行する（イベントループ内から呼ばれた場合は別スレッドで実行）"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(load_data_async(cohort, since))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, load_data_async(cohort, since)).result()
@@ -0,0 +1,502 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from typing import Callable
+
+import polars as pl
+from aggregates import IncrementalAggregator
+from analytics.incremental import RunningAggregates
+from analytics.anomaly import separate_anomalies
+from analytics.preprocess import filter_period, list_periods, prepare_data
+from cohort import DEFAULT_COHORT, CohortFilter
+from listener import ChangeListener, parse_change
+from loader import DataLoadError, fetch_fingerprint, load_data
+from store import PartitionedStore
+from utils.config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECONDS,
+    CACHE_TTL_SECONDS,
+    CHECKPOINT_DIR,
+    DATASET_CACHE_SIZE,
+    DB_LISTENER_ENABLED,
+    RESULT_CACHE_SIZE,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    STORE_DIR,
+)
+
+
+class DataUnavailableError(RuntimeError):
+    """データセットを取得できなかった場合の例外"""
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """前処理済みのデータセット
+
+    Attributes:
+        scores (pl.DataFrame): スコアデータ
+        misses (pl.DataFrame): ミスタイプデータ
+        users (pl.DataFrame): ユーザーデータ
+        version (str): データセットのバージョン（計算結果キャッシュのキー）。
+            通常はデータの指紋で、データが変わらなければ再読み込みしても同じ値
+        loaded_at (float): 読み込み時刻（UNIX時間）
+        cohort (CohortFilter): 読み込んだ対象者と期間
+        anomalies (pl.DataFrame): 検出した異常なスコア（analytics.separate_anomalies を参照。
+            検出しない設定の場合はNone）
+    """
+
+    scores: pl.DataFrame
+    misses: pl.DataFrame
+    users: pl.DataFrame
+    version: str
+    loaded_at: float
+    cohort: CohortFilter = DEFAULT_COHORT
+    anomalies: pl.DataFrame = None
+
+    @property
+    def age(self) -> float:
+        """読み込みからの経過秒数"""
+        return time.time() - self.loaded_at
+
+
+class SingleFlight:
+    """同じキーの処理が実行中であれば、新たに実行せずその結果を共有する"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func: Callable):
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+
+        # 実行中の処理があれば、その完了を待つ
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+        future.set_result(result)
+        return result
+
+
+class CircuitBreaker:
+    """失敗が続いた場合に、一定時間処理を止める
+
+    連続して failure_threshold 回失敗すると停止（open）し、reset_timeout 秒後に
+    1回だけ試行（half_open）する。試行が成功すれば通常（closed）に戻る。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_SECONDS,
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        """ "closed"（通常）、"open"（停止中）、"half_open"（試行可能）のいずれか"""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self._reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """処理を実行してよいか（half_openでは同時に1つだけ許可する）"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self._failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class SharedCache:
+    """データセットと計算結果をプロセス内で共有するキャッシュ
+
+    データセットは対象者・期間（CohortFilter）ごとにTTLの間再利用する。
+    TTLが切れた後は古いデータセットをすぐに返し、裏で1回だけ再読み込みする
+    （失敗した場合は待ち時間を延ばしながら再試行し、失敗が続けば一定時間止める）。
+    再読み込みでは、軽い指紋の問い合わせで変更がなければ全件を読み込み直さない。
+    計算結果はデータセットのバージョンごとに保持する。
+    差分更新する集計値（RunningAggregates）も対象者ごとにTTLの間再利用する。
+    読み込んだデータセットは年月ごとの分割（PartitionedStore）にも保存し、
+    期間別の表示は該当する分割だけを読み込む。
+    同時に同じ読み込み・計算が要求された場合は1回だけ実行する。
+    """
+
+    def __init__(
+        self,
+        loader: Callable = load_data,
+        probe: Callable = fetch_fingerprint,
+        ttl: float = CACHE_TTL_SECONDS,
+        max_results: int = RESULT_CACHE_SIZE,
+        max_datasets: int = DATASET_CACHE_SIZE,
+        checkpoint_dir=CHECKPOINT_DIR,
+        retry_attempts: int = RETRY_ATTEMPTS,
+        retry_base_delay: float = RETRY_BASE_DELAY,
+        breaker: CircuitBreaker = None,
+        store_dir=STORE_DIR,
+    ):
+        self._loader = loader
+        self._probe = probe
+        self._ttl = ttl
+        self._max_results = max_results
+        self._max_datasets = max_datasets
+        self._checkpoint_dir = checkpoint_dir
+        self._retry_attempts = retry_attempts
+        self._retry_base_delay = retry_base_delay
+        self._store_dir = store_dir
+        self.breaker = breaker or CircuitBreaker()
+        # 直近の読み込みエラー（成功すればNone）
+        self.last_error = None
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._datasets = OrderedDict()
+        self._results = OrderedDict()
+        self._aggregators = OrderedDict()
+        self._stores = OrderedDict()
+        self._load_count = 0
+
+    def get_dataset(self, cohort: CohortFilter = DEFAULT_COHORT) -> Dataset:
+        """データセットを取得する
+
+        期限切れの場合も保持しているデータセットをすぐに返し、裏で再読み込みする。
+
+        Args:
+            cohort (CohortFilter): 対象者と期間
+
+        Returns:
+            Dataset: データセット。保持しておらず読み込みにも失敗した場合はNone
+        """
+        key = ("dataset", cohort)
+        dataset = self._datasets.get(cohort)
+        if dataset is None:
+            # 返せるデータがないため、読み込みを待つ
+            return self._load_now(key, lambda: self._reload(cohort))
+        if dataset.age >= self._ttl:
+            self._revalidate(key, lambda: self._reload(cohort))
+        return dataset
+
+    def get_aggregates(
+        self, cohort: CohortFilter = DEFAULT_COHORT
+    ) -> RunningAggregates:
+        """差分更新する集計値を取得する（期限切れの場合は裏で差分のみ読み込む）
+
+        Args:
+            cohort (CohortFilter): 対象者と期間
+
+        Returns:
+            RunningAggregates: 集計値。読み込みに失敗した場合はNone
+        """
+        with self._lock:
+            aggregator = self._aggregators.get(cohort)
+            if aggregator is None:
+                aggregator = IncrementalAggregator(
+                    cohort, self._loader, self._checkpoint_dir
+                )
+                self._aggregators[cohort] = aggregator
+                while len(self._aggregators) > self._max_datasets:
+                    self._aggregators.popitem(last=False)
+            else:
+                self._aggregators.move_to_end(cohort)
+
+        key = ("aggregates", cohort)
+        if aggregator.aggregates is None:
+            return self._load_now(key, aggregator.refresh)
+        if aggregator.age >= self._ttl:
+            self._revalidate(key, aggregator.refresh)
+        return aggregator.aggregates
+
+    def get_periods(self, dataset: Dataset) -> list:
+        """データセットに含まれる期間（年, 月）を古い順に取得"""
+        return self.compute(("periods",), self._read_periods, dataset)
+
+    def get_period_scores(self, dataset: Dataset, period: tuple = None) -> pl.DataFrame:
+        """期間（年, 月）のスコアを取得する（Noneの場合は全期間）
+
+        分割に保存済みであれば該当する分割だけを読み込む。
+        """
+        if period is None:
+            return dataset.scores
+        return self.compute(
+            ("period_scores", period),
+            lambda dataset: self._read_period_scores(dataset, period),
+            dataset,
+        )
+
+    def cached_version(self, cohort: CohortFilter = DEFAULT_COHORT) -> str:
+        """保持しているデータセットのバージョン（読み込みは行わない。ない場合はNone）"""
+        dataset = self._datasets.get(cohort)
+        return dataset.version if dataset is not None else None
+
+    def on_data_changed(self, changes: set):
+        """データベースの変更通知を受けて、保持している対象者のデータを更新する
+
+        Args:
+            changes (set): {"テーブル名:操作", ...}（listener.ChangeListener を参照）
+        """
+        # 既存のスコア・ミスタイプが書き換えられた場合は差分では追従できない
+        rewritten = any(
+            table in ("t_score", "t_miss") and operation != "INSERT"
+            for table, operation in map(parse_change, changes)
+        )
+
+        with self._lock:
+            cohorts = list(self._datasets)
+            aggregators = list(self._aggregators.items())
+
+        for cohort, aggregator in aggregators:
+            update = aggregator.rebuild if rewritten else aggregator.refresh
+            self._refresh_with_retry(("aggregates", cohort), update)
+        for cohort in cohorts:
+            self._refresh_with_retry(("dataset", cohort), lambda: self._reload(cohort))
+
+    def invalidate(self):
+        """データセットと計算結果を破棄する（集計値は次回差分を読み込む）"""
+        with self._lock:
+            self._datasets.clear()
+            self._results.clear()
+            for aggregator in self._aggregators.values():
+                aggregator.refreshed_at = None
+
+    def compute(self, key: tuple, func: Callable, dataset: Dataset = None):
+        """データセットのバージョンごとに計算結果をメモ化する
+
+        Args:
+            key (tuple): 計算の識別子（関数名と引数など）
+            func (Callable): Datasetを受け取り結果を返す関数
+            dataset (Dataset): 計算対象。Noneの場合は既定の対象者のデータセット
+
+        Returns:
+            func(dataset) の結果
+        """
+        if dataset is None:
+            dataset = self.get_dataset()
+        if dataset is None:
+            raise DataUnavailableError("データセットを読み込めませんでした")
+
+        cache_key = (dataset.version, *key)
+        with self._lock:
+            if cache_key in self._results:
+                self._results.move_to_end(cache_key)
+                return self._results[cache_key]
+
+        result = self._flight.do(cache_key, lambda: func(dataset))
+
+        with self._lock:
+            self._results[cache_key] = result
+            while len(self._results) > self._max_results:
+                self._results.popitem(last=False)
+        return result
+
+    def _call_with_breaker(self, func: Callable):
+        """サーキットブレーカーを通して読み込みを実行し、結果を記録する"""
+        if not self.breaker.allow():
+            raise DataUnavailableError(
+                "データベースの読み込みに失敗が続いているため、一時的に停止しています"
+            )
+        try:
+            result = func()
+        except Exception as e:
+            self.breaker.record_failure()
+            self.last_error = str(e)
+            raise
+        self.breaker.record_success()
+        self.last_error = None
+        return result
+
+    def _load_now(self, key: tuple, func: Callable):
+        """読み込みを待って結果を返す（失敗した場合はNone）"""
+        try:
+            return self._flight.do(key, lambda: self._call_with_breaker(func))
+        except (DataLoadError, DataUnavailableError) as e:
+            print(f"データの読み込みに失敗しました: {str(e)}")
+            return None
+
+    def _revalidate(self, key: tuple, func: Callable):
+        """裏で再読み込みする（同じキーの再読み込みが実行中、または停止中であれば何もしない）"""
+        if self.breaker.state == "open":
+            return
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._refresh_with_retry(key, func)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="cache-revalidate", daemon=True).start()
+
+    def _refresh_with_retry(self, key: tuple, func: Callable) -> bool:
+        """待ち時間を延ばしながら再試行する（成功した場合はTrue）"""
+        delay = self._retry_base_delay
+        for attempt in range(1, self._retry_attempts + 1):
+            try:
+                self._flight.do(key, lambda: self._call_with_breaker(func))
+                return True
+            except DataUnavailableError as e:
+                print(f"再読み込みを中止しました: {str(e)}")
+                return False
+            except DataLoadError as e:
+                if attempt == self._retry_attempts:
+                    print(f"再読み込みに失敗しました（{attempt}回）: {str(e)}")
+                    return False
+                # 同時に再試行が集中しないよう、待ち時間をばらつかせる
+                time.sleep(delay * (1 + random.random()))
+                delay *= 2
+        return False
+
+    def _reload(self, cohort: CohortFilter) -> Dataset:
+        # 指紋が保持しているデータセットと同じなら、全件の読み込みを省略する
+        fingerprint = self._probe(cohort) if self._probe is not None else None
+        current = self._datasets.get(cohort)
+        if fingerprint is not None and current is not None:
+            if current.version == fingerprint:
+                renewed = replace(current, loaded_at=time.time())
+                with self._lock:
+                    if cohort in self._datasets:
+                        self._datasets[cohort] = renewed
+                        self._datasets.move_to_end(cohort)
+                return renewed
+
+        scores, misses, users = prepare_data(*self._loader(cohort))
+        if scores is None:
+            # 読み込みに失敗した結果はキャッシュしない
+            return None
+        # 異常なスコアを1回だけ検出し、データセットと一緒に保持する
+        scores, anomalies = separate_anomalies(scores)
+
+        with self._lock:
+            self._load_count += 1
+            load_count = self._load_count
+        dataset = Dataset(
+            scores=scores,
+            misses=misses,
+            users=users,
+            # 指紋を取得できない場合は読み込み回数をバージョンにする
+            version=fingerprint or str(load_count),
+            loaded_at=time.time(),
+            cohort=cohort,
+            anomalies=anomalies,
+        )
+        # 公開する前に保存し、期間別の表示がこのバージョンの分割を読めるようにする
+        self._write_store(dataset)
+
+        with self._lock:
+            previous = self._datasets.pop(cohort, None)
+            self._datasets[cohort] = dataset
+            while len(self._datasets) > self._max_datasets:
+                _, evicted = self._datasets.popitem(last=False)
+                self._drop_results(evicted.version)
+            if previous is not None and previous.version != dataset.version:
+                self._drop_results(previous.version)
+        return dataset
+
+    def _store_for(self, dataset: Dataset) -> PartitionedStore:
+        """データセットを保存済みの分割（保存していない場合はNone）"""
+        store = self._stores.get(dataset.cohort)
+        if store is None or store.version != dataset.version:
+            return None
+        return store
+
+    def _read_periods(self, dataset: Dataset) -> list:
+        store = self._store_for(dataset)
+        if store is None:
+            return list_periods(dataset.scores)
+        return store.periods("scores")
+
+    def _read_period_scores(self, dataset: Dataset, period: tuple) -> pl.DataFrame:
+        store = self._store_for(dataset)
+        if store is None:
+            return filter_period(dataset.scores, period)
+        return store.read("scores", [period])
+
+    def _write_store(self, dataset: Dataset):
+        """データセットを年月ごとの分割に保存する（失敗してもメモリ上のデータで表示を続ける）"""
+        if not self._store_dir:
+            return
+        with self._lock:
+            store = self._stores.get(dataset.cohort)
+            if store is None:
+                store = PartitionedStore(dataset.cohort, self._store_dir)
+                self._stores[dataset.cohort] = store
+                while len(self._stores) > self._max_datasets:
+                    self._stores.popitem(last=False)
+            else:
+                self._stores.move_to_end(dataset.cohort)
+        try:
+            store.write(
+                dataset.scores,
+                dataset.misses,
+                dataset.users,
+                dataset.version,
+                anomalies=dataset.anomalies,
+            )
+        except OSError as e:
+            print(f"分割データの保存に失敗しました: {str(e)}")
+
+    def _drop_results(self, version: str):
+        """古いバージョンの計算結果を破棄する（ロック内で呼ぶ）"""
+        for key in [key for key in self._results if key[0] == version]:
+            del self._results[key]
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> SharedCache:
+    """プロセス内で共有するキャッシュを取得
+
+    DB_LISTENER が有効な場合は、データベースの変更通知でキャッシュを更新する。
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SharedCache()
+            if DB_LISTENER_ENABLED:
+                ChangeListener(_shared_cache.on_data_changed).start()
+        return _shared_cache
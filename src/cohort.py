@@ -0,0 +1,166 @@
+import datetime
+from dataclasses import dataclass
+
+# 新卒フラグ（m_user.is_newgraduate）の選択肢
+COHORT_OPTIONS = {
+    "新卒": (1,),
+    "新卒以外": (0,),
+    "全員": None,
+}
+
+# APIやCLIで指定する対象者のキー
+COHORT_KEYS = {
+    "newgraduate": "新卒",
+    "others": "新卒以外",
+    "all": "全員",
+}
+
+# スコアがこの値以下のデータは除外する
+DEFAULT_MIN_SCORE = 500
+# min_score のパラメータでスコアの制限なしを表す値
+NO_MIN_SCORE = "none"
+
+
+@dataclass(frozen=True)
+class CohortFilter:
+    """読み込むデータの対象者と期間
+
+    frozenでハッシュ可能なため、そのままキャッシュのキーとして使える。
+
+    Attributes:
+        newgraduate_flags (tuple): 対象とするis_newgraduateの値（Noneの場合は全員）
+        joined_from (datetime.date): 入社日の開始日
+        joined_to (datetime.date): 入社日の終了日（この日を含む）
+        min_score (float): この値より大きいスコアのみ対象（Noneの場合は制限なし）
+        date_from (datetime.date): プレイ日の開始日
+        date_to (datetime.date): プレイ日の終了日（この日を含む）
+    """
+
+    newgraduate_flags: tuple = (1,)
+    joined_from: datetime.date = None
+    joined_to: datetime.date = None
+    min_score: float = DEFAULT_MIN_SCORE
+    date_from: datetime.date = None
+    date_to: datetime.date = None
+
+    @property
+    def filters_users(self) -> bool:
+        """ユーザー属性による絞り込みがあるか"""
+        return (
+            self.newgraduate_flags is not None
+            or self.joined_from is not None
+            or self.joined_to is not None
+        )
+
+    def describe(self) -> str:
+        """画面表示用の説明"""
+        cohort_name = next(
+            (
+                name
+                for name, flags in COHORT_OPTIONS.items()
+                if flags == self.newgraduate_flags
+            ),
+            "指定なし",
+        )
+        parts = [cohort_name]
+        if self.joined_from or self.joined_to:
+            parts.append(f"入社日 {_format_range(self.joined_from, self.joined_to)}")
+        if self.date_from or self.date_to:
+            parts.append(f"期間 {_format_range(self.date_from, self.date_to)}")
+        if self.min_score is not None:
+            parts.append(f"スコア{self.min_score:g}点超")
+        return " / ".join(parts)
+
+    @classmethod
+    def from_params(cls, params: dict) -> "CohortFilter":
+        """文字列のパラメータ（APIのクエリやCLI引数）から作成する
+
+        Args:
+            params (dict): cohort, joined_from, joined_to, min_score, date_from, date_to
+
+        Raises:
+            ValueError: 値の形式が正しくない場合
+        """
+        cohort_key = params.get("cohort") or "newgraduate"
+        if cohort_key not in COHORT_KEYS:
+            raise ValueError(
+                f"cohort は {', '.join(COHORT_KEYS)} のいずれかで指定してください"
+            )
+
+        min_score = params.get("min_score")
+        if min_score in (None, ""):
+            min_score = DEFAULT_MIN_SCORE
+        elif min_score == NO_MIN_SCORE:
+            min_score = None
+        return cls(
+            newgraduate_flags=COHORT_OPTIONS[COHORT_KEYS[cohort_key]],
+            joined_from=_parse_date(params.get("joined_from")),
+            joined_to=_parse_date(params.get("joined_to")),
+            min_score=None if min_score is None else float(min_score),
+            date_from=_parse_date(params.get("date_from")),
+            date_to=_parse_date(params.get("date_to")),
+        )
+
+    def to_params(self) -> dict:
+        """from_params で同じ対象者と期間を作成できる文字列のパラメータ（APIのクエリなど）
+
+        Raises:
+            ValueError: 対象者が COHORT_OPTIONS の選択肢にない場合
+        """
+        cohort_key = next(
+            (
+                key
+                for key, name in COHORT_KEYS.items()
+                if COHORT_OPTIONS[name] == self.newgraduate_flags
+            ),
+            None,
+        )
+        if cohort_key is None:
+            raise ValueError(
+                f"対象者をパラメータで指定できません: {self.newgraduate_flags}"
+            )
+
+        params = {"cohort": cohort_key}
+        for name in ("joined_from", "joined_to", "date_from", "date_to"):
+            value = getattr(self, name)
+            if value is not None:
+                params[name] = value.isoformat()
+        params["min_score"] = (
+            NO_MIN_SCORE if self.min_score is None else f"{self.min_score:g}"
+        )
+        return params
+
+
+DEFAULT_COHORT = CohortFilter()
+
+
+def add_cohort_arguments(parser):
+    """コマンドライン引数に対象者と期間の指定を追加（CohortFilter.from_params(vars(args))で読む）"""
+    parser.add_argument(
+        "--cohort", choices=list(COHORT_KEYS), default="newgraduate", help="対象者"
+    )
+    parser.add_argument("--joined-from", help="入社日の開始日（YYYY-MM-DD）")
+    parser.add_argument("--joined-to", help="入社日の終了日（YYYY-MM-DD）")
+    parser.add_argument("--date-from", help="プレイ日の開始日（YYYY-MM-DD）")
+    parser.add_argument("--date-to", help="プレイ日の終了日（YYYY-MM-DD）")
+    parser.add_argument(
+        "--min-score",
+        help=f"この値を超えるスコアのみ対象にする（{NO_MIN_SCORE} で制限なし）",
+    )
+
+
+def _parse_date(value) -> datetime.date:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value)
+
+
+def _format_range(start: datetime.date, end: datetime.date) -> str:
+    return f"{start.isoformat() if start else ''}〜{end.isoformat() if end else ''}"
+
+
+def next_day(date: datetime.date) -> datetime.date:
+    """終了日を含めるため、翌日を排他的な上限として使う"""
+    return date + datetime.timedelta(days=1)
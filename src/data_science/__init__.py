@@ -1,13 +1,24 @@
-from .difficulty_language_score_analysis import show_difficulty_language_score_analysis
+from .difficulty_language_score_analysis import (
+    compute_difficulty_language_score_analysis,
+    show_difficulty_language_score_analysis,
+)
 from .difficulty_language_accuracy_analysis import (
+    compute_difficulty_language_accuracy_analysis,
     show_difficulty_language_accuracy_analysis,
 )
-from .time_score_analysis import show_time_score_analysis
-from .time_accuracy_analysis import show_time_accuracy_analysis
+from .time_score_analysis import compute_time_score_analysis, show_time_score_analysis
+from .time_accuracy_analysis import (
+    compute_time_accuracy_analysis,
+    show_time_accuracy_analysis,
+)
 
 __all__ = [
+    "compute_difficulty_language_score_analysis",
     "show_difficulty_language_score_analysis",
+    "compute_difficulty_language_accuracy_analysis",
     "show_difficulty_language_accuracy_analysis",
+    "compute_time_score_analysis",
     "show_time_score_analysis",
+    "compute_time_accuracy_analysis",
     "show_time_accuracy_analysis",
 ]
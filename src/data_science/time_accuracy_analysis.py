@@ -1,195 +1,65 @@
 import streamlit as st
 import polars as pl
-import plotly.graph_objects as go
+from analytics import bootstrap_best_time
+from analytics.heatmap import WEEKDAY_NAMES
+from utils.charts.heatmap import create_weekday_time_heatmap
 
 
-def show_time_accuracy_analysis(scores: pl.DataFrame):
-    """時間帯分析のグラフを表示"""
+def compute_time_accuracy_analysis(scores: pl.DataFrame) -> dict:
+    """曜日×時間帯のヒートマップと最高スコアが出やすい時間帯を計算（スコアがない場合はNone）"""
     if len(scores) == 0:
+        return None
+
+    return {
+        # 曜日×時間帯のヒートマップを作成
+        "figure": create_weekday_time_heatmap(scores),
+        # 曜日別の最高スコアが出やすい時間帯
+        "best_time": bootstrap_best_time(scores, is_weekday=True),
+    }
+
+
+def show_time_accuracy_analysis(panel: dict):
+    """時間帯分析のグラフを表示（compute_time_accuracy_analysis の結果）"""
+    if panel is None:
         st.info("スコアデータがありません")
         return
 
-    # 曜日×時間帯のヒートマップを作成
-    fig = create_weekday_time_heatmap(scores)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(panel["figure"], use_container_width=True)
     # 曜日別の最高スコアが出やすい時間帯を表示
-    show_time_analysis_text(scores, is_weekday=True)
-
-
-def show_time_analysis_text(scores: pl.DataFrame, is_weekday: bool):
-    """時間帯分析のテキスト情報を表示"""
-    # 各ユーザーの各難易度・モードの最高スコアを取得
-    best_scores = scores.group_by(["user_id", "diff_id", "lang_id"]).agg(
-        pl.col("score").max().alias("max_score"),
-        pl.col("created_at")
-        .filter(pl.col("score") == pl.col("score").max())
-        .first()
-        .alias("best_time"),
-    )
+    show_time_analysis_text(panel["best_time"], is_weekday=True)
 
-    # 日時型に変換してから時間と曜日を抽出
-    best_scores = best_scores.with_columns(
-        [
-            pl.col("best_time")
-            .dt.hour()  # 時間を直接抽出
-            .map_elements(lambda x: (x + 9) % 24)  # UTC+9に変換（日本時間）
-            .alias("hour"),
-            pl.col("best_time")
-            .dt.weekday()  # 曜日を直接取得（0=月曜日）
-            .map_elements(lambda x: (x - 1) % 7)  # 曜日を1日ずらす
-            .alias("weekday"),
-        ]
-    )
 
+def show_time_analysis_text(best_time: dict, is_weekday: bool):
+    """時間帯分析のテキスト情報を表示（analytics.bootstrap_best_time の結果）"""
+    if best_time is None:
+        return
+
+    # 偏りが偶然の範囲の場合は印を付ける
+    marker = "" if best_time["significant"] else "（偶然の可能性あり）"
     if is_weekday:
-        # 曜日×時間帯で集計
-        time_scores = (
-            best_scores.filter(
-                (pl.col("hour") >= 8)
-                & (pl.col("hour") < 21)
-                & (pl.col("weekday") < 5)  # 土日を除外
-            )
-            .group_by(["weekday", "hour"])
-            .agg(pl.col("max_score").count().alias("count"))
-            .sort(["weekday", "hour"])
-        )
-
-        if len(time_scores) == 0:
-            return
-
-        # 最高スコアが出やすい曜日と時間帯を特定
-        best_time = time_scores.filter(pl.col("count") == time_scores["count"].max())
-        best_time_row = best_time.row(0, named=True)
-        weekday_names = ["月", "火", "水", "木", "金"]
-
-        st.markdown(
-            f"""
-            <div class="ranking-text">
-                <span class="rank-number">🏆</span>
-                最高スコアが出やすい時間帯
-                <span class="rank-score">{weekday_names[int(best_time_row["weekday"])]}曜日 {int(best_time_row["hour"])}時台</span>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+        # 最高スコアが出やすい曜日と時間帯
+        label = f"{WEEKDAY_NAMES[best_time['weekday']]}曜日 {best_time['hour']}時台"
     else:
-        # 時間帯ごとに集計
-        time_scores = (
-            best_scores.filter((pl.col("hour") >= 8) & (pl.col("hour") < 21))
-            .group_by("hour")
-            .agg(pl.col("max_score").count().alias("count"))
-            .sort("hour")
-        )
-
-        if len(time_scores) == 0:
-            return
-
-        # 最高スコアが出やすい時間帯を特定
-        best_hour = time_scores.filter(pl.col("count") == time_scores["count"].max())
-        best_hour_row = best_hour.row(0, named=True)
-
-        st.markdown(
-            f"""
-            <div class="ranking-text">
-                <span class="rank-number">🏆</span>
-                最高スコアが出やすい時間帯
-                <span class="rank-score">{int(best_hour_row["hour"])}時台</span>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-
-def create_weekday_time_heatmap(scores: pl.DataFrame) -> go.Figure:
-    """曜日×時間帯のヒートマップを作成"""
-    # 各ユーザーの各難易度・モードの最高スコアを取得
-    best_scores = scores.group_by(["user_id", "diff_id", "lang_id"]).agg(
-        pl.col("score").max().alias("max_score"),
-        pl.col("created_at")
-        .filter(pl.col("score") == pl.col("score").max())
-        .first()
-        .alias("best_time"),
+        # 最高スコアが出やすい時間帯
+        label = f"{best_time['hour']}時台"
+
+    st.markdown(
+        f"""
+        <div class="ranking-text">
+            <span class="rank-number">🏆</span>
+            最高スコアが出やすい時間帯
+            <span class="rank-score">{label}</span>{marker}
+        </div>
+        """,
+        unsafe_allow_html=True,
     )
-
-    # 日時型に変換してから時間と曜日を抽出
-    best_scores = best_scores.with_columns(
-        [
-            pl.col("best_time")
-            .dt.hour()  # 時間を直接抽出
-            .map_elements(lambda x: (x + 9) % 24)  # UTC+9に変換（日本時間）
-            .alias("hour"),
-            pl.col("best_time")
-            .dt.weekday()  # 曜日を直接取得（0=月曜日）
-            .map_elements(lambda x: (x - 1) % 7)  # 曜日を1日ずらす
-            .alias("weekday"),
-        ]
+    st.caption(
+        f"最高スコアの{best_time['share']:.1%}"
+        f"（95%信頼区間 {best_time['share_low']:.1%}〜{best_time['share_high']:.1%}）がこの時間帯で、"
+        f"ユーザーを再標本化すると{best_time['top_probability']:.0%}の確率で最多になります"
+        f"（偏りがない場合のp値 {best_time['p_value']:.3f}）"
     )
 
-    # 表示する時間範囲を設定（8:00-20:00）
-    start_hour = 8
-    end_hour = 21  # 20:00を含めるため
-    hours = list(range(start_hour, end_hour))
-    weekdays = ["月", "火", "水", "木", "金"]
-
-    # 曜日×時間帯で集計（土日を除外）
-    heatmap_data = (
-        best_scores.filter(
-            (pl.col("hour") >= start_hour)
-            & (pl.col("hour") < end_hour)
-            & (pl.col("weekday") < 5)  # 土日を除外（0-4が月-金）
-        )
-        .group_by(["weekday", "hour"])
-        .agg(pl.col("max_score").count().alias("count"))  # 最高スコアの数をカウント
-        .sort(["weekday", "hour"])
-    )
-
-    # ヒートマップ用の2次元配列を作成
-    z = [[0] * len(hours) for _ in range(5)]  # 5日分（月-金）
-    for row in heatmap_data.iter_rows(named=True):
-        weekday = int(row["weekday"])
-        hour = int(row["hour"])
-        if start_hour <= hour < end_hour:
-            z[weekday][hour - start_hour] = row["count"]
-
-    # ヒートマップを作成
-    fig = go.Figure(
-        data=go.Heatmap(
-            z=z,
-            x=hours,
-            y=weekdays,
-            colorscale="Viridis",
-            hovertemplate="%{y}曜日 %{x}時台<br>最高スコア数: %{z}回<extra></extra>",
-        )
-    )
-
-    # レイアウトの設定
-    fig.update_layout(
-        height=400,  # 高さを調整（5日分なので少し小さく）
-        margin=dict(l=20, r=20, t=40, b=20),
-        font=dict(size=11, color="white"),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor="rgba(255,255,255,0.2)",
-            gridwidth=1,
-            tickfont=dict(color="white"),
-            tickmode="linear",
-            tick0=start_hour,
-            dtick=1,
-            title=dict(text="時間帯", font=dict(color="white")),
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor="rgba(255,255,255,0.2)",
-            gridwidth=1,
-            tickfont=dict(color="white"),
-            title=dict(text="曜日", font=dict(color="white")),
-        ),
-        paper_bgcolor="black",
-        plot_bgcolor="black",
-    )
-
-    return fig
-
 
 def calculate_time_accuracy(scores: pl.DataFrame) -> pl.DataFrame:
     """時間帯別の正確性を計算"""
@@ -0,0 +1,135 @@
+import io
+from typing import Iterator
+
+import polars as pl
+from analytics import calculate_average_score, calculate_growth_ranking
+from analytics.preprocess import fill_unknown_usernames
+from cache import Dataset, SharedCache
+from utils.config import EXPORT_CHUNK_ROWS
+
+# 書き出すデータ: 表示名
+EXPORT_TABLES = {
+    "scores": "スコア",
+    "misses": "ミスタイプ",
+    "average_ranking": "平均スコアランキング",
+    "growth_ranking": "成長率ランキング",
+}
+# 書き出す形式: (Content-Type, 拡張子)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+# ランキング名: 計算する関数
+_RANKINGS = {
+    "average_ranking": calculate_average_score,
+    "growth_ranking": calculate_growth_ranking,
+}
+
+
+def export_frame(cache: SharedCache, dataset: Dataset, table: str) -> pl.DataFrame:
+    """書き出すデータ（スコア・ミスタイプはデータセットのまま、ランキングは1回だけ計算）
+
+    Raises:
+        ValueError: table が EXPORT_TABLES にない場合
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(
+            f"table は {', '.join(EXPORT_TABLES)} のいずれかで指定してください"
+        )
+    if table == "scores":
+        return dataset.scores
+    if table == "misses":
+        return dataset.misses
+
+    calculate = _RANKINGS[table]
+    return cache.compute(
+        ("export", table),
+        lambda dataset: calculate(fill_unknown_usernames(dataset.scores)),
+        dataset,
+    )
+
+
+class _ChunkSink(io.RawIOBase):
+    """書き込まれたバイト列を取り出すまで溜めておく出力先
+
+    取り出した分は捨てるため、保持するのは最後に取り出してからの分だけ。
+    位置（tell）は書き込んだ合計で、Parquetのフッターのオフセットに使われる。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_export(
+    frame: pl.DataFrame, fmt: str, chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> Iterator[bytes]:
+    """データフレームを指定した形式で chunk_rows 行ずつ書き出し、バイト列を順に返す
+
+    各チャンクはデータフレームのスライス（コピーしない）から作るため、全体を
+    書き出したバイト列を一度に持つことはない（追加のメモリは1チャンク分）。
+    Parquetはチャンクごとの行グループ、Arrowはチャンクごとのレコードバッチの
+    ストリーム形式で書き出す。
+
+    Args:
+        frame (pl.DataFrame): 書き出すデータ
+        fmt (str): 形式（EXPORT_FORMATS のキー）
+        chunk_rows (int): 1チャンクの行数
+
+    Raises:
+        ValueError: fmt が EXPORT_FORMATS にない場合
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(
+            f"format は {', '.join(EXPORT_FORMATS)} のいずれかで指定してください"
+        )
+    offsets = range(0, max(frame.height, 1), chunk_rows)
+
+    if fmt == "csv":
+        for offset in offsets:
+            chunk = frame.slice(offset, chunk_rows)
+            yield chunk.write_csv(include_header=offset == 0).encode("utf-8")
+        return
+
+    # pyarrowは書き出し時に読み込む（起動時間短縮のため）
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    schema = frame.head(0).to_arrow().schema
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        for offset in offsets:
+            chunk = frame.slice(offset, chunk_rows).to_arrow().cast(schema)
+            if fmt == "parquet":
+                writer.write_table(chunk)
+            else:
+                for batch in chunk.to_batches():
+                    writer.write_batch(batch)
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
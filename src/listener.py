@@ -0,0 +1,179 @@
+import argparse
+import select
+import threading
+import time
+from typing import Callable
+
+from loader import get_db_connection
+from psycopg2 import sql
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from utils.config import NOTIFY_CHANNEL, NOTIFY_DEBOUNCE_SECONDS
+
+# 変更を通知するテーブル
+WATCHED_TABLES = ("t_score", "t_miss", "m_user")
+
+TRIGGER_NAME = "typing_data_changed"
+TRIGGER_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION notify_typing_data_changed() RETURNS trigger AS $$
+BEGIN
+    -- ペイロードは "テーブル名:操作"（同じトランザクション内の同じ通知は1回にまとめられる）
+    PERFORM pg_notify(TG_ARGV[0], TG_TABLE_NAME || ':' || TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# 再接続までの待ち時間の上限（秒）
+MAX_RECONNECT_DELAY = 30.0
+
+
+def install_triggers(conn, channel: str = NOTIFY_CHANNEL, tables=WATCHED_TABLES):
+    """変更を通知するトリガーを作成する（既にある場合は作り直す）
+
+    大量INSERTでも通知が増えないよう、行ごとではなく文ごとに通知する。
+    """
+    with conn.cursor() as cur:
+        cur.execute(TRIGGER_FUNCTION_SQL)
+        for table in tables:
+            cur.execute(
+                sql.SQL("DROP TRIGGER IF EXISTS {trigger} ON {table}").format(
+                    trigger=sql.Identifier(TRIGGER_NAME), table=sql.Identifier(table)
+                )
+            )
+            cur.execute(
+                sql.SQL(
+                    "CREATE TRIGGER {trigger} AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                    "FOR EACH STATEMENT EXECUTE FUNCTION notify_typing_data_changed({channel})"
+                ).format(
+                    trigger=sql.Identifier(TRIGGER_NAME),
+                    table=sql.Identifier(table),
+                    channel=sql.Literal(channel),
+                )
+            )
+    conn.commit()
+
+
+def parse_change(payload: str) -> tuple:
+    """通知のペイロードを (テーブル名, 操作) に分解"""
+    table, _, operation = payload.partition(":")
+    return table, operation
+
+
+class ChangeListener(threading.Thread):
+    """データベースの変更通知を受け取り、まとめてコールバックを呼ぶスレッド
+
+    通知が debounce 秒途切れるまで（最長 max_delay 秒）待ってから、
+    その間に届いた変更の集合 {"テーブル名:操作", ...} で on_change を1回呼ぶ。
+    接続が切れた場合は待ち時間を延ばしながら再接続する。
+    """
+
+    def __init__(
+        self,
+        on_change: Callable,
+        channel: str = NOTIFY_CHANNEL,
+        debounce: float = NOTIFY_DEBOUNCE_SECONDS,
+        max_delay: float = None,
+        connect: Callable = get_db_connection,
+    ):
+        super().__init__(name="db-change-listener", daemon=True)
+        self._on_change = on_change
+        self._channel = channel
+        self._debounce = debounce
+        self._max_delay = max_delay if max_delay is not None else debounce * 10
+        self._connect = connect
+        self._stop_event = threading.Event()
+        self.listening = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        delay = 1.0
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+                delay = 1.0
+            except Exception as e:
+                self.listening.clear()
+                print(f"変更通知の受信エラー: {str(e)}（{delay:.0f}秒後に再接続）")
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def _listen(self):
+        conn = self._connect()
+        try:
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._channel)))
+            self.listening.set()
+
+            pending = set()
+            first_at = last_at = None
+            while not self._stop_event.is_set():
+                timeout = 1.0
+                if pending:
+                    now = time.monotonic()
+                    timeout = max(
+                        0.0,
+                        min(
+                            last_at + self._debounce - now,
+                            first_at + self._max_delay - now,
+                        ),
+                    )
+
+                if select.select([conn], [], [], timeout)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        pending.add(conn.notifies.pop(0).payload)
+                        last_at = time.monotonic()
+                        first_at = first_at or last_at
+
+                now = time.monotonic()
+                if pending and (
+                    now - last_at >= self._debounce or now - first_at >= self._max_delay
+                ):
+                    changes, pending = pending, set()
+                    first_at = last_at = None
+                    self._notify(changes)
+        finally:
+            conn.close()
+
+    def _notify(self, changes: set):
+        try:
+            self._on_change(changes)
+        except Exception as e:
+            # コールバックの失敗で受信を止めない
+            print(f"変更通知の処理エラー: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="データベースの変更通知の設定・確認")
+    parser.add_argument(
+        "--install", action="store_true", help="変更を通知するトリガーを作成"
+    )
+    parser.add_argument("--channel", default=NOTIFY_CHANNEL, help="通知チャンネル")
+    args = parser.parse_args()
+
+    if args.install:
+        conn = get_db_connection()
+        try:
+            install_triggers(conn, args.channel)
+        finally:
+            conn.close()
+        print(f"トリガーを作成しました: {', '.join(WATCHED_TABLES)} → {args.channel}")
+        return
+
+    listener = ChangeListener(
+        lambda changes: print(f"変更: {', '.join(sorted(changes))}"), args.channel
+    )
+    listener.start()
+    print(f"{args.channel} の通知を待っています（Ctrl+Cで終了）")
+    try:
+        while listener.is_alive():
+            listener.join(1.0)
+    except KeyboardInterrupt:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
+import hashlib
 import polars as pl
 import os
 import psycopg2
-from pathlib import Path
-from utils.config import (
-    DIFFICULTY_NAMES,
-    LANGUAGE_NAMES,
-)
+from cohort import DEFAULT_COHORT, CohortFilter, next_day
+from utils.config import DB_DRIVER, FINGERPRINT_CHECKSUM
+
+
+class DataLoadError(RuntimeError):
+    """データベースからの読み込みに失敗した場合の例外"""
 
 
 def get_db_connection():
@@ -21,22 +23,93 @@ def get_db_connection():
         dbname=os.environ.get("DB_NAME"),
         user=os.environ.get("DB_USER"),
         password=os.environ.get("DB_PASSWORD"),
+        connect_timeout=os.environ.get("DB_CONNECT_TIMEOUT", "10"),
     )
 
 
-def load_data():
+def build_user_conditions(cohort: CohortFilter, alias: str) -> tuple:
+    """ユーザー属性の絞り込み条件を作成
+
+    Args:
+        cohort (CohortFilter): 対象者と期間
+        alias (str): m_userのテーブル別名
+
+    Returns:
+        tuple: (条件のリスト, パラメータの辞書)
     """
-    タイピングデータをデータベースから読み込む
+    conditions = []
+    params = {}
+    if cohort.newgraduate_flags is not None:
+        conditions.append(f"{alias}.is_newgraduate::int = ANY(%(newgraduate_flags)s)")
+        params["newgraduate_flags"] = list(cohort.newgraduate_flags)
+    if cohort.joined_from is not None:
+        conditions.append(f"{alias}.date_joined >= %(joined_from)s")
+        params["joined_from"] = cohort.joined_from
+    if cohort.joined_to is not None:
+        conditions.append(f"{alias}.date_joined < %(joined_until)s")
+        params["joined_until"] = next_day(cohort.joined_to)
+    return conditions, params
+
+
+def build_activity_conditions(cohort: CohortFilter, alias: str) -> tuple:
+    """スコア・ミスタイプに共通する絞り込み条件（対象ユーザーとプレイ日）を作成"""
+    conditions = [f"{alias}.user_id IS NOT NULL"]
+    params = {}
+
+    if cohort.filters_users:
+        user_conditions, params = build_user_conditions(cohort, "u")
+        conditions.append(
+            f"{alias}.user_id IN (SELECT u.user_id FROM m_user u WHERE "
+            + " AND ".join(user_conditions)
+            + ")"
+        )
+    if cohort.date_from is not None:
+        conditions.append(f"{alias}.created_at >= %(date_from)s")
+        params["date_from"] = cohort.date_from
+    if cohort.date_to is not None:
+        conditions.append(f"{alias}.created_at < %(date_until)s")
+        params["date_until"] = next_day(cohort.date_to)
+    return conditions, params
+
+
+def build_table_conditions(cohort: CohortFilter = DEFAULT_COHORT) -> dict:
+    """テーブルごとの絞り込み条件を作成
 
     Returns:
-        tuple: (scores, misses, users) スコアデータ、ミスタイプデータ、ユーザーデータのタプル
+        dict: {"scores" | "misses" | "users": (条件のリスト, パラメータの辞書)}
     """
-    try:
-        # データベース接続
-        conn = get_db_connection()
+    score_conditions, score_params = build_activity_conditions(cohort, "s")
+    if cohort.min_score is not None:
+        score_conditions.append("s.score > %(min_score)s")
+        score_params["min_score"] = cohort.min_score
 
-        # スコアデータの読み込み
-        scores_query = """
+    user_conditions, user_params = build_user_conditions(cohort, "u")
+    return {
+        "scores": (score_conditions, score_params),
+        "misses": build_activity_conditions(cohort, "m"),
+        "users": (["u.user_id IS NOT NULL", *user_conditions], user_params),
+    }
+
+
+def build_queries(cohort: CohortFilter = DEFAULT_COHORT, since: dict = None) -> dict:
+    """絞り込み条件を反映したSQLとパラメータを作成
+
+    Args:
+        cohort (CohortFilter): 対象者と期間
+        since (dict): {"scores" | "misses": updated_at}。指定した時刻以降に
+            更新された行のみ読み込む（差分読み込み。取り込み済みの行も含まれうる）
+
+    Returns:
+        dict: {"scores" | "misses" | "users": (SQL, パラメータ)}
+    """
+    conditions = build_table_conditions(cohort)
+
+    # スコアデータ
+    score_conditions, score_params = conditions["scores"]
+    if since and since.get("scores") is not None:
+        score_conditions.append("s.updated_at >= %(since)s")
+        score_params["since"] = since["scores"]
+    scores_query = f"""
         SELECT 
             s.user_id::text as user_id,
             s.score,
@@ -51,62 +124,163 @@ def load_data():
         FROM t_score s
         LEFT JOIN m_diff d ON s.diff_id = d.diff_id
         LEFT JOIN m_lang l ON s.lang_id = l.lang_id
-        WHERE s.user_id IS NOT NULL
+        WHERE {" AND ".join(score_conditions)}
         """
-        scores = pl.read_database(scores_query, conn).with_columns(pl.col("user_id").cast(pl.Utf8))
 
-        # ミスタイプデータの読み込み
-        misses_query = """
+    # ミスタイプデータ
+    miss_conditions, miss_params = conditions["misses"]
+    if since and since.get("misses") is not None:
+        miss_conditions.append("m.updated_at >= %(since)s")
+        miss_params["since"] = since["misses"]
+    misses_query = f"""
         SELECT 
-            user_id::text as user_id,
-            miss_char,
-            miss_count,
-            created_at,
-            updated_at
-        FROM t_miss
-        WHERE user_id IS NOT NULL
+            m.user_id::text as user_id,
+            m.miss_char,
+            m.miss_count,
+            m.created_at,
+            m.updated_at
+        FROM t_miss m
+        WHERE {" AND ".join(miss_conditions)}
         """
-        misses = pl.read_database(misses_query, conn).with_columns(pl.col("user_id").cast(pl.Utf8))
 
-        # ユーザーデータの読み込み
-        users_query = """
+    # ユーザーデータ
+    user_conditions, user_params = conditions["users"]
+    users_query = f"""
         SELECT 
-            user_id::text as user_id,
-            username,
-            email,
-            date_joined,
-            created_at,
-            updated_at,
-            is_newgraduate
-        FROM m_user
-        WHERE user_id IS NOT NULL
+            u.user_id::text as user_id,
+            u.username,
+            u.email,
+            u.date_joined,
+            u.created_at,
+            u.updated_at,
+            u.is_newgraduate
+        FROM m_user u
+        WHERE {" AND ".join(user_conditions)}
         """
-        users = pl.read_database(users_query, conn).with_columns(pl.col("user_id").cast(pl.Utf8))
 
-        # 接続を閉じる
-        conn.close()
+    return {
+        "scores": (scores_query, score_params),
+        "misses": (misses_query, miss_params),
+        "users": (users_query, user_params),
+    }
 
-        # 新卒ユーザーのみをフィルタリング
-        new_graduate_users = users.filter(pl.col("is_newgraduate") == 1)
-        new_graduate_user_ids = new_graduate_users.select("user_id").to_series().to_list()
 
-        # スコアとミスデータを新卒ユーザーのみにフィルタリングし、スコアが500以下のデータを除外
-        scores = scores.filter(
-            (pl.col("user_id").is_in(new_graduate_user_ids)) & (pl.col("score") > 500)
-        )
-        misses = misses.filter(pl.col("user_id").is_in(new_graduate_user_ids))
+# 指紋のチェックサムに使うキー（行の追加・削除の入れ替わりを検出する）
+FINGERPRINT_TABLES = {
+    "scores": ("t_score s", "s", "s.user_id::text || s.created_at::text"),
+    "misses": ("t_miss m", "m", "m.user_id::text || m.miss_char || m.created_at::text"),
+    "users": ("m_user u", "u", "u.user_id::text"),
+}
 
-        # ユーザー情報を結合
-        scores = scores.join(
-            users.select(["user_id", "username"]), on="user_id", how="inner"
-        )
-        misses = misses.join(
-            users.select(["user_id", "username"]), on="user_id", how="inner"
+
+def build_fingerprint_query(
+    cohort: CohortFilter = DEFAULT_COHORT, checksum: bool = FINGERPRINT_CHECKSUM
+) -> tuple:
+    """テーブルごとの件数・最終更新時刻（・キーのチェックサム）を1回で取得するSQLを作成
+
+    Returns:
+        tuple: (SQL, パラメータ)
+    """
+    conditions = build_table_conditions(cohort)
+    selects = []
+    params = {}
+    for name, (table, alias, key) in FINGERPRINT_TABLES.items():
+        table_conditions, table_params = conditions[name]
+        params.update(table_params)
+        checksum_column = f"sum(hashtext({key}))::text" if checksum else "NULL"
+        selects.append(
+            f"SELECT '{name}' AS name, count(*) AS row_count, "
+            f"max({alias}.updated_at)::text AS last_updated, {checksum_column} AS checksum "
+            f"FROM {table} WHERE {' AND '.join(table_conditions)}"
         )
+    return "\nUNION ALL\n".join(selects), params
+
+
+def fetch_fingerprint(cohort: CohortFilter = DEFAULT_COHORT) -> str:
+    """読み込む範囲のデータの指紋を取得する（データセットのバージョンとして使う）
 
-        return scores, misses, users
+    全件を転送せずに、前回の読み込みから変更があったかを確認するために使う。
 
+    Args:
+        cohort (CohortFilter): 対象者と期間
+
+    Returns:
+        str: 指紋（同じ対象者・同じデータなら同じ値）
+
+    Raises:
+        DataLoadError: データベースに問い合わせできなかった場合
+    """
+    try:
+        query, params = build_fingerprint_query(cohort)
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                rows = sorted(cur.fetchall())
+        finally:
+            conn.close()
     except Exception as e:
-        print(f"データベース接続エラー: {str(e)}")
-        # エラーが発生した場合は空のデータフレームを返す
-        return pl.DataFrame(), pl.DataFrame(), pl.DataFrame()
+        raise DataLoadError(f"データベース接続エラー: {str(e)}") from e
+
+    source = repr((cohort, rows)).encode("utf-8")
+    return hashlib.sha1(source).hexdigest()[:16]
+
+
+def read_table(query: str, params: dict, conn) -> pl.DataFrame:
+    """SQLを実行してuser_idを文字列にしたデータフレームを返す"""
+    return pl.read_database(
+        query, conn, execute_options={"parameters": params}
+    ).with_columns(pl.col("user_id").cast(pl.Utf8))
+
+
+def attach_usernames(scores: pl.DataFrame, misses: pl.DataFrame, users: pl.DataFrame):
+    """スコア・ミスタイプにユーザー名を結合する（ユーザーが存在する行のみ残す）"""
+    user_names = users.select(["user_id", "username"])
+    scores = scores.join(user_names, on="user_id", how="inner")
+    misses = misses.join(user_names, on="user_id", how="inner")
+    return scores, misses, users
+
+
+def load_data(cohort: CohortFilter = DEFAULT_COHORT, since: dict = None):
+    """
+    タイピングデータをデータベースから読み込む
+
+    対象者・期間・スコアの絞り込みはSQLで行い、必要な範囲のみ転送する。
+
+    Args:
+        cohort (CohortFilter): 対象者と期間（省略時は新卒・スコア500点超）
+        since (dict): 差分読み込みの起点（build_queries を参照）。ユーザーは常に全件
+
+    Returns:
+        tuple: (scores, misses, users) スコアデータ、ミスタイプデータ、ユーザーデータのタプル
+
+    Raises:
+        DataLoadError: データベースから読み込めなかった場合（空のデータとは区別する）
+    """
+    if DB_DRIVER == "asyncpg":
+        # 非同期ドライバーで読み込む（インストールされている場合のみ読み込む）
+        from async_loader import load_data_blocking
+
+        return load_data_blocking(cohort, since)
+    return load_data_psycopg2(cohort, since)
+
+
+def load_data_psycopg2(cohort: CohortFilter = DEFAULT_COHORT, since: dict = None):
+    """psycopg2 と pl.read_database で読み込む（load_data を参照）"""
+    try:
+        queries = build_queries(cohort, since)
+
+        # データベース接続
+        conn = get_db_connection()
+        try:
+            # スコア・ミスタイプ・ユーザーデータの読み込み
+            scores = read_table(*queries["scores"], conn)
+            misses = read_table(*queries["misses"], conn)
+            users = read_table(*queries["users"], conn)
+        finally:
+            # 接続を閉じる（失敗した場合も残さない）
+            conn.close()
+    except Exception as e:
+        raise DataLoadError(f"データベース接続エラー: {str(e)}") from e
+
+    return attach_usernames(scores, misses, users)
@@ -1,10 +1,8 @@
 import sys
 from pathlib import Path
+from urllib.parse import urlencode
 import streamlit as st
 import polars as pl
-import pandas as pd
-import os
-from dotenv import load_dotenv
 from overall import (
     show_growth_ranking,
     show_growth_ranking_details,
@@ -12,7 +10,14 @@ from overall import (
     show_average_score_details,
     show_overall_miss_chart,
     show_overall_miss_details,
+    show_overall_miss_trend,
+    show_overall_keyboard_misses,
     show_overall_summary,
+    show_rank_history,
+    show_learning_curves,
+    calculate_growth_leaders,
+    calculate_average_score_leaders,
+    calculate_overall_miss_chars,
     calculate_growth_ranking,
     calculate_average_score,
 )
@@ -20,15 +25,45 @@ from personal import (
     show_growth_analysis,
     show_personal_miss_chart,
     show_personal_miss_details,
+    show_personal_miss_trend,
+    show_personal_keyboard_misses,
+    show_personal_ranks,
     show_personal_summary,
+    show_similar_users,
+    show_user_comparison,
 )
 from data_science import (
+    compute_difficulty_language_score_analysis,
+    compute_difficulty_language_accuracy_analysis,
+    compute_time_score_analysis,
+    compute_time_accuracy_analysis,
     show_difficulty_language_score_analysis,
     show_difficulty_language_accuracy_analysis,
     show_time_score_analysis,
     show_time_accuracy_analysis,
 )
-from loader import load_data
+from analytics import (
+    KeyboardIndex,
+    UserPartitions,
+    compare_users,
+    MissCube,
+    RankIndex,
+    SimilarityIndex,
+    build_user_features,
+    calculate_learning_curves,
+    calculate_overall_metrics,
+    calculate_rank_history,
+    fill_unknown_usernames,
+    format_period,
+    list_modes,
+    prepare_data,
+)
+from admin import show_anomalies
+from cache import get_shared_cache
+from scheduler import PanelScheduler
+from cohort import COHORT_OPTIONS, DEFAULT_MIN_SCORE, CohortFilter
+from export import EXPORT_FORMATS, EXPORT_TABLES
+from utils.config import API_PUBLIC_URL, DB_LISTENER_ENABLED
 
 # srcディレクトリをPythonパスに追加
 src_path = str(Path(__file__).parent.parent.parent)
@@ -38,45 +73,14 @@ if src_path not in sys.path:
 DATA_DIR = Path(__file__).parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# 変更通知による更新を画面に反映するまでの確認間隔（秒）
+WATCH_INTERVAL_SECONDS = 2
+
 
 def load_and_process_data(scores, misses, users):
     """データの読み込みと前処理を行う"""
     try:
-        if all(
-            [
-                scores is not None,
-                misses is not None,
-                users is not None,
-            ]
-        ):
-            # データの型変換を明示的に行う
-            scores = scores.with_columns(
-                [
-                    pl.col("score").cast(pl.Float64),
-                    pl.col("user_id").cast(pl.Utf8),
-                    pl.col("diff_id").cast(pl.Int64),
-                    pl.col("lang_id").cast(pl.Int64),
-                    pl.col("accuracy").cast(pl.Float64),
-                    pl.col("typing_count").cast(pl.Int64),
-                ]
-            )
-
-            misses = misses.with_columns(
-                [
-                    pl.col("user_id").cast(pl.Utf8),
-                    pl.col("miss_count").cast(pl.Int64),
-                ]
-            )
-
-            users = users.with_columns(
-                [
-                    pl.col("user_id").cast(pl.Utf8),
-                ]
-            )
-
-            # データの存在確認
-            if scores.shape[0] > 0 and misses.shape[0] > 0 and users.shape[0] > 0:
-                return scores, misses, users
+        return prepare_data(scores, misses, users)
     except Exception as e:
         st.error(f"データの処理中にエラーが発生しました: {str(e)}")
     return None, None, None
@@ -108,136 +112,341 @@ def load_css():
             )
 
 
-def show_overall_analysis(scores, misses, users):
-    """全体分析を表示"""
+def _date_range(value) -> tuple:
+    """st.date_input の範囲選択値を (開始日, 終了日) に変換"""
+    if isinstance(value, (list, tuple)):
+        dates = list(value) + [None, None]
+        return dates[0], dates[1]
+    return value, None
+
+
+def select_cohort() -> CohortFilter:
+    """サイドバーで分析対象（対象者・期間）を選択"""
+    with st.sidebar:
+        st.header("🎯 分析対象")
+        cohort_name = st.selectbox(
+            "対象者", list(COHORT_OPTIONS.keys()), index=0, key="cohort"
+        )
+        joined_from, joined_to = _date_range(
+            st.date_input("入社日", value=(), key="joined_range")
+        )
+        date_from, date_to = _date_range(
+            st.date_input("プレイ期間", value=(), key="played_range")
+        )
+        min_score = st.number_input(
+            "スコアの下限（この値を超えるスコアのみ）",
+            min_value=0,
+            value=DEFAULT_MIN_SCORE,
+            step=100,
+            key="min_score",
+        )
+
+    return CohortFilter(
+        newgraduate_flags=COHORT_OPTIONS[cohort_name],
+        joined_from=joined_from,
+        joined_to=joined_to,
+        min_score=min_score,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+def show_export_links(cohort: CohortFilter):
+    """選択中の対象者・期間のデータを書き出すリンクを表示
+
+    書き出しは分析APIサーバーがデータセットからチャンクに分けて送信する
+    （ダッシュボードのセッションでは全体を変換しない）。
+    """
+    with st.sidebar.expander("📥 データの書き出し"):
+        table = st.selectbox(
+            "データ",
+            list(EXPORT_TABLES),
+            format_func=EXPORT_TABLES.get,
+            key="export_table",
+        )
+        fmt = st.selectbox(
+            "形式", list(EXPORT_FORMATS), format_func=str.upper, key="export_format"
+        )
+        query = urlencode({**cohort.to_params(), "format": fmt})
+        st.link_button(
+            "ダウンロード",
+            f"{API_PUBLIC_URL}/api/export/{table}?{query}",
+            use_container_width=True,
+        )
+        st.caption("分析APIサーバー（`python -m api`）から送信します")
+
+
+def _format_age(seconds: float) -> str:
+    """経過秒数を「○分」などの表示に変換"""
+    if seconds < 60:
+        return f"{int(seconds)}秒"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}分"
+    return f"{int(seconds // 3600)}時間"
+
+
+def show_data_status(dataset):
+    """データの取得時刻と、最新のデータを取得できていない場合の警告を表示"""
+    age = _format_age(dataset.age)
+    st.sidebar.caption(f"🕒 {age}前に取得したデータ")
+    if get_shared_cache().last_error:
+        st.sidebar.warning(
+            f"データベースから最新のデータを取得できないため、{age}前のデータを表示しています"
+        )
+
+
+@st.fragment(run_every=WATCH_INTERVAL_SECONDS)
+def watch_data_changes(cohort: CohortFilter, version: str):
+    """変更通知で共有キャッシュが更新されたら画面全体を再描画する（DBには問い合わせない）"""
+    if get_shared_cache().cached_version(cohort) not in (None, version):
+        st.rerun(scope="app")
+
+
+def select_period(dataset, key: str) -> tuple:
+    """期間（全体または年月）を選択する（選択肢はデータに含まれる年月）"""
+    # 表示名から期間への対応（全体はNone）
+    period_options = {
+        format_period(period): period
+        for period in [None, *get_shared_cache().get_periods(dataset)]
+    }
+    selected = st.selectbox("期間を選択", list(period_options.keys()), index=0, key=key)
+    return period_options[selected]
+
+
+def get_modes(dataset):
+    """データセットに含まれるモード（言語×難易度）（データセットのバージョンごとに1回だけ取得）"""
+    return get_shared_cache().compute(
+        ("modes",), lambda dataset: list_modes(dataset.scores), dataset
+    )
+
+
+# ランキング名: (計算する関数, 順位を決める列)
+RANKINGS = {
+    "growth": (calculate_growth_ranking, "total_growth_rate"),
+    "average": (calculate_average_score, "average_score"),
+}
+
+
+def get_rank_index(dataset, name: str, period: tuple = None) -> RankIndex:
+    """期間のランキングの順位の索引（データセットのバージョンごとに1回だけ作成）"""
+    calculate, by = RANKINGS[name]
+    cache = get_shared_cache()
+
+    def build(dataset):
+        scores = fill_unknown_usernames(cache.get_period_scores(dataset, period))
+        return RankIndex(calculate(scores), by)
+
+    return cache.compute(("rank_index", name, period), build, dataset)
+
+
+def schedule_overall_panels(panels: PanelScheduler, scores, misses, users, dataset):
+    """全体分析のパネル（期間の選択によらないもの）の計算を投入"""
     # データの前処理
-    scores = scores.with_columns(
-        [
-            pl.col("username").fill_null("不明"),  # usernameがnullの場合は"不明"を設定
-        ]
+    scores = fill_unknown_usernames(scores)
+    misses = fill_unknown_usernames(misses)
+
+    panels.submit("overall_summary", calculate_overall_metrics, scores, misses)
+    panels.submit("growth_details", calculate_growth_leaders, scores, users)
+    panels.submit("average_details", calculate_average_score_leaders, scores, users)
+    panels.submit("overall_misses", calculate_overall_miss_chars, misses)
+    panels.submit("rank_history", get_rank_history, dataset)
+    panels.submit("learning_curves", get_learning_curves, dataset)
+    panels.submit("miss_cube", get_miss_cube, dataset)
+    panels.submit("keyboard_misses", get_keyboard_misses, dataset)
+
+
+def get_rank_history(dataset):
+    """日ごとのランキングの順位（データセットのバージョンごとに1回だけ計算）"""
+    return get_shared_cache().compute(
+        ("rank_history",),
+        lambda dataset: calculate_rank_history(fill_unknown_usernames(dataset.scores)),
+        dataset,
     )
-    misses = misses.with_columns(
-        [
-            pl.col("username").fill_null("不明"),  # usernameがnullの場合は"不明"を設定
-        ]
+
+
+def get_learning_curves(dataset):
+    """ユーザー×モードごとの学習曲線（データセットのバージョンごとに1回だけ計算）"""
+    return get_shared_cache().compute(
+        ("learning_curves",),
+        lambda dataset: calculate_learning_curves(
+            fill_unknown_usernames(dataset.scores)
+        ),
+        dataset,
     )
 
+
+def get_miss_cube(dataset) -> MissCube:
+    """週×ユーザー×文字のミスタイプ回数（データセットのバージョンごとに1回だけ作成）"""
+    return get_shared_cache().compute(
+        ("miss_cube",),
+        lambda dataset: MissCube(dataset.misses, dataset.scores),
+        dataset,
+    )
+
+
+def get_keyboard_misses(dataset, user_id: str = None) -> tuple:
+    """キー・指ごとのミスタイプ回数（データセットのバージョン・ユーザーごとに1回だけ計算）
+
+    Returns:
+        tuple: (key_misses, finger_misses, unmapped)。user_idがNoneの場合は全体
+    """
+
+    def compute(dataset):
+        index = get_shared_cache().compute(
+            ("keyboard_index",), lambda dataset: KeyboardIndex(dataset.misses), dataset
+        )
+        return (
+            index.key_misses(user_id),
+            index.finger_misses(user_id),
+            index.unmapped(user_id),
+        )
+
+    return get_shared_cache().compute(("keyboard_misses", user_id), compute, dataset)
+
+
+def get_similarity_index(dataset) -> SimilarityIndex:
+    """類似ユーザーの検索用の索引（データセットのバージョンごとに1回だけ作成）"""
+    return get_shared_cache().compute(
+        ("similarity_index",),
+        lambda dataset: SimilarityIndex(
+            build_user_features(
+                fill_unknown_usernames(dataset.scores),
+                fill_unknown_usernames(dataset.misses),
+            )
+        ),
+        dataset,
+    )
+
+
+def show_overall_analysis(dataset, panels: PanelScheduler):
+    """全体分析を表示（計算は schedule_overall_panels で投入済み）"""
     # 全体サマリーを表示
     st.subheader("👑 全体成績")
-    show_overall_summary(scores, misses)
+    show_overall_summary(panels.result("overall_summary"))
 
     st.markdown("---")
 
     # 成長率ランキングを表示
     st.subheader("👑 成長率ランキング")
 
-    # 月ごとの成長率ランキングを計算
-    overall_growth_df = calculate_growth_ranking(scores)
-    april_growth_df = calculate_growth_ranking(
-        scores.filter(pl.col("created_at").dt.month() == 4)
-    )
-    may_growth_df = calculate_growth_ranking(
-        scores.filter(pl.col("created_at").dt.month() == 5)
-    )
-    june_growth_df = calculate_growth_ranking(
-        scores.filter(pl.col("created_at").dt.month() == 6)
-    )
-
-    # 月選択用のプルダウンメニュー
-    month_options = {
-        "全体": overall_growth_df,
-        "4月": april_growth_df,
-        "5月": may_growth_df,
-        "6月": june_growth_df,
-    }
-
-    # プルダウンメニューを全体幅で表示
-    selected_month = st.selectbox("期間を選択", list(month_options.keys()), index=0)
-    selected_df = month_options[selected_month]
+    # 選択した期間の分割だけを読み込んで成長率ランキングを計算
+    period = select_period(dataset, "growth_month")
+    panels.submit("growth_ranking", get_rank_index, dataset, "growth", period)
 
     # 成長率ランキングと詳細を横並びに表示
     col1, col2 = st.columns([2, 1])
     with col1:
-        show_growth_ranking(selected_df)
+        show_growth_ranking(panels.result("growth_ranking"))
     with col2:
-        show_growth_ranking_details(scores, users)
+        show_growth_ranking_details(panels.result("growth_details"))
 
     st.markdown("---")
 
     # 平均スコアランキングを表示
     st.subheader("👑 平均スコアランキング")
 
-    # 月ごとの平均スコアランキングを計算
-    overall_avg_df = calculate_average_score(scores)
-    april_avg_df = calculate_average_score(
-        scores.filter(pl.col("created_at").dt.month() == 4)
-    )
-    may_avg_df = calculate_average_score(
-        scores.filter(pl.col("created_at").dt.month() == 5)
-    )
-    june_avg_df = calculate_average_score(
-        scores.filter(pl.col("created_at").dt.month() == 6)
-    )
-
-    # 月選択用のプルダウンメニュー
-    avg_month_options = {
-        "全体": overall_avg_df,
-        "4月": april_avg_df,
-        "5月": may_avg_df,
-        "6月": june_avg_df,
-    }
-
-    # プルダウンメニューを全体幅で表示
-    selected_avg_month = st.selectbox(
-        "期間を選択", list(avg_month_options.keys()), index=0, key="avg_month"
-    )
-    selected_avg_df = avg_month_options[selected_avg_month]
+    # 選択した期間の分割だけを読み込んで平均スコアランキングを計算
+    avg_period = select_period(dataset, "avg_month")
+    panels.submit("average_ranking", get_rank_index, dataset, "average", avg_period)
 
     # 平均スコアランキングと詳細を横並びに表示
     col3, col4 = st.columns([2, 1])
     with col3:
-        show_average_score(selected_avg_df)
+        show_average_score(panels.result("average_ranking"))
     with col4:
-        show_average_score_details(scores, users)
+        show_average_score_details(panels.result("average_details"))
+
+    st.markdown("---")
+
+    # 日ごとの順位の推移を表示
+    st.subheader("📈 順位の推移")
+    show_rank_history(panels.result("rank_history"))
+
+    st.markdown("---")
+
+    # 学習曲線による予測を表示
+    st.subheader("📐 学習曲線")
+    show_learning_curves(panels.result("learning_curves"), get_modes(dataset))
 
     st.markdown("---")
 
     # 全体ミスタイプ分析
     st.subheader("💬 全体ミスタイプ分析")
+    miss_chars = panels.result("overall_misses")
     col5, col6 = st.columns([2, 1])
     with col5:
-        show_overall_miss_chart(misses)
+        show_overall_miss_chart(miss_chars)
     with col6:
-        show_overall_miss_details(misses)
+        show_overall_miss_details(miss_chars)
 
+    # ミスタイプの推移（週ごとの集計から切り出す）
+    st.markdown("#### 📉 ミスタイプの推移")
+    show_overall_miss_trend(panels.result("miss_cube"))
+
+    # キーボードのキー・指ごとのミスタイプ
+    st.markdown("#### ⌨️ キーボードのミスタイプ")
+    show_overall_keyboard_misses(*panels.result("keyboard_misses"))
 
-def show_personal_analysis(scores, misses, users):
-    """個人分析を表示"""
-    # 新卒ユーザーのみをフィルタリング
-    new_graduate_users = users.filter(pl.col("is_newgraduate") == 1)
 
+def get_user_comparison(dataset, user_ids: tuple) -> dict:
+    """選んだユーザーの比較（データセットのバージョン・ユーザーの組み合わせごとに1回だけ計算）
+
+    ユーザーごとの分割はデータセットごとに1回だけ作成し、比較は選んだユーザーの行だけで計算する。
+    """
+    partitions = get_shared_cache().compute(
+        ("user_partitions",),
+        lambda dataset: UserPartitions(dataset.scores, dataset.misses),
+        dataset,
+    )
+    return get_shared_cache().compute(
+        ("user_comparison", user_ids),
+        lambda dataset: compare_users(*partitions.select(user_ids)),
+        dataset,
+    )
+
+
+def show_user_comparison_analysis(users, usernames: list, dataset):
+    """複数のユーザーを選んで比較する"""
+    selected = st.multiselect(
+        "比較するユーザーを選択",
+        usernames,
+        default=[st.session_state.selected_user],
+        key="compare_users",
+    )
+    if not selected:
+        st.info("比較するユーザーを選択してください")
+        return
+
+    user_ids = tuple(
+        users.filter(pl.col("username").is_in(selected))["user_id"].unique().sort()
+    )
+    show_user_comparison(get_user_comparison(dataset, user_ids), get_modes(dataset))
+
+
+def show_personal_analysis(scores, misses, users, dataset):
+    """個人分析を表示"""
     # 個人成績を表示
     st.subheader("👤 個人成績")
 
     # ユーザー選択（ユーザー名のリストを取得してソート）
-    usernames = (
-        new_graduate_users.select("username")
-        .unique()
-        .sort("username")
-        .to_series()
-        .to_list()
-    )
+    # usersは読み込み時に分析対象で絞り込み済み
+    usernames = users.select("username").unique().sort("username").to_series().to_list()
     if not usernames:
-        st.error("新卒ユーザーのデータが見つかりません")
+        st.error("対象ユーザーのデータが見つかりません")
         return
 
     # セッション状態の初期化
     if "selected_user" not in st.session_state:
         st.session_state.selected_user = usernames[0]
     elif st.session_state.selected_user not in usernames:
-        # 現在選択されているユーザーが新卒ユーザーリストに存在しない場合
+        # 現在選択されているユーザーが対象ユーザーリストに存在しない場合
         st.session_state.selected_user = usernames[0]
 
+    # 複数のユーザーを比較する場合は、選んだユーザーの行だけをまとめて集計する
+    if st.toggle("複数のユーザーを比較", key="compare_mode"):
+        show_user_comparison_analysis(users, usernames, dataset)
+        return
+
     # ユーザー選択ボックスの表示
     selected_user = st.selectbox(
         "分析するユーザーを選択",
@@ -252,7 +461,7 @@ def show_personal_analysis(scores, misses, users):
         st.rerun()  # 選択が変更された場合にページを再読み込み
 
     # 選択されたユーザーのデータを取得
-    user_data = new_graduate_users.filter(pl.col("username") == selected_user)
+    user_data = users.filter(pl.col("username") == selected_user)
     if user_data.shape[0] == 0:
         st.error(f"ユーザー {selected_user} のデータが見つかりません")
         return
@@ -268,10 +477,22 @@ def show_personal_analysis(scores, misses, users):
         return
 
     show_personal_summary(user_scores, user_misses)
+    show_personal_ranks(
+        selected_user,
+        get_rank_index(dataset, "average"),
+        get_rank_index(dataset, "growth"),
+    )
+
+    # 似ているユーザー
+    st.subheader("🤝 似ているユーザー")
+    show_similar_users(selected_user, get_similarity_index(dataset))
 
     # 成長率分析
     st.subheader("👑 成長率分析")
-    show_growth_analysis(user_scores)
+    user_curves = get_learning_curves(dataset).filter(
+        pl.col("username") == selected_user
+    )
+    show_growth_analysis(user_scores, get_modes(dataset), user_curves)
 
     # 個人ミスタイプ分析
     st.subheader("💬 個人ミスタイプ分析")
@@ -281,16 +502,47 @@ def show_personal_analysis(scores, misses, users):
     with col8:
         show_personal_miss_details(user_misses, selected_user)
 
+    # ミスタイプの推移（週ごとの集計から切り出す）
+    st.markdown("#### 📉 ミスタイプの推移")
+    show_personal_miss_trend(get_miss_cube(dataset), user_id)
+
+    # キーボードのキー・指ごとのミスタイプ
+    st.markdown("#### ⌨️ キーボードのミスタイプ")
+    show_personal_keyboard_misses(*get_keyboard_misses(dataset, user_id))
+
+
+# データサイエンス分析のパネル名: 計算する関数（スコアデータを受け取る）
+DATA_SCIENCE_PANELS = {
+    "time_score": compute_time_score_analysis,
+    "time_accuracy": compute_time_accuracy_analysis,
+    "difficulty_language_score": compute_difficulty_language_score_analysis,
+    "difficulty_language_accuracy": compute_difficulty_language_accuracy_analysis,
+}
+
+
+def get_data_science_panel(dataset, name: str):
+    """データサイエンス分析のパネル（再標本化を含むため、データセットのバージョンごとに1回だけ計算）"""
+    compute = DATA_SCIENCE_PANELS[name]
+    return get_shared_cache().compute(
+        ("data_science", name), lambda dataset: compute(dataset.scores), dataset
+    )
+
+
+def schedule_data_science_panels(panels: PanelScheduler, dataset):
+    """データサイエンス分析のパネルの計算を投入"""
+    for name in DATA_SCIENCE_PANELS:
+        panels.submit(name, get_data_science_panel, dataset, name)
 
-def show_data_science_analysis(scores, misses, users):
-    """データサイエンス分析を表示"""
+
+def show_data_science_analysis(panels: PanelScheduler):
+    """データサイエンス分析を表示（計算は schedule_data_science_panels で投入済み）"""
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("⏰ 最高スコアが出やすい時間帯")
-        show_time_score_analysis(scores)
+        show_time_score_analysis(panels.result("time_score"))
     with col2:
         st.subheader("🗓️ 最高スコアが出やすい曜日")
-        show_time_accuracy_analysis(scores)
+        show_time_accuracy_analysis(panels.result("time_accuracy"))
 
     st.markdown("---")
 
@@ -298,10 +550,14 @@ def show_data_science_analysis(scores, misses, users):
     col3, col4 = st.columns(2)
     with col3:
         st.subheader("💯 難易度×言語別平均スコア")
-        show_difficulty_language_score_analysis(scores)
+        show_difficulty_language_score_analysis(
+            panels.result("difficulty_language_score")
+        )
     with col4:
         st.subheader("💯 難易度×言語別正確率")
-        show_difficulty_language_accuracy_analysis(scores)
+        show_difficulty_language_accuracy_analysis(
+            panels.result("difficulty_language_accuracy")
+        )
 
 
 def main():
@@ -317,29 +573,55 @@ def main():
 
     st.title("⌨️ 新卒Saltypeスコア分析")
 
-    # データの読み込み
-    scores, misses, users = load_data()
-    if scores is None or misses is None or users is None:
-        st.error("データの読み込みに失敗しました")
-        return
+    # 分析対象の選択（対象者・期間はSQLで絞り込み、キャッシュのキーにもなる）
+    cohort = select_cohort()
 
-    # データの前処理
-    scores, misses, users = load_and_process_data(scores, misses, users)
-    if scores is None or misses is None or users is None:
-        st.error("データの処理に失敗しました")
+    # データの読み込み（前処理済みのデータセットをセッション間で共有）
+    # 期限切れでも前回のデータをすぐに表示し、再読み込みは裏で1回だけ行う
+    try:
+        dataset = get_shared_cache().get_dataset(cohort)
+    except Exception as e:
+        st.error(f"データの処理中にエラーが発生しました: {str(e)}")
+        return
+    if dataset is None:
+        st.error("データの読み込みに失敗しました")
         return
+    scores, misses, users = dataset.scores, dataset.misses, dataset.users
+    st.sidebar.caption(cohort.describe())
+    show_export_links(cohort)
+    show_data_status(dataset)
+    if DB_LISTENER_ENABLED:
+        watch_data_changes(cohort, dataset.version)
+
+    # 全タブが毎回描画されるため、各パネルの計算を先にまとめて投入し、
+    # ワーカースレッドで同時に計算しながら表示順に結果を受け取る
+    panels = PanelScheduler()
+    schedule_overall_panels(panels, scores, misses, users, dataset)
+    schedule_data_science_panels(panels, dataset)
+    # 個人サマリーで使う類似ユーザーの索引も先に作成しておく
+    panels.submit("similarity_index", get_similarity_index, dataset)
 
     # タブの作成
-    tab1, tab2, tab3 = st.tabs(["📊 全体サマリー", "👤 個人サマリー", "📈 データ分析"])
+    tab1, tab2, tab3, tab4 = st.tabs(
+        ["📊 全体サマリー", "👤 個人サマリー", "📈 データ分析", "🛡️ データ確認"]
+    )
+
+    try:
+        with tab1:
+            show_overall_analysis(dataset, panels)
 
-    with tab1:
-        show_overall_analysis(scores, misses, users)
+        with tab2:
+            show_personal_analysis(scores, misses, users, dataset)
 
-    with tab2:
-        show_personal_analysis(scores, misses, users)
+        with tab3:
+            show_data_science_analysis(panels)
 
-    with tab3:
-        show_data_science_analysis(scores, misses, users)
+        with tab4:
+            st.subheader("🛡️ 異常なスコア")
+            show_anomalies(dataset.anomalies)
+    finally:
+        # 再実行などで表示が中断された場合に、残りの計算を取り消す
+        panels.cancel()
 
 
 if __name__ == "__main__":
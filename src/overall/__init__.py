@@ -1,25 +1,42 @@
+# ランキングの計算はanalyticsにあるが、互換性のためoverallからも公開する
+from analytics import calculate_average_score, calculate_growth_ranking
+
 from .growth_ranking import (
     show_growth_ranking,
     show_growth_ranking_details,
-    calculate_growth_ranking,
+    calculate_growth_leaders,
 )
 from .average_score import (
     show_average_score,
     show_average_score_details,
-    calculate_average_score,
+    calculate_average_score_leaders,
 )
 from .overall_miss import (
     show_overall_miss_chart,
     show_overall_miss_details,
+    show_overall_miss_trend,
+    show_overall_keyboard_misses,
+    calculate_overall_miss_chars,
 )
 from .overall_summary import show_overall_summary
+from .rank_history import show_rank_history
+from .learning_curve import show_learning_curves
 
 __all__ = [
     "show_growth_ranking",
     "show_growth_ranking_details",
+    "calculate_growth_leaders",
+    "calculate_growth_ranking",
     "show_average_score",
     "show_average_score_details",
+    "calculate_average_score_leaders",
+    "calculate_average_score",
     "show_overall_miss_chart",
     "show_overall_miss_details",
+    "show_overall_miss_trend",
+    "show_overall_keyboard_misses",
+    "calculate_overall_miss_chars",
     "show_overall_summary",
+    "show_rank_history",
+    "show_learning_curves",
 ]
@@ -0,0 +1,56 @@
+import streamlit as st
+import polars as pl
+from analytics.learning_curve import PROJECTION_PLAYS
+
+# 表示する列: 表示名
+LEARNING_CURVE_COLUMNS = {
+    "username": "ユーザー",
+    "play_count": "プレイ回数",
+    "current_score": "現在の推定",
+    "projected_score": f"{PROJECTION_PLAYS}回後の予測",
+    "plateau": "上限の推定",
+    "learning_rate": "学習率",
+}
+
+
+def show_learning_curves(curves: pl.DataFrame, modes: pl.DataFrame):
+    """モードごとの学習曲線の予測を表示
+
+    Args:
+        curves (pl.DataFrame): analytics.calculate_learning_curves の結果
+        modes (pl.DataFrame): 表示するモード（analytics.list_modes の結果）
+    """
+    if len(modes) == 0:
+        st.info("スコアデータがありません")
+        return
+
+    mode_names = modes["mode_name"].to_list()
+    mode_name = st.selectbox("モード", mode_names, key="learning_curve_mode")
+    mode = modes.row(mode_names.index(mode_name), named=True)
+
+    mode_curves = curves.filter(
+        (pl.col("lang_id") == mode["lang_id"]) & (pl.col("diff_id") == mode["diff_id"])
+    )
+    # 予測スコアの高い順（当てはめていない・収束しなかったユーザーは除く）
+    table = (
+        mode_curves.filter(pl.col("converged"))
+        .sort(["projected_score", "username"], descending=[True, False])
+        .select(
+            pl.col(name).round(0 if name.endswith(("score", "plateau")) else 3)
+            if curves.schema[name].is_float()
+            else pl.col(name)
+            for name in LEARNING_CURVE_COLUMNS
+        )
+        .rename(LEARNING_CURVE_COLUMNS)
+    )
+    if len(table) == 0:
+        st.info("学習曲線を推定できるユーザーがいません")
+        return
+
+    st.dataframe(table, hide_index=True, use_container_width=True)
+    not_converged = mode_curves.filter(~pl.col("converged")).height
+    st.caption(
+        "n回目のスコアを「上限 − 伸び幅 × n^(−学習率)」で近似した推定値です"
+        f"（{PROJECTION_PLAYS}回後の予測は現在のプレイ回数からの追加分）。"
+        f"伸びが見られない・学習率が推定できない{not_converged}人は表示していません"
+    )
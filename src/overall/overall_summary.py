@@ -1,10 +1,8 @@
 import streamlit as st
-import polars as pl
 
 
-def show_overall_summary(scores, misses=None):
-    """全体サマリーを表示"""
-    overall_metrics = calculate_overall_metrics(scores, misses)
+def show_overall_summary(overall_metrics: dict):
+    """全体サマリーを表示（analytics.calculate_overall_metrics の結果）"""
 
     # すべてのサマリーアイテムを1つのHTMLブロックとして構築
     summary_items = [
@@ -35,7 +33,7 @@ def show_overall_summary(scores, misses=None):
     ]
 
     # 総ミスタイプ数（存在する場合）
-    if misses is not None:
+    if "total_misses" in overall_metrics:
         summary_items.append(
             f"""
         <div class="summary-item">
@@ -54,20 +52,3 @@ def show_overall_summary(scores, misses=None):
         """,
         unsafe_allow_html=True,
     )
-
-
-def calculate_overall_metrics(
-    scores: pl.DataFrame, misses: pl.DataFrame = None
-) -> dict:
-    """全体メトリクスを計算"""
-    metrics = {
-        "total_plays": scores.height,
-        "average_score": scores["score"].mean(),
-        "average_accuracy": scores["accuracy"].mean(),
-        "average_typing_count": scores["typing_count"].mean(),
-    }
-
-    if misses is not None:
-        metrics["total_misses"] = misses["miss_count"].sum()
-
-    return metrics
@@ -0,0 +1,42 @@
+import streamlit as st
+import polars as pl
+from utils.charts.line_chart import create_rank_history_chart
+
+# 表示名: 順位の列
+RANK_HISTORY_METRICS = {"平均スコア": "average_rank", "成長率": "growth_rank"}
+# 最初に表示する上位の人数
+DEFAULT_USER_COUNT = 5
+
+
+def show_rank_history(history: pl.DataFrame):
+    """順位の推移を表示（analytics.calculate_rank_history の結果）"""
+    if len(history) == 0:
+        st.info("スコアデータがありません")
+        return
+
+    label = st.radio(
+        "ランキング",
+        list(RANK_HISTORY_METRICS.keys()),
+        horizontal=True,
+        key="rank_history_metric",
+    )
+    rank_col = RANK_HISTORY_METRICS[label]
+
+    # 最終日の順位が上位のユーザーを最初に表示する
+    latest = history.filter(pl.col("date") == history["date"].max()).sort(
+        [rank_col, "username"]
+    )
+    usernames = st.multiselect(
+        "表示するユーザー",
+        latest["username"].to_list(),
+        default=latest["username"].head(DEFAULT_USER_COUNT).to_list(),
+        key=f"rank_history_users_{rank_col}",
+    )
+    if not usernames:
+        st.info("ユーザーを選択してください")
+        return
+
+    st.plotly_chart(
+        create_rank_history_chart(history, rank_col, usernames),
+        use_container_width=True,
+    )
@@ -0,0 +1,30 @@
+import streamlit as st
+from analytics import RankIndex, page_count
+from utils.charts.bar_chart import create_bar_chart
+from utils.config import RANKING_PAGE_SIZE
+
+
+def show_ranking_chart(
+    index: RankIndex,
+    x_col: str,
+    y_col: str,
+    title: str = None,
+    key: str = None,
+    page_size: int = RANKING_PAGE_SIZE,
+):
+    """ランキングを1ページ分ずつ棒グラフで表示"""
+    pages = page_count(len(index), page_size)
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            "ページ", min_value=1, max_value=pages, value=1, step=1, key=key
+        )
+
+    rows = index.page(page, page_size)
+    st.plotly_chart(
+        create_bar_chart(rows, x_col=x_col, y_col=y_col, title=title),
+        use_container_width=True,
+    )
+    if pages > 1:
+        first = (page - 1) * page_size + 1
+        st.caption(f"{first}〜{first + rows.height - 1}位 / 全{len(index)}件")
@@ -1,10 +1,25 @@
 from .growth_analysis import show_growth_analysis
-from .personal_miss import show_personal_miss_chart, show_personal_miss_details
-from .personal_summary import show_personal_summary
+from .personal_miss import (
+    show_personal_miss_chart,
+    show_personal_miss_details,
+    show_personal_miss_trend,
+    show_personal_keyboard_misses,
+)
+from .personal_summary import (
+    show_personal_ranks,
+    show_personal_summary,
+    show_similar_users,
+)
+from .user_comparison import show_user_comparison
 
 __all__ = [
     "show_growth_analysis",
     "show_personal_miss_chart",
     "show_personal_miss_details",
+    "show_personal_miss_trend",
+    "show_personal_keyboard_misses",
+    "show_personal_ranks",
     "show_personal_summary",
+    "show_similar_users",
+    "show_user_comparison",
 ]
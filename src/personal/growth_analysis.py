@@ -1,49 +1,66 @@
 import streamlit as st
 import polars as pl
-import plotly.graph_objects as go
+from analytics.growth import calculate_mode_growth
+from analytics.learning_curve import PROJECTION_PLAYS, learning_curve_values
+from utils.charts.line_chart import create_score_trend_chart
 
 
-def show_growth_analysis(user_scores: pl.DataFrame):
-    """成長率分析を表示"""
+def _format_score(value) -> str:
+    """予測スコアの表示（当てはめていない場合は「-」）"""
+    return f"{value:,.0f}点" if value is not None else "-"
+
+
+def show_growth_analysis(
+    user_scores: pl.DataFrame, modes: pl.DataFrame, curves: pl.DataFrame = None
+):
+    """成長率分析を表示
+
+    Args:
+        user_scores (pl.DataFrame): ユーザーのスコアデータ
+        modes (pl.DataFrame): 表示するモード（analytics.list_modes の結果）
+        curves (pl.DataFrame): ユーザーの学習曲線（analytics.calculate_learning_curves の結果）
+    """
     with st.container():
-        # 言語と難易度の組み合わせを生成
+        # 言語と難易度の組み合わせ（データに含まれるモード）
         mode_combinations = [
-            (lang_id, diff_id)
-            for lang_id in [1, 2]  # 日本語、英語
-            for diff_id in [1, 2, 3]  # 初級、中級、上級
+            ((row["lang_id"], row["diff_id"]), row["mode_name"])
+            for row in modes.iter_rows(named=True)
         ]
 
-        # モード名のマッピング
-        lang_names = {1: "日本語", 2: "英語"}
-        diff_names = {1: "イージー", 2: "ノーマル", 3: "ハード"}
+        # モードごとの初回スコア・最高スコア・成長率
+        mode_growth = {
+            (row["lang_id"], row["diff_id"]): row
+            for row in calculate_mode_growth(user_scores).iter_rows(named=True)
+        }
+
+        # モードごとの学習曲線
+        mode_curves = {
+            (row["lang_id"], row["diff_id"]): row
+            for row in (curves.iter_rows(named=True) if curves is not None else [])
+        }
+
+        # モードごとのスコア（日付でソートしてから1回で分割）
+        mode_scores_by_mode = user_scores.sort("created_at").partition_by(
+            ["lang_id", "diff_id"], as_dict=True
+        )
 
-        # 3×2のグリッドレイアウトを作成
+        # 3列のグリッドレイアウトを作成
         for i in range(0, len(mode_combinations), 3):
             cols = st.columns(3)
             for j in range(3):
                 if i + j < len(mode_combinations):
-                    lang_id, diff_id = mode_combinations[i + j]
-                    mode_scores = user_scores.filter(
-                        (pl.col("lang_id") == lang_id) & (pl.col("diff_id") == diff_id)
-                    )
-                    mode_name = f"{lang_names[lang_id]} - {diff_names[diff_id]}"
+                    mode, mode_name = mode_combinations[i + j]
+                    sorted_scores = mode_scores_by_mode.get(mode)
 
                     with cols[j]:
-                        if len(mode_scores) > 0:
-                            # 日付でソート
-                            sorted_scores = mode_scores.sort("created_at")
-
-                            # 初回スコアと最高スコアを取得
-                            first_score = sorted_scores["score"].head(1).item()
-                            max_score = sorted_scores["score"].max()
-                            play_count = len(mode_scores)
-
-                            # 成長率を計算
-                            growth_rate = (
-                                (max_score - first_score) / first_score * 100
-                                if first_score != 0
-                                else 0
-                            )
+                        if sorted_scores is not None:
+                            # 初回スコアと最高スコア、成長率を取得
+                            growth = mode_growth[mode]
+                            first_score = growth["first_score"]
+                            max_score = growth["max_score"]
+                            play_count = growth["play_count"]
+                            growth_rate = growth["growth_rate"]
+                            curve = mode_curves.get(mode, {})
 
                             st.markdown(
                                 f"""
@@ -68,14 +85,30 @@ def show_growth_analysis(user_scores: pl.DataFrame):
                                                 {growth_rate:+.1f}%
                                             </div>
                                         </div>
+                                        <div class="stat-item">
+                                            <div class="stat-label">上限の推定</div>
+                                            <div class="stat-value">{_format_score(curve.get("plateau"))}</div>
+                                        </div>
+                                        <div class="stat-item">
+                                            <div class="stat-label">{PROJECTION_PLAYS}回後の予測</div>
+                                            <div class="stat-value">{_format_score(curve.get("projected_score"))}</div>
+                                        </div>
                                     </div>
                                 </div>
                                 """,
                                 unsafe_allow_html=True,
                             )
 
-                            # スコア推移チャートを表示
-                            fig = create_score_trend_chart(sorted_scores, mode_name)
+                            # スコア推移チャートを表示（学習曲線は予測するプレイ回数まで）
+                            curve_values = None
+                            if curve.get("plateau") is not None:
+                                curve_values = learning_curve_values(
+                                    curve,
+                                    range(1, play_count + PROJECTION_PLAYS + 1),
+                                )
+                            fig = create_score_trend_chart(
+                                sorted_scores, mode_name, curve_values
+                            )
                             st.plotly_chart(fig, use_container_width=True)
                         else:
                             st.markdown(
@@ -89,52 +122,3 @@ def show_growth_analysis(user_scores: pl.DataFrame):
                                 """,
                                 unsafe_allow_html=True,
                             )
-
-
-def create_score_trend_chart(scores, mode_name):
-    """スコア推移グラフを作成"""
-    fig = go.Figure()
-
-    # プレイ回数のインデックスを作成
-    play_counts = list(range(1, len(scores) + 1))
-
-    # 実際のスコアの折れ線グラフ
-    fig.add_trace(
-        go.Scatter(
-            x=play_counts,
-            y=scores["score"],
-            mode="lines+markers",
-            line=dict(color="#4CAF50", width=2),
-            marker=dict(size=6, color="#4CAF50", line=dict(width=1, color="#FFFFFF")),
-            name="スコア",
-        )
-    )
-
-    # レイアウトの設定
-    fig.update_layout(
-        height=300,
-        margin=dict(l=20, r=20, t=40, b=20),
-        font=dict(size=11, color="white"),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor="rgba(255,255,255,0.2)",
-            gridwidth=1,
-            tickfont=dict(color="white"),
-            tickmode="linear",
-            tick0=1,
-            dtick=1,
-            title=dict(text="プレイ回数", font=dict(color="white")),
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor="rgba(255,255,255,0.2)",
-            gridwidth=1,
-            tickfont=dict(color="white"),
-            title=dict(text="スコア", font=dict(color="white")),
-        ),
-        paper_bgcolor="black",
-        plot_bgcolor="black",
-        showlegend=False,
-    )
-
-    return fig
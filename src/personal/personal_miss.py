@@ -1,12 +1,17 @@
 import streamlit as st
 import polars as pl
 from utils.charts.bar_chart import create_bar_chart
+from utils.charts.heatmap import create_keyboard_heatmap
+from utils.charts.line_chart import create_miss_trend_chart
+from analytics import analyze_misses
+from analytics.miss_trend import RECENT_PERIODS
+from utils.config import RANKING_PAGE_SIZE
 
 
 def show_personal_miss_chart(user_misses: pl.DataFrame, username: str):
     """個人ミスタイプ分析のグラフを表示"""
-    # ミスタイプを分析
-    miss_chars = analyze_misses(user_misses)
+    # ミスタイプを分析（グラフには上位の文字だけを表示する）
+    miss_chars = analyze_misses(user_misses, limit=RANKING_PAGE_SIZE)
 
     if len(miss_chars) > 0:
         # チャートを表示
@@ -30,12 +35,12 @@ def show_personal_miss_chart(user_misses: pl.DataFrame, username: str):
 
 def show_personal_miss_details(user_misses: pl.DataFrame, username: str):
     """個人ミスタイプ分析の詳細情報を表示"""
-    # ミスタイプを分析
-    miss_chars = analyze_misses(user_misses)
+    # ミスタイプを分析（上位5文字だけを選ぶ）
+    miss_chars = analyze_misses(user_misses, limit=5)
 
     if len(miss_chars) > 0:
         # 上位5件のミスタイプを表示
-        for i, row in enumerate(miss_chars.head(5).iter_rows(named=True), 1):
+        for i, row in enumerate(miss_chars.iter_rows(named=True), 1):
             rank_class = f"rank-{i}" if i <= 3 else "rank-other"
             rank_text = f"{i}位"
             st.markdown(
@@ -54,18 +59,63 @@ def show_personal_miss_details(user_misses: pl.DataFrame, username: str):
         )
 
 
-def analyze_misses(misses: pl.DataFrame) -> pl.DataFrame:
-    """ミスタイプを分析"""
-    # 文字ごとのミスタイプ回数を集計
-    miss_chars = (
-        misses.group_by("miss_char")
-        .agg(pl.col("miss_count").sum())
-        .sort("miss_count", descending=True)
-    )
+def show_personal_miss_trend(cube, user_id: str, chars: int = 5):
+    """ユーザーのミスタイプの多い文字の週ごとの推移と、最近悪化している文字を表示
 
-    # インデックスを文字に設定
-    miss_chars = miss_chars.with_columns(pl.col("miss_char").alias("char")).drop(
-        "miss_char"
-    )
+    Args:
+        cube (analytics.MissCube): 週×ユーザー×文字のミスタイプ回数
+        user_id (str): ユーザーID
+        chars (int): 推移を表示する文字数
+    """
+    top_chars = cube.totals(user_id)["miss_char"].head(chars).to_list()
+    if not top_chars:
+        st.info("ミスタイプデータがありません")
+        return
 
-    return miss_chars
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        fig = create_miss_trend_chart(cube.trend(user_id, top_chars))
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        _show_worsening_chars(cube.worsening(user_id))
+
+
+def _show_worsening_chars(worsening: pl.DataFrame):
+    """最近悪化している文字を表示（analytics.MissCube.worsening の結果）"""
+    st.markdown("**最近増えているミスタイプ**")
+    if len(worsening) == 0:
+        st.caption("最近増えている文字はありません")
+        return
+
+    for row in worsening.iter_rows(named=True):
+        st.markdown(
+            f'<div class="ranking-text"><span class="rank-number">📈</span> {row["miss_char"]} '
+            f'<span class="rank-score">{row["before"]:.2f} → {row["recent"]:.2f}回</span></div>',
+            unsafe_allow_html=True,
+        )
+    st.caption(f"1プレイあたりのミスタイプ回数（それより前 → 最近{RECENT_PERIODS}週）")
+
+
+def show_personal_keyboard_misses(
+    key_misses: pl.DataFrame, finger_misses: pl.DataFrame, unmapped: int = 0
+):
+    """ユーザーのキーボードのキー・指ごとのミスタイプ回数を表示
+
+    Args:
+        key_misses (pl.DataFrame): analytics.KeyboardIndex.key_misses の結果
+        finger_misses (pl.DataFrame): analytics.KeyboardIndex.finger_misses の結果
+        unmapped (int): キーに対応付けられなかった文字のミスタイプ回数
+    """
+    if key_misses["miss_count"].sum() == 0:
+        st.info("ミスタイプデータがありません")
+        return
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        st.plotly_chart(create_keyboard_heatmap(key_misses), use_container_width=True)
+    with col2:
+        fig = create_bar_chart(finger_misses, "finger", "miss_count")
+        fig.update_layout(height=320)
+        st.plotly_chart(fig, use_container_width=True)
+    if unmapped > 0:
+        st.caption(f"キーに対応付けられない文字のミスタイプ {unmapped:,}回は含みません")
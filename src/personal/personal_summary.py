@@ -1,11 +1,14 @@
 import streamlit as st
-import polars as pl
+from analytics.summary import calculate_user_metrics
 
 
 def show_personal_summary(user_scores, user_misses):
     """ユーザーサマリーを表示"""
-    user_metrics = calculate_user_metrics(user_scores, user_misses)
+    show_user_metrics(calculate_user_metrics(user_scores, user_misses))
 
+
+def show_user_metrics(user_metrics: dict):
+    """ユーザーメトリクス（calculate_user_metrics と同じ項目）を表示"""
     # すべてのサマリーアイテムを1つのHTMLブロックとして構築
     summary_items = [
         f"""
@@ -51,22 +54,51 @@ def show_personal_summary(user_scores, user_misses):
     )
 
 
-def calculate_user_metrics(
-    user_scores: pl.DataFrame, user_misses: pl.DataFrame
-) -> dict:
-    """ユーザーメトリクスを計算
+def show_personal_ranks(username: str, average_index, growth_index):
+    """全体のランキングでのユーザーの順位を表示"""
+
+    def rank_item(label: str, index) -> str:
+        rank = index.rank(username)
+        value = f'{rank:,}<span class="summary-unit">位</span>' if rank else "-"
+        return f"""
+        <div class="summary-item">
+            <div class="summary-label">{label}</div>
+            <div class="summary-value">{value}<span class="summary-unit"> / {len(index):,}人</span></div>
+        </div>
+        """
+
+    st.markdown(
+        f"""
+        <div class="summary-container">
+            {rank_item("平均スコア順位", average_index)}
+            {rank_item("成長率順位", growth_index)}
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
 
-    Args:
-        user_scores (pl.DataFrame): ユーザーのスコアデータ
-        user_misses (pl.DataFrame): ユーザーのミスタイプデータ
+def show_similar_users(username: str, similarity_index, k: int = 5):
+    """特徴量（モードごとのスコア・正確度・成長率、ミスタイプの分布）が似ているユーザーを表示"""
+    similar = similarity_index.similar(username, k)
+    if len(similar) == 0:
+        st.info("類似ユーザーを検索できるデータがありません")
+        return
 
-    Returns:
-        dict: ユーザーメトリクス
-    """
-    return {
-        "total_plays": user_scores.height,
-        "average_score": user_scores["score"].mean(),
-        "average_accuracy": user_scores["accuracy"].mean(),
-        "total_misses": user_misses["miss_count"].sum(),
-        "average_typing_count": user_scores["typing_count"].mean(),
-    }
+    items = [
+        f"""
+        <div class="summary-item">
+            <div class="summary-label">{name}</div>
+            <div class="summary-value">{similarity * 100:.0f}<span class="summary-unit">%</span></div>
+        </div>
+        """
+        for name, similarity in similar.iter_rows()
+    ]
+    st.markdown(
+        f"""
+        <div class="summary-container">
+            {"".join(items)}
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
@@ -0,0 +1,70 @@
+import streamlit as st
+import polars as pl
+from analytics.growth import MODE_KEYS
+from utils.charts.line_chart import create_user_comparison_chart
+
+from .personal_summary import show_user_metrics
+
+# サマリーのカードを1行に並べる人数
+COMPARE_COLUMNS = 4
+
+
+def show_user_comparison(comparison: dict, modes: pl.DataFrame):
+    """複数のユーザーのスコアの推移・サマリー・モードごとの成長率を並べて表示
+
+    Args:
+        comparison (dict): analytics.compare_users の結果
+        modes (pl.DataFrame): 表示するモード（analytics.list_modes の結果）
+    """
+    metrics = comparison["metrics"]
+    if len(metrics) == 0:
+        st.info("比較するユーザーのスコアデータがありません")
+        return
+
+    # 日ごとの平均スコアの推移（ユーザーごとの線を重ねる）
+    fig = create_user_comparison_chart(comparison["trend"])
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ユーザーごとのサマリーとミスタイプの多い文字を横に並べる
+    miss_chars = {
+        user_id: rows
+        for (user_id,), rows in comparison["misses"]
+        .partition_by("user_id", as_dict=True)
+        .items()
+    }
+    rows = metrics.rows(named=True)
+    for start in range(0, len(rows), COMPARE_COLUMNS):
+        columns = st.columns(COMPARE_COLUMNS)
+        for column, row in zip(columns, rows[start : start + COMPARE_COLUMNS]):
+            with column:
+                st.markdown(f"**{row['username']}**")
+                show_user_metrics(row)
+                user_misses = miss_chars.get(row["user_id"])
+                if user_misses is not None:
+                    st.caption(
+                        "ミスの多い文字: "
+                        + "、".join(
+                            f"{char}（{count:,}回）"
+                            for char, count in user_misses.select(
+                                "miss_char", "miss_count"
+                            ).rows()
+                        )
+                    )
+
+    # モードごとの成長率（行: モード、列: ユーザー）
+    growth = (
+        comparison["growth"]
+        .join(metrics.select("user_id", "username"), on="user_id")
+        .join(modes.select(*MODE_KEYS, "mode_name"), on=MODE_KEYS)
+        .sort(MODE_KEYS)
+        .with_columns(pl.col("growth_rate").round(1))
+        .pivot(on="username", index="mode_name", values="growth_rate")
+    )
+    usernames = [name for name in metrics["username"] if name in growth.columns]
+    growth = growth.select("mode_name", *usernames)
+    st.markdown("**モードごとの成長率（%）**")
+    st.dataframe(
+        growth.rename({"mode_name": "モード"}),
+        hide_index=True,
+        use_container_width=True,
+    )
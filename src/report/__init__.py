@@ -0,0 +1,5 @@
+from .generator import generate_reports
+
+__all__ = [
+    "generate_reports",
+]
@@ -0,0 +1,392 @@
+import argparse
+import datetime
+import multiprocessing
+import os
+import time
+from html import escape
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import polars as pl
+from analytics import (
+    analyze_misses,
+    calculate_average_score,
+    calculate_growth_ranking,
+    calculate_mode_growth,
+    calculate_overall_metrics,
+    calculate_user_metrics,
+    fill_unknown_usernames,
+    filter_period,
+    format_period,
+    list_modes,
+    list_periods,
+    prepare_data,
+    separate_anomalies,
+)
+from cohort import CohortFilter, add_cohort_arguments
+from loader import DataLoadError, load_data
+from utils.charts.bar_chart import create_bar_chart
+from utils.charts.heatmap import (
+    create_difficulty_language_accuracy_heatmap,
+    create_difficulty_language_heatmap,
+    create_time_heatmap,
+    create_weekday_time_heatmap,
+)
+from utils.charts.line_chart import create_score_trend_chart
+from utils.serialization import encode_json
+
+from .pages import (
+    ASSET_DIR_NAME,
+    CSS_NAME,
+    PLOTLY_JS_NAME,
+    REPORT_CSS,
+    render_document,
+    render_figure,
+    render_growth_card,
+    render_ranking,
+    render_section,
+    render_summary,
+)
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+DEFAULT_OUTPUT_DIR = Path(__file__).parent.parent / "data" / "reports"
+CSS_FILES = ["base.css", "ranking.css", "summary.css", "growth.css"]
+
+
+def write_assets(output_dir: Path):
+    """全ページで共有するplotly.jsとCSSを1回だけ出力"""
+    from plotly.offline import get_plotlyjs
+
+    asset_dir = output_dir / ASSET_DIR_NAME
+    asset_dir.mkdir(parents=True, exist_ok=True)
+    (asset_dir / PLOTLY_JS_NAME).write_text(get_plotlyjs(), encoding="utf-8")
+
+    css = [
+        (STATIC_DIR / css_file).read_text(encoding="utf-8") for css_file in CSS_FILES
+    ]
+    css.append(REPORT_CSS)
+    (asset_dir / CSS_NAME).write_text("\n".join(css), encoding="utf-8")
+
+
+def build_overall_report(task: tuple) -> dict:
+    """全体レポートを作成して出力"""
+    scores, misses, user_links, output_dir, generated_at = task
+    scores = fill_unknown_usernames(scores)
+    misses = fill_unknown_usernames(misses)
+
+    metrics = calculate_overall_metrics(scores, misses)
+    summary_html = render_summary(
+        [
+            ("総プレイ回数", f"{metrics['total_plays']:,}", "回"),
+            ("全体平均スコア", f"{metrics['average_score']:.1f}", ""),
+            ("全体平均正確度", f"{metrics['average_accuracy'] * 100:.1f}", "%"),
+            ("全体平均タイピング数", f"{metrics['average_typing_count']:.1f}", "回"),
+            ("総ミスタイプ数", f"{metrics['total_misses']:,}", "回"),
+        ]
+    )
+
+    # 全期間とデータに含まれる各年月のランキング
+    periods = [None, *list_periods(scores)]
+
+    sections = [render_section("👑 全体成績", summary_html)]
+    rankings = {}
+    for period in periods:
+        period_name = format_period(period)
+        period_scores = filter_period(scores, period)
+        growth_df = calculate_growth_ranking(period_scores)
+        avg_df = calculate_average_score(period_scores)
+        rankings[period_name] = {"growth": growth_df, "average": avg_df}
+
+        growth_rows = [
+            (row["username"], f"{row['total_growth_rate']:+.1f}%")
+            for row in growth_df.head(5).iter_rows(named=True)
+        ]
+        avg_rows = [
+            (row["username"], f"{row['average_score']:,.0f}点")
+            for row in avg_df.head(5).iter_rows(named=True)
+        ]
+        sections.append(
+            render_section(
+                f"👑 成長率ランキング（{period_name}）",
+                _two_columns(
+                    render_figure(
+                        create_bar_chart(
+                            growth_df,
+                            "username",
+                            "total_growth_rate",
+                            "成長率ランキング",
+                        )
+                    ),
+                    render_ranking(growth_rows),
+                ),
+            )
+        )
+        sections.append(
+            render_section(
+                f"👑 平均スコアランキング（{period_name}）",
+                _two_columns(
+                    render_figure(
+                        create_bar_chart(
+                            avg_df, "username", "average_score", "平均スコアランキング"
+                        )
+                    ),
+                    render_ranking(avg_rows),
+                ),
+            )
+        )
+
+    miss_chars = analyze_misses(misses)
+    sections.append(
+        render_section(
+            "💬 全体ミスタイプ分析",
+            _two_columns(
+                render_figure(
+                    create_bar_chart(
+                        miss_chars.rename({"char": "miss_type", "miss_count": "count"}),
+                        "miss_type",
+                        "count",
+                    )
+                ),
+                render_ranking(
+                    [
+                        (row["char"], f"{row['miss_count']:,}回")
+                        for row in miss_chars.head(5).iter_rows(named=True)
+                    ]
+                ),
+            ),
+        )
+    )
+
+    sections.append(
+        render_section(
+            "📈 データ分析",
+            '<div class="report-grid">'
+            + "".join(
+                render_figure(create_figure(scores))
+                for create_figure in [
+                    create_time_heatmap,
+                    create_weekday_time_heatmap,
+                    create_difficulty_language_heatmap,
+                    create_difficulty_language_accuracy_heatmap,
+                ]
+            )
+            + "</div>",
+        )
+    )
+
+    links = "".join(
+        f'<li><a href="users/{user_id}.html">{escape(username)}</a></li>'
+        for user_id, username in user_links
+    )
+    sections.append(render_section("👤 個人レポート", f"<ul>{links}</ul>"))
+
+    (output_dir / "index.html").write_text(
+        render_document("⌨️ 新卒Saltypeスコア分析", "".join(sections), "", generated_at),
+        encoding="utf-8",
+    )
+    (output_dir / "overall.json").write_bytes(
+        encode_json({"metrics": metrics, "rankings": rankings, "misses": miss_chars})
+    )
+    return metrics
+
+
+def build_user_report(task: tuple) -> dict:
+    """個人レポートを作成して出力"""
+    user_id, username, user_scores, user_misses, modes, output_dir, generated_at = task
+
+    metrics = calculate_user_metrics(user_scores, user_misses)
+    summary_html = render_summary(
+        [
+            ("総プレイ回数", f"{metrics['total_plays']:,}", "回"),
+            ("平均スコア", f"{metrics['average_score']:.1f}", ""),
+            ("平均正確度", f"{metrics['average_accuracy'] * 100:.1f}", "%"),
+            ("平均タイピング数", f"{metrics['average_typing_count']:.1f}", "回"),
+            ("総ミスタイプ数", f"{metrics['total_misses']:,}", "回"),
+        ]
+    )
+
+    # モードごとの成長率カード
+    mode_growth = {
+        (row["lang_id"], row["diff_id"]): row
+        for row in calculate_mode_growth(user_scores).iter_rows(named=True)
+    }
+    mode_scores_by_mode = user_scores.sort("created_at").partition_by(
+        ["lang_id", "diff_id"], as_dict=True
+    )
+    cards = []
+    for lang_id, diff_id, mode_name in modes.select(
+        ["lang_id", "diff_id", "mode_name"]
+    ).iter_rows():
+        growth = mode_growth.get((lang_id, diff_id))
+        chart_html = ""
+        if growth is not None:
+            chart_html = render_figure(
+                create_score_trend_chart(
+                    mode_scores_by_mode[(lang_id, diff_id)], mode_name
+                )
+            )
+        cards.append(render_growth_card(mode_name, growth, chart_html))
+
+    miss_chars = analyze_misses(user_misses)
+    miss_chart = ""
+    if len(miss_chars) > 0:
+        miss_chart = render_figure(
+            create_bar_chart(
+                miss_chars.rename({"char": "miss_type", "miss_count": "count"}),
+                "miss_type",
+                "count",
+            )
+        )
+    miss_rows = [
+        (row["char"], f"{row['miss_count']:,}回")
+        for row in miss_chars.head(5).iter_rows(named=True)
+    ]
+
+    body = (
+        '<a href="../index.html">← 全体レポート</a>'
+        + render_section("👤 個人成績", summary_html)
+        + render_section(
+            "👑 成長率分析", f'<div class="report-columns">{"".join(cards)}</div>'
+        )
+        + render_section(
+            "💬 個人ミスタイプ分析", _two_columns(miss_chart, render_ranking(miss_rows))
+        )
+    )
+
+    user_dir = output_dir / "users"
+    (user_dir / f"{user_id}.html").write_text(
+        render_document(f"👤 {username}", body, "../", generated_at), encoding="utf-8"
+    )
+    (user_dir / f"{user_id}.json").write_bytes(
+        encode_json(
+            {
+                "user_id": user_id,
+                "username": username,
+                "metrics": metrics,
+                "mode_growth": list(mode_growth.values()),
+                "misses": miss_chars,
+            }
+        )
+    )
+    return {"user_id": user_id, "username": username, **metrics}
+
+
+def _two_columns(left: str, right: str) -> str:
+    return f'<div class="report-grid"><div>{left}</div><div>{right}</div></div>'
+
+
+def _partition_by_user(df: pl.DataFrame) -> dict:
+    """ユーザーIDごとにデータフレームを分割"""
+    return {
+        (key[0] if isinstance(key, tuple) else key): part
+        for key, part in df.partition_by("user_id", as_dict=True).items()
+    }
+
+
+def generate_reports(
+    scores: pl.DataFrame,
+    misses: pl.DataFrame,
+    users: pl.DataFrame,
+    output_dir: Path,
+    max_workers: int = None,
+) -> dict:
+    """全体レポートと全ユーザーの個人レポートを並列に作成する
+
+    Args:
+        scores (pl.DataFrame): 前処理済みのスコアデータ
+        misses (pl.DataFrame): 前処理済みのミスタイプデータ
+        users (pl.DataFrame): ユーザーデータ
+        output_dir (Path): 出力先ディレクトリ
+        max_workers (int): プロセス数（Noneの場合はCPU数）
+
+    Returns:
+        dict: 出力したレポートの一覧（manifest.jsonと同じ内容）
+    """
+    generated_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    (output_dir / "users").mkdir(parents=True, exist_ok=True)
+    write_assets(output_dir)
+
+    # スコアのある対象ユーザー（読み込み時に絞り込み済み）のページを作成する
+    user_scores = _partition_by_user(scores)
+    user_misses = _partition_by_user(misses)
+    # 成長率カードに並べるモード（対象者のデータに含まれるもの）
+    modes = list_modes(scores)
+    targets = (
+        users.filter(pl.col("user_id").is_in(list(user_scores)))
+        .select(["user_id", "username"])
+        .unique()
+        .sort("username")
+        .rows()
+    )
+
+    user_tasks = [
+        (
+            user_id,
+            username,
+            user_scores[user_id],
+            user_misses.get(user_id, misses.clear()),
+            modes,
+            output_dir,
+            generated_at,
+        )
+        for user_id, username in targets
+    ]
+
+    # Polarsのスレッドプールとforkの組み合わせを避けるためspawnを使う
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        overall_future = executor.submit(
+            build_overall_report,
+            (scores, misses, targets, output_dir, generated_at),
+        )
+        chunksize = max(1, len(user_tasks) // ((max_workers or os.cpu_count()) * 4))
+        user_results = list(
+            executor.map(build_user_report, user_tasks, chunksize=chunksize)
+        )
+        overall_metrics = overall_future.result()
+
+    manifest = {
+        "generated_at": generated_at,
+        "overall": overall_metrics,
+        "users": user_results,
+    }
+    (output_dir / "manifest.json").write_bytes(encode_json(manifest))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="静的HTML/JSONレポートを一括作成")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_OUTPUT_DIR / datetime.date.today().isoformat(),
+        help="出力先ディレクトリ",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数")
+    add_cohort_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        cohort = CohortFilter.from_params(vars(args))
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    try:
+        scores, misses, users = prepare_data(*load_data(cohort))
+    except DataLoadError as e:
+        raise SystemExit(f"データの読み込みに失敗しました: {str(e)}")
+    if scores is None:
+        raise SystemExit("対象のデータがありません")
+    # ダッシュボードと同じく異常なスコアを除く（ANOMALY_ACTION を参照）
+    scores, _ = separate_anomalies(scores)
+
+    manifest = generate_reports(scores, misses, users, args.output, args.workers)
+    print(
+        f"{len(manifest['users'])}人分のレポートを出力しました: {args.output} "
+        f"({time.perf_counter() - start:.1f}秒)"
+    )
+
+
+if __name__ == "__main__":
+    main()
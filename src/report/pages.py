@@ -0,0 +1,119 @@
+from html import escape
+
+# レポート共通のアセット（1回だけ出力し、全ページから参照する）
+ASSET_DIR_NAME = "assets"
+PLOTLY_JS_NAME = "plotly.min.js"
+CSS_NAME = "report.css"
+
+# ダッシュボードの背景に合わせるためのスタイル
+REPORT_CSS = """
+body {
+    background-color: #0E1117;
+    color: #FFFFFF;
+    font-family: sans-serif;
+    margin: 0 auto;
+    max-width: var(--container-max-width);
+    padding: var(--container-padding);
+}
+a { color: #00ACFF; }
+.report-grid { display: grid; grid-template-columns: 2fr 1fr; gap: 1rem; }
+.report-columns { display: grid; grid-template-columns: repeat(3, 1fr); gap: 1rem; }
+.report-meta { color: rgba(255, 255, 255, 0.5); font-size: 0.9rem; }
+"""
+
+
+def render_document(title: str, body: str, asset_prefix: str, generated_at: str) -> str:
+    """1ページ分のHTMLを作成"""
+    return f"""<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<title>{escape(title)}</title>
+<link rel="stylesheet" href="{asset_prefix}{ASSET_DIR_NAME}/{CSS_NAME}">
+<script src="{asset_prefix}{ASSET_DIR_NAME}/{PLOTLY_JS_NAME}"></script>
+</head>
+<body>
+<h1>{escape(title)}</h1>
+<div class="report-meta">作成日時: {escape(generated_at)}</div>
+{body}
+</body>
+</html>
+"""
+
+
+def render_figure(fig) -> str:
+    """Plotlyのグラフを埋め込み用のHTMLに変換（plotly.jsは共有アセットを参照）"""
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+def render_summary(items: list) -> str:
+    """サマリー項目 (ラベル, 値, 単位) のリストをHTMLに変換"""
+    summary_items = [
+        f"""
+        <div class="summary-item">
+            <div class="summary-label">{escape(label)}</div>
+            <div class="summary-value">{value}<span class="summary-unit">{unit}</span></div>
+        </div>
+        """
+        for label, value, unit in items
+    ]
+    return f'<div class="summary-container">{"".join(summary_items)}</div>'
+
+
+def render_ranking(rows: list) -> str:
+    """ランキング (名前, 表示値) のリストをHTMLに変換"""
+    if not rows:
+        return '<div class="ranking-text"><span class="rank-number">-</span> データがありません</div>'
+
+    items = []
+    for i, (name, value) in enumerate(rows, 1):
+        rank_class = f"rank-{i}" if i <= 3 else "rank-other"
+        items.append(
+            f'<div class="ranking-text {rank_class}"><span class="rank-number">{i}位</span> {escape(str(name))} <span class="rank-score">{value}</span></div>'
+        )
+    return "".join(items)
+
+
+def render_growth_card(mode_name: str, growth: dict, chart_html: str) -> str:
+    """モードごとの成長率カードをHTMLに変換（growthがNoneの場合はデータなし）"""
+    if growth is None:
+        return f"""
+        <div class="growth-container">
+            <div class="mode-title">{escape(mode_name)}</div>
+            <div style="text-align: center; padding: 20px; color: rgba(255, 255, 255, 0.5);">
+                データがありません
+            </div>
+        </div>
+        """
+
+    growth_rate = growth["growth_rate"]
+    growth_class = "growth-positive" if growth_rate >= 0 else "growth-negative"
+    return f"""
+        <div class="growth-container">
+            <div class="mode-title">{escape(mode_name)}</div>
+            <div class="mode-stats">
+                <div class="stat-item">
+                    <div class="stat-label">初回スコア</div>
+                    <div class="stat-value">{growth["first_score"]:,.0f}点</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">最高スコア</div>
+                    <div class="stat-value">{growth["max_score"]:,.0f}点</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">プレイ回数</div>
+                    <div class="stat-value">{growth["play_count"]}回</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">成長率</div>
+                    <div class="stat-value {growth_class}">{growth_rate:+.1f}%</div>
+                </div>
+            </div>
+            {chart_html}
+        </div>
+        """
+
+
+def render_section(title: str, content: str) -> str:
+    """見出し付きのセクションを作成"""
+    return f"<h2>{escape(title)}</h2>{content}<hr>"
@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from utils.config import PANEL_WORKERS
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_panel_executor() -> ThreadPoolExecutor:
+    """パネルの計算に使うスレッドプール（プロセス内の全セッションで共有）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PANEL_WORKERS or None, thread_name_prefix="panel"
+            )
+        return _executor
+
+
+class PanelScheduler:
+    """パネルの計算をワーカースレッドで同時に実行し、結果を表示順に受け取る
+
+    計算（集計・グラフの作成）は互いに独立しており、Polarsの処理中はGILが
+    解放されるため、先にすべてを投入しておけば、表示にかかる時間は
+    各パネルの合計ではなく最も遅いパネルに近づく。
+    計算する関数の中でStreamlitの関数を呼んではいけない（画面への描画は
+    result で結果を受け取ったスクリプトのスレッドで行う）。
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor = None):
+        self._executor = executor or get_panel_executor()
+        self._futures = {}
+
+    def submit(self, name: str, func: Callable, *args, **kwargs):
+        """パネルの計算を投入する（同じ名前が投入済みの場合は何もしない）"""
+        if name not in self._futures:
+            self._futures[name] = self._executor.submit(func, *args, **kwargs)
+
+    def result(self, name: str):
+        """パネルの計算結果を待って取得する（計算中の例外はここで送出される）"""
+        future: Future = self._futures[name]
+        return future.result()
+
+    def cancel(self):
+        """まだ開始していない計算を取り消す"""
+        for future in self._futures.values():
+            future.cancel()
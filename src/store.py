@@ -0,0 +1,250 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import polars as pl
+from analytics.anomaly import separate_anomalies
+from analytics.preprocess import prepare_data
+from cohort import DEFAULT_COHORT, CohortFilter, add_cohort_arguments
+from loader import DataLoadError, load_data
+from utils.config import STORE_DIR
+
+# 年月で分割して保存するテーブル（ユーザーは件数が少ないため分割しない）
+PARTITIONED_TABLES = ("scores", "misses")
+MANIFEST_NAME = "manifest.json"
+PARTITION_FILE = "data.parquet"
+
+
+def store_path(cohort: CohortFilter, store_dir=STORE_DIR) -> Path:
+    """対象者・期間ごとの保存先"""
+    digest = hashlib.sha1(repr(cohort).encode("utf-8")).hexdigest()[:16]
+    return Path(store_dir) / digest
+
+
+def partition_name(period: tuple) -> str:
+    """Hive形式の分割名（例: "year=2024/month=4"）"""
+    year, month = period
+    return f"year={year}/month={month}"
+
+
+def _checksum(frame: pl.DataFrame) -> str:
+    """行の並び順によらない内容のチェックサム"""
+    hashes = frame.hash_rows(seed=0).sort()
+    return hashlib.sha1(hashes.to_numpy().tobytes()).hexdigest()[:16]
+
+
+def _isoformat(value) -> str:
+    return value.isoformat() if isinstance(value, datetime.datetime) else None
+
+
+def partition_stats(frame: pl.DataFrame) -> dict:
+    """分割ごとの統計情報（件数・ユーザー数・作成日時の範囲・チェックサム）"""
+    return {
+        "rows": frame.height,
+        "users": frame["user_id"].n_unique(),
+        "created_from": _isoformat(frame["created_at"].min()),
+        "created_to": _isoformat(frame["created_at"].max()),
+        "checksum": _checksum(frame),
+    }
+
+
+class PartitionedStore:
+    """スコア・ミスタイプを作成年月ごとのParquetに分割して保存する
+
+    保存先は <store_dir>/<対象者>/<テーブル>/year=YYYY/month=M/data.parquet の
+    Hive形式で、分割ごとの統計情報を manifest.json に記録する。
+    期間を指定した読み込みでは該当する分割のファイルだけを開き、
+    書き込みでは内容が変わった分割だけを書き直す。
+    """
+
+    def __init__(self, cohort: CohortFilter = DEFAULT_COHORT, store_dir=STORE_DIR):
+        self.cohort = cohort
+        self.path = store_path(cohort, store_dir)
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    @property
+    def manifest(self) -> dict:
+        """保存済みの分割の統計情報 {"version": ..., "tables": {テーブル: {分割名: 統計}}}"""
+        if self._manifest is None:
+            path = self.path / MANIFEST_NAME
+            if path.exists():
+                self._manifest = json.loads(path.read_text(encoding="utf-8"))
+            else:
+                self._manifest = {"version": None, "tables": {}}
+        return self._manifest
+
+    @property
+    def version(self) -> str:
+        """保存しているデータセットのバージョン（未保存の場合はNone）"""
+        return self.manifest["version"]
+
+    def periods(self, table: str = "scores") -> list:
+        """保存している期間（年, 月）を古い順に取得"""
+        stats = self.manifest["tables"].get(table, {})
+        return sorted((info["year"], info["month"]) for info in stats.values())
+
+    def stats(self, table: str, period: tuple) -> dict:
+        """分割の統計情報（分割がない場合はNone）"""
+        return self.manifest["tables"].get(table, {}).get(partition_name(period))
+
+    def write(
+        self,
+        scores: pl.DataFrame,
+        misses: pl.DataFrame,
+        users: pl.DataFrame,
+        version: str = None,
+        anomalies: pl.DataFrame = None,
+    ) -> dict:
+        """データセットを保存する（内容が変わった分割だけを書き直す）
+
+        Args:
+            scores (pl.DataFrame): 前処理済みのスコアデータ
+            misses (pl.DataFrame): 前処理済みのミスタイプデータ
+            users (pl.DataFrame): 前処理済みのユーザーデータ
+            version (str): データセットのバージョン
+            anomalies (pl.DataFrame): 検出した異常なスコア（Noneの場合は保存しない）
+
+        Returns:
+            dict: 書き直した分割名のリスト {テーブル: [分割名, ...]}
+        """
+        with self._lock:
+            manifest = {"version": version, "tables": {}}
+            rewritten = {}
+            for table, frame in zip(PARTITIONED_TABLES, (scores, misses)):
+                manifest["tables"][table], rewritten[table] = self._write_table(
+                    table, frame
+                )
+
+            tmp_users = self.path / "users.parquet.tmp"
+            users.write_parquet(tmp_users)
+            os.replace(tmp_users, self.path / "users.parquet")
+
+            anomalies_path = self.path / "anomalies.parquet"
+            if anomalies is not None:
+                tmp_anomalies = self.path / "anomalies.parquet.tmp"
+                anomalies.write_parquet(tmp_anomalies)
+                os.replace(tmp_anomalies, anomalies_path)
+            else:
+                anomalies_path.unlink(missing_ok=True)
+
+            # 統計情報は最後に書き換える（途中で失敗しても以前の内容と一致したまま）
+            tmp_manifest = self.path / (MANIFEST_NAME + ".tmp")
+            tmp_manifest.write_text(
+                json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            os.replace(tmp_manifest, self.path / MANIFEST_NAME)
+            self._manifest = manifest
+            return rewritten
+
+    def _write_table(self, table: str, frame: pl.DataFrame) -> tuple:
+        previous = self.manifest["tables"].get(table, {})
+        table_dir = self.path / table
+        table_dir.mkdir(parents=True, exist_ok=True)
+
+        partitions = frame.with_columns(
+            pl.col("created_at").dt.year().alias("year"),
+            pl.col("created_at").dt.month().alias("month"),
+        ).partition_by(["year", "month"], as_dict=True, include_key=False)
+
+        stats, rewritten = {}, []
+        for (year, month), partition in sorted(partitions.items()):
+            name = partition_name((year, month))
+            info = {"year": year, "month": month, **partition_stats(partition)}
+            path = table_dir / name / PARTITION_FILE
+            old = previous.get(name)
+            if old is None or old["checksum"] != info["checksum"] or not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(PARTITION_FILE + ".tmp")
+                partition.write_parquet(tmp_path)
+                os.replace(tmp_path, path)
+                rewritten.append(name)
+            stats[name] = info
+
+        # データがなくなった期間の分割を削除する
+        for name in set(previous) - set(stats):
+            shutil.rmtree(table_dir / name, ignore_errors=True)
+        for year_dir in table_dir.glob("year=*"):
+            if not any(year_dir.iterdir()):
+                year_dir.rmdir()
+        return stats, rewritten
+
+    def files(self, table: str, periods: list = None) -> list:
+        """指定した期間の分割のファイル（Noneの場合は全期間、古い順）
+
+        Raises:
+            LookupError: テーブルが保存されていない場合
+        """
+        stats = self.manifest["tables"].get(table)
+        if not stats:
+            raise LookupError(f"{table} は保存されていません")
+
+        names = sorted(
+            stats, key=lambda name: (stats[name]["year"], stats[name]["month"])
+        )
+        if periods is not None:
+            selected = {partition_name(period) for period in periods}
+            names = [name for name in names if name in selected]
+        return [self.path / table / name / PARTITION_FILE for name in names]
+
+    def scan(self, table: str, periods: list = None) -> pl.LazyFrame:
+        """指定した期間の分割だけを読み込むLazyFrame（files を参照）"""
+        files = self.files(table, periods)
+        if not files:
+            # 該当する期間がない場合は列だけを返す
+            return pl.scan_parquet(self.files(table)[0]).head(0)
+        return pl.scan_parquet(files, hive_partitioning=False)
+
+    def read(self, table: str, periods: list = None) -> pl.DataFrame:
+        """指定した期間の分割を読み込む（scan を参照）"""
+        return self.scan(table, periods).collect()
+
+    def read_users(self) -> pl.DataFrame:
+        return pl.read_parquet(self.path / "users.parquet")
+
+    def read_anomalies(self) -> pl.DataFrame:
+        """保存した異常なスコア（保存していない場合はNone）"""
+        path = self.path / "anomalies.parquet"
+        return pl.read_parquet(path) if path.exists() else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="年月ごとに分割したデータセットの保存")
+    add_cohort_arguments(parser)
+    parser.add_argument("--store-dir", default=STORE_DIR, help="保存先")
+    args = parser.parse_args()
+
+    try:
+        cohort = CohortFilter.from_params(vars(args))
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        scores, misses, users = prepare_data(*load_data(cohort))
+    except DataLoadError as e:
+        raise SystemExit(f"データの読み込みに失敗しました: {str(e)}")
+    if scores is None:
+        raise SystemExit("対象のデータがありません")
+    scores, anomalies = separate_anomalies(scores)
+
+    store = PartitionedStore(cohort, args.store_dir)
+    rewritten = store.write(scores, misses, users, anomalies=anomalies)
+    for table in PARTITIONED_TABLES:
+        print(
+            f"{table}: {len(store.periods(table))}分割中 {len(rewritten[table])}分割を更新"
+        )
+        for period in store.periods(table):
+            info = store.stats(table, period)
+            print(
+                f"  {partition_name(period)}: {info['rows']:,}行 "
+                f"{info['users']}人 ({info['created_from']} 〜 {info['created_to']})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+def graph_objects():
+    """plotly.graph_objects を読み込んで返す
+
+    Plotlyは読み込みに時間がかかるため、各グラフのモジュールでは起動時に読み込まず、
+    グラフを作成するときにこの関数を通して読み込む（起動時間短縮のため）。
+    """
+    import plotly.graph_objects as go
+
+    return go
@@ -1,11 +1,20 @@
-import plotly.graph_objects as go
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import polars as pl
+from utils.charts import graph_objects
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
 
 def create_bar_chart(
     data: pl.DataFrame, x_col: str, y_col: str, title: str = None
 ) -> go.Figure:
     """縦棒グラフを作成"""
+    go = graph_objects()
+
     # グラフの基本設定
     fig = go.Figure()
 
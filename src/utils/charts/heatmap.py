@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import polars as pl
+from analytics import (
+    bootstrap_difficulty_language_intervals,
+    calculate_difficulty_language_matrix,
+    calculate_hourly_best_counts,
+    calculate_weekday_hour_matrix,
+)
+from analytics.heatmap import START_HOUR, END_HOUR
+from analytics.keyboard import SPACE_KEY
+from utils.charts import graph_objects
+from utils.config import LANGUAGE_NAMES
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+
+def create_time_heatmap(scores: pl.DataFrame) -> go.Figure:
+    """時間帯ヒートマップを作成"""
+    go = graph_objects()
+
+    # 時間帯ごとの最高スコア数を集計
+    start_hour, end_hour = START_HOUR, END_HOUR
+    hours, counts = calculate_hourly_best_counts(scores, start_hour, end_hour)
+
+    # ヒートマップを作成
+    fig = go.Figure()
+
+    # スコアのヒートマップ
+    fig.add_trace(
+        go.Bar(
+            x=hours,
+            y=counts,
+            marker_color=counts,
+            marker_colorscale="Viridis",
+            name="最高スコア数",
+            hovertemplate="%{x}時台<br>最高スコア数: %{y}回<extra></extra>",
+        )
+    )
+
+    # レイアウトの設定
+    fig.update_layout(
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=11, color="white"),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            tickmode="linear",
+            tick0=start_hour,
+            dtick=1,
+            title=dict(text="時間帯", font=dict(color="white")),
+            range=[start_hour - 0.5, end_hour - 0.5],  # バーの表示を調整
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="最高スコア数", font=dict(color="white")),
+        ),
+        paper_bgcolor="black",
+        plot_bgcolor="black",
+        showlegend=False,
+    )
+
+    return fig
+
+
+def create_weekday_time_heatmap(scores: pl.DataFrame) -> go.Figure:
+    """曜日×時間帯のヒートマップを作成"""
+    go = graph_objects()
+
+    # 曜日×時間帯で最高スコア数を集計（土日を除外）
+    start_hour = START_HOUR
+    hours, weekdays, z = calculate_weekday_hour_matrix(scores, start_hour, END_HOUR)
+
+    # ヒートマップを作成
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=z,
+            x=hours,
+            y=weekdays,
+            colorscale="Viridis",
+            hovertemplate="%{y}曜日 %{x}時台<br>最高スコア数: %{z}回<extra></extra>",
+        )
+    )
+
+    # レイアウトの設定
+    fig.update_layout(
+        height=400,  # 高さを調整（5日分なので少し小さく）
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=11, color="white"),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            tickmode="linear",
+            tick0=start_hour,
+            dtick=1,
+            title=dict(text="時間帯", font=dict(color="white")),
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="曜日", font=dict(color="white")),
+        ),
+        paper_bgcolor="black",
+        plot_bgcolor="black",
+    )
+
+    return fig
+
+
+def create_difficulty_language_heatmap(scores: pl.DataFrame) -> go.Figure:
+    """難易度と言語の組み合わせによる平均スコアのヒートマップを作成"""
+    go = graph_objects()
+
+    # 難易度と言語の組み合わせごとの平均スコア（言語は日本語から英語へ）
+    difficulties, languages, z_data = calculate_difficulty_language_matrix(
+        scores, "score", languages=list(LANGUAGE_NAMES.values())
+    )
+    # 平均スコアの95%信頼区間（ユーザー単位のブートストラップ）
+    intervals = _interval_grid(
+        bootstrap_difficulty_language_intervals(scores, "score"),
+        difficulties,
+        languages,
+    )
+
+    # ヒートマップの作成（平均値と信頼区間の半分の幅を表示）
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=z_data,
+            x=languages,
+            y=difficulties,
+            colorscale="Viridis",
+            text=[
+                [
+                    f"{score:.0f}<br>±{(high - low) / 2:.0f}" if score > 0 else "-"
+                    for score, (low, high) in zip(row, interval_row)
+                ]
+                for row, interval_row in zip(z_data, intervals)
+            ],
+            texttemplate="%{text}",
+            textfont={"size": 14},
+            customdata=intervals,
+            hovertemplate="%{y} × %{x}<br>平均スコア: %{z:.0f}"
+            "<br>95%信頼区間: %{customdata[0]:.0f}〜%{customdata[1]:.0f}<extra></extra>",
+        )
+    )
+
+    fig.update_layout(
+        margin=dict(l=20, r=20, t=40, b=20),
+        height=400,
+    )
+
+    return fig
+
+
+def create_difficulty_language_accuracy_heatmap(scores: pl.DataFrame) -> go.Figure:
+    """難易度と言語の組み合わせによる正確性のヒートマップを作成"""
+    go = graph_objects()
+
+    # 難易度と言語の組み合わせごとの平均正確性
+    difficulties, languages, z_data = calculate_difficulty_language_matrix(
+        scores, "accuracy"
+    )
+    # 平均正確性の95%信頼区間（ユーザー単位のブートストラップ）
+    intervals = _interval_grid(
+        bootstrap_difficulty_language_intervals(scores, "accuracy"),
+        difficulties,
+        languages,
+    )
+
+    # ヒートマップの作成（平均値と信頼区間の半分の幅を表示）
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=z_data,
+            x=languages,
+            y=difficulties,
+            colorscale="Viridis",
+            text=[
+                [
+                    f"{acc:.2%}<br>±{(high - low) / 2:.2%}" if acc > 0 else "-"
+                    for acc, (low, high) in zip(row, interval_row)
+                ]
+                for row, interval_row in zip(z_data, intervals)
+            ],
+            texttemplate="%{text}",
+            textfont={"size": 14},
+            customdata=intervals,
+            hovertemplate="%{y} × %{x}<br>平均正確性: %{z:.2%}"
+            "<br>95%信頼区間: %{customdata[0]:.2%}〜%{customdata[1]:.2%}<extra></extra>",
+        )
+    )
+
+    fig.update_layout(
+        margin=dict(l=20, r=20, t=40, b=20),
+        height=400,
+    )
+
+    return fig
+
+
+def create_keyboard_heatmap(key_misses: pl.DataFrame) -> go.Figure:
+    """キーボードの配置でキーごとのミスタイプ回数のヒートマップを作成
+
+    Args:
+        key_misses (pl.DataFrame): analytics.KeyboardIndex.key_misses の結果
+    """
+    go = graph_objects()
+
+    labels = ["Space" if key == SPACE_KEY else key.upper() for key in key_misses["key"]]
+    fig = go.Figure(
+        data=go.Scatter(
+            x=key_misses["x"].to_numpy(),
+            y=key_misses["row"].to_numpy(),
+            mode="markers+text",
+            text=labels,
+            textfont=dict(color="white", size=13),
+            customdata=key_misses.select("finger", "miss_count", "share").rows(),
+            marker=dict(
+                symbol="square",
+                size=36,
+                color=key_misses["miss_count"].to_numpy(),
+                colorscale="Viridis",
+                showscale=True,
+                line=dict(color="rgba(255,255,255,0.3)", width=1),
+            ),
+            hovertemplate=(
+                "%{text}（%{customdata[0]}）<br>ミスタイプ回数: %{customdata[1]:,.1f}回"
+                "<br>割合: %{customdata[2]:.1%}<extra></extra>"
+            ),
+        )
+    )
+
+    # レイアウトの設定（上の行から並べ、軸は表示しない）
+    fig.update_layout(
+        height=320,
+        margin=dict(l=20, r=20, t=20, b=20),
+        font=dict(size=11, color="white"),
+        xaxis=dict(visible=False, range=[-0.7, 12.7]),
+        yaxis=dict(visible=False, autorange="reversed", scaleanchor="x"),
+        paper_bgcolor="black",
+        plot_bgcolor="black",
+        showlegend=False,
+    )
+
+    return fig
+
+
+def _interval_grid(intervals: dict, difficulties: list, languages: list) -> list:
+    """難易度×言語ごとの信頼区間を、ヒートマップと同じ並びの2次元配列にする（データがない組み合わせは (0, 0)）"""
+    return [
+        [intervals.get((difficulty, language), (0, 0)) for language in languages]
+        for difficulty in difficulties
+    ]
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import polars as pl
+from utils.charts import graph_objects
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+
+def create_score_trend_chart(scores, mode_name, curve=None) -> go.Figure:
+    """スコア推移グラフを作成
+
+    Args:
+        scores (pl.DataFrame): モードのスコアデータ（日付順）
+        mode_name (str): モード名
+        curve (list): 1回目のプレイからの学習曲線の値（指定した場合は重ねて表示する）
+    """
+    go = graph_objects()
+
+    fig = go.Figure()
+
+    # プレイ回数のインデックスを作成
+    play_counts = list(range(1, len(scores) + 1))
+
+    # 実際のスコアの折れ線グラフ
+    fig.add_trace(
+        go.Scatter(
+            x=play_counts,
+            y=scores["score"],
+            mode="lines+markers",
+            line=dict(color="#4CAF50", width=2),
+            marker=dict(size=6, color="#4CAF50", line=dict(width=1, color="#FFFFFF")),
+            name="スコア",
+        )
+    )
+
+    # 学習曲線（現在のプレイ回数より先は予測）
+    if curve is not None:
+        fig.add_trace(
+            go.Scatter(
+                x=list(range(1, len(curve) + 1)),
+                y=curve,
+                mode="lines",
+                line=dict(color="#FFC107", width=2, dash="dash"),
+                name="学習曲線",
+            )
+        )
+
+    # レイアウトの設定
+    fig.update_layout(
+        height=300,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=11, color="white"),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            tickmode="linear",
+            tick0=1,
+            dtick=1,
+            title=dict(text="プレイ回数", font=dict(color="white")),
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="スコア", font=dict(color="white")),
+        ),
+        paper_bgcolor="black",
+        plot_bgcolor="black",
+        showlegend=False,
+    )
+
+    return fig
+
+
+def create_rank_history_chart(
+    history: pl.DataFrame, rank_col: str, usernames: list, title: str = None
+) -> go.Figure:
+    """ユーザーごとの順位の推移グラフを作成（1位を上に表示）
+
+    Args:
+        history (pl.DataFrame): analytics.calculate_rank_history の結果
+        rank_col (str): 順位の列（"average_rank" または "growth_rank"）
+        usernames (list): 表示するユーザー名
+        title (str): タイトル
+    """
+    go = graph_objects()
+
+    fig = go.Figure()
+
+    selected = history.filter(pl.col("username").is_in(usernames))
+    for username in usernames:
+        user_history = selected.filter(pl.col("username") == username)
+        fig.add_trace(
+            go.Scatter(
+                x=user_history["date"],
+                y=user_history[rank_col],
+                mode="lines+markers",
+                line=dict(width=2, shape="hv"),
+                marker=dict(size=5),
+                name=username,
+                hovertemplate=f"{username}<br>%{{x}}<br>%{{y}}位<extra></extra>",
+            )
+        )
+
+    # レイアウトの設定
+    layout = dict(
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=11, color="white"),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="日付", font=dict(color="white")),
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="順位", font=dict(color="white")),
+            autorange="reversed",  # 1位を上に表示
+        ),
+        paper_bgcolor="black",
+        plot_bgcolor="black",
+        legend=dict(font=dict(color="white")),
+    )
+    if title:
+        layout["title"] = dict(text=title, font=dict(color="white"))
+    fig.update_layout(**layout)
+
+    return fig
+
+
+def create_miss_trend_chart(trend: pl.DataFrame) -> go.Figure:
+    """文字ごとの週ごとのミスタイプ回数（1プレイあたり）の推移グラフを作成
+
+    Args:
+        trend (pl.DataFrame): analytics.MissCube.trend の結果
+    """
+    go = graph_objects()
+
+    fig = go.Figure()
+
+    for (char,), char_trend in trend.partition_by(
+        "miss_char", as_dict=True, maintain_order=True
+    ).items():
+        fig.add_trace(
+            go.Scatter(
+                x=char_trend["week"],
+                y=char_trend["misses_per_play"],
+                customdata=char_trend["miss_count"],
+                mode="lines+markers",
+                line=dict(width=2),
+                marker=dict(size=5),
+                name=char,
+                hovertemplate=f"{char}<br>%{{x|%Y-%m-%d}}の週<br>"
+                "1プレイあたり %{y:.2f}回（%{customdata:,}回）<extra></extra>",
+            )
+        )
+
+    # レイアウトの設定
+    fig.update_layout(
+        height=350,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=11, color="white"),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="週", font=dict(color="white")),
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="1プレイあたりのミスタイプ回数", font=dict(color="white")),
+        ),
+        paper_bgcolor="black",
+        plot_bgcolor="black",
+        legend=dict(font=dict(color="white")),
+    )
+
+    return fig
+
+
+def create_user_comparison_chart(trend: pl.DataFrame) -> go.Figure:
+    """複数のユーザーの日ごとの平均スコアを重ねた推移グラフを作成
+
+    Args:
+        trend (pl.DataFrame): analytics.compare_users の結果の "trend"
+    """
+    go = graph_objects()
+
+    fig = go.Figure()
+
+    for (username,), user_trend in trend.partition_by(
+        "username", as_dict=True, maintain_order=True
+    ).items():
+        fig.add_trace(
+            go.Scatter(
+                x=user_trend["date"],
+                y=user_trend["average_score"],
+                mode="lines+markers",
+                line=dict(width=2),
+                marker=dict(size=5),
+                name=username,
+                hovertemplate=f"{username}<br>%{{x|%Y-%m-%d}}<br>"
+                "平均スコア: %{y:,.1f}<extra></extra>",
+            )
+        )
+
+    # レイアウトの設定
+    fig.update_layout(
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        font=dict(size=11, color="white"),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="日付", font=dict(color="white")),
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            gridwidth=1,
+            tickfont=dict(color="white"),
+            title=dict(text="平均スコア", font=dict(color="white")),
+        ),
+        paper_bgcolor="black",
+        plot_bgcolor="black",
+        legend=dict(font=dict(color="white")),
+    )
+
+    return fig
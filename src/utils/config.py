@@ -6,3 +6,75 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 # 難易度と言語の設定
 DIFFICULTY_NAMES = {1: "イージー", 2: "ノーマル", 3: "ハード"}
 LANGUAGE_NAMES = {1: "日本語", 2: "英語"}
+
+# キャッシュ設定（読み込んだデータセットを再利用する秒数）
+CACHE_TTL_SECONDS = int(os.environ.get("CACHE_TTL_SECONDS", "300"))
+# 対象者・期間ごとに保持するデータセットの最大数
+DATASET_CACHE_SIZE = int(os.environ.get("DATASET_CACHE_SIZE", "4"))
+# 計算結果キャッシュに保持する最大件数
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "256"))
+
+# APIサーバー設定
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", "8000"))
+# ダッシュボードから書き出しのリンクに使うAPIサーバーのURL
+API_PUBLIC_URL = os.environ.get("API_PUBLIC_URL", f"http://{API_HOST}:{API_PORT}")
+# 書き出しで1回に変換する行数（書き出し中に追加で使うメモリはこの行数分）
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "50000"))
+
+# 差分更新する集計値のチェックポイントの保存先
+CHECKPOINT_DIR = os.environ.get(
+    "CHECKPOINT_DIR", os.path.join(BASE_DIR, "src", "data", "checkpoints")
+)
+# 差分読み込みで前回の時刻から遡る秒数（コミットが遅れた行を取りこぼさないため）
+INCREMENTAL_OVERLAP_SECONDS = float(
+    os.environ.get("INCREMENTAL_OVERLAP_SECONDS", "300")
+)
+
+# データベースの変更通知（LISTEN/NOTIFY）でキャッシュを更新する
+DB_LISTENER_ENABLED = os.environ.get("DB_LISTENER", "").lower() in ("1", "true")
+NOTIFY_CHANNEL = os.environ.get("NOTIFY_CHANNEL", "typing_data_changed")
+# 連続した変更をまとめるため、通知が途切れてから更新するまでの秒数
+NOTIFY_DEBOUNCE_SECONDS = float(os.environ.get("NOTIFY_DEBOUNCE_SECONDS", "1.0"))
+
+# データセットの指紋にキーのチェックサムを含める（件数と更新時刻が同じままの入れ替わりも検出する）
+FINGERPRINT_CHECKSUM = os.environ.get("FINGERPRINT_CHECKSUM", "").lower() in (
+    "1",
+    "true",
+)
+
+# 再読み込みの再試行回数と、初回の待ち時間（秒、失敗ごとに倍にする）
+RETRY_ATTEMPTS = int(os.environ.get("RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.environ.get("RETRY_BASE_DELAY", "0.5"))
+# 連続してこの回数失敗したら、一定時間データベースへの問い合わせを止める
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "30"))
+
+# データの読み込みに使うドライバー（"psycopg2" または "asyncpg"）
+DB_DRIVER = os.environ.get("DB_DRIVER", "psycopg2")
+
+# 年月ごとに分割したデータセットの保存先（期間別の表示は必要な分割だけを読み込む）
+STORE_DIR = os.environ.get("STORE_DIR", os.path.join(BASE_DIR, "src", "data", "store"))
+
+# 集計に使うエンジン（"polars" または "duckdb"）
+ANALYTICS_BACKEND = os.environ.get("ANALYTICS_BACKEND", "polars")
+# DuckDBのスレッド数（0の場合はCPU数）とメモリ上限（超えた分は DUCKDB_TEMP_DIR に書き出す）
+DUCKDB_THREADS = int(os.environ.get("DUCKDB_THREADS", "0"))
+DUCKDB_MEMORY_LIMIT = os.environ.get("DUCKDB_MEMORY_LIMIT", "")
+DUCKDB_TEMP_DIR = os.environ.get(
+    "DUCKDB_TEMP_DIR", os.path.join(BASE_DIR, "src", "data", "duckdb_tmp")
+)
+
+# ランキングのグラフに1ページで表示する件数（人数が増えても描画するデータ量は一定）
+RANKING_PAGE_SIZE = int(os.environ.get("RANKING_PAGE_SIZE", "20"))
+
+# パネルの計算を同時に実行するスレッド数（0の場合はPythonの既定値）
+PANEL_WORKERS = int(os.environ.get("PANEL_WORKERS", "0"))
+
+# 異常なスコアの扱い（"exclude": 集計から除く、"flag": 一覧に表示するだけ、"off": 検出しない）
+ANOMALY_ACTION = os.environ.get("ANOMALY_ACTION", "flag")
+# ユーザー×モードごとのロバストzスコアがこの値を超えるスコアを異常とする
+ANOMALY_Z_THRESHOLD = float(os.environ.get("ANOMALY_Z_THRESHOLD", "3.5"))
+
+# ミスタイプの文字をキーに対応付けるときの、かなの入力方式（"romaji": ローマ字入力、"kana": JISかな入力）
+KANA_INPUT = os.environ.get("KANA_INPUT", "romaji")
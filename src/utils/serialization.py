@@ -0,0 +1,21 @@
+import datetime
+import json
+
+import polars as pl
+
+
+def json_default(value):
+    """JSONに変換できない値を変換する"""
+    if isinstance(value, pl.DataFrame):
+        return value.to_dicts()
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        # NumPyのスカラー値
+        return value.item()
+    raise TypeError(f"{type(value).__name__} はJSONに変換できません")
+
+
+def encode_json(payload) -> bytes:
+    """JSON（UTF-8）にエンコード"""
+    return json.dumps(payload, ensure_ascii=False, default=json_default).encode("utf-8")
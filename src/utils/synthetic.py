@@ -0,0 +1,97 @@
+import datetime
+
+import numpy as np
+import polars as pl
+from utils.config import DIFFICULTY_NAMES, LANGUAGE_NAMES
+
+MISS_CHARS = list("abcdefghijklmnopqrstuvwxyzあいうえおかきくけこ")
+
+
+def make_dataset(
+    n_users: int = 30,
+    n_scores: int = 5000,
+    n_misses: int = 3000,
+    seed: int = 0,
+    start: datetime.datetime = datetime.datetime(2024, 4, 1),
+    days: int = 90,
+    time_zone: str = "UTC",
+):
+    """load_data と同じ列構成の合成データを作成する（テスト・ベンチマーク用）
+
+    作成日時はテーブルごとに重複せず、古い順に並ぶ。
+
+    Args:
+        n_users (int): ユーザー数
+        n_scores (int): スコアの件数
+        n_misses (int): ミスタイプの件数
+        seed (int): 乱数のシード
+        start (datetime.datetime): 最初のプレイ日時
+        days (int): プレイ期間の日数
+        time_zone (str): 日時列のタイムゾーン（Noneの場合はタイムゾーンなし）
+
+    Returns:
+        tuple: (scores, misses, users)
+    """
+    rng = np.random.default_rng(seed)
+    user_ids = [f"{i:08d}-0000-4000-8000-000000000000" for i in range(n_users)]
+    joined = [start - datetime.timedelta(days=365 * (i % 3)) for i in range(n_users)]
+    users = pl.DataFrame(
+        {
+            "user_id": user_ids,
+            "username": [f"user{i:04d}" for i in range(n_users)],
+            "email": [f"user{i}@example.com" for i in range(n_users)],
+            "date_joined": joined,
+            "created_at": joined,
+            "updated_at": joined,
+            "is_newgraduate": [i % 5 != 0 for i in range(n_users)],
+        }
+    )
+
+    def timestamps(n: int) -> pl.Series:
+        seconds = np.sort(rng.choice(days * 86400, size=n, replace=False))
+        return pl.Series(
+            [start + datetime.timedelta(seconds=int(s)) for s in seconds],
+            dtype=pl.Datetime("us"),
+        )
+
+    diff_ids = rng.integers(1, len(DIFFICULTY_NAMES) + 1, n_scores)
+    lang_ids = rng.integers(1, len(LANGUAGE_NAMES) + 1, n_scores)
+    created = timestamps(n_scores)
+    scores = pl.DataFrame(
+        {
+            "user_id": [user_ids[i] for i in rng.integers(0, n_users, n_scores)],
+            "score": rng.integers(501, 3000, n_scores),
+            "accuracy": rng.uniform(0.8, 1.0, n_scores),
+            "typing_count": rng.integers(100, 400, n_scores),
+            "created_at": created,
+            "updated_at": created,
+            "diff_id": diff_ids,
+            "lang_id": lang_ids,
+            "difficulty": [DIFFICULTY_NAMES[int(d)] for d in diff_ids],
+            "language": [LANGUAGE_NAMES[int(lang)] for lang in lang_ids],
+        }
+    )
+
+    created = timestamps(n_misses)
+    misses = pl.DataFrame(
+        {
+            "user_id": [user_ids[i] for i in rng.integers(0, n_users, n_misses)],
+            "miss_char": [
+                MISS_CHARS[i] for i in rng.integers(0, len(MISS_CHARS), n_misses)
+            ],
+            "miss_count": rng.integers(1, 10, n_misses),
+            "created_at": created,
+            "updated_at": created,
+        }
+    )
+
+    if time_zone is not None:
+        datetimes = pl.selectors.datetime()
+        users = users.with_columns(datetimes.dt.replace_time_zone(time_zone))
+        scores = scores.with_columns(datetimes.dt.replace_time_zone(time_zone))
+        misses = misses.with_columns(datetimes.dt.replace_time_zone(time_zone))
+
+    user_names = users.select(["user_id", "username"])
+    scores = scores.join(user_names, on="user_id", how="left")
+    misses = misses.join(user_names, on="user_id", how="left")
+    return scores, misses, users
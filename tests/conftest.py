@@ -0,0 +1,74 @@
+import importlib.util
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import pytest
+
+# アプリケーションと同じく src をインポートパスに追加
+SRC_DIR = Path(__file__).parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# テストファイルが使う任意の依存パッケージ（ない場合はそのファイルを収集しない）
+OPTIONAL_DEPENDENCIES = {
+    "test_api.py": "psycopg2",
+    "test_cache.py": "psycopg2",
+    "test_loader.py": "psycopg2",
+    "test_store.py": "psycopg2",
+    "test_duckdb_backend.py": "duckdb",
+    "test_export.py": "pyarrow",
+    "test_listener.py": "psycopg2",
+    "test_performance.py": "plotly",
+}
+
+# テストはすべてpolarsを使う
+if importlib.util.find_spec("polars") is None:
+    collect_ignore_glob = ["test_*.py"]
+else:
+    collect_ignore = [
+        name
+        for name, module in OPTIONAL_DEPENDENCIES.items()
+        if importlib.util.find_spec(module) is None
+    ]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--performance", action="store_true", help="性能テストを実行する")
+    parser.addoption(
+        "--update-baselines",
+        action="store_true",
+        help="性能テストを実行し、計測結果で基準値を更新する",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "performance: 基準値と比較する性能テスト（--performance で実行）"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # 性能テストは時間がかかるため、指定した場合のみ実行する
+    if config.getoption("--performance") or config.getoption("--update-baselines"):
+        return
+    skip = pytest.mark.skip(reason="--performance を指定した場合のみ実行")
+    for item in items:
+        if "performance" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def synthetic():
+    """前処理済みの合成データ (scores, misses, users) を作成する関数
+
+    引数は utils.synthetic.make_dataset と同じ。同じ引数の結果はテスト全体で再利用する。
+    """
+    from analytics import prepare_data
+    from utils.synthetic import make_dataset
+
+    @lru_cache(maxsize=None)
+    def build(n_users: int, n_scores: int, n_misses: int, **kwargs) -> tuple:
+        return prepare_data(*make_dataset(n_users, n_scores, n_misses, **kwargs))
+
+    return build
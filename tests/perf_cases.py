@@ -0,0 +1,220 @@
+"""性能テストで計測する処理とデータ
+
+1つの処理・データサイズを新しいプロセスで計測し、結果をJSONで出力する。
+
+    python tests/perf_cases.py calculate_growth_ranking medium
+"""
+
+import argparse
+import json
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# データサイズ: (ユーザー数, スコア数, ミスタイプ数)
+SIZES = {
+    "small": (30, 2_000, 1_000),
+    "medium": (100, 20_000, 10_000),
+    "large": (300, 200_000, 100_000),
+}
+SEED = 20240401
+
+
+def make_inputs(size: str) -> dict:
+    """固定シードの合成データから、各処理の入力を作成"""
+    from analytics import calculate_average_score, prepare_data
+    from utils.synthetic import make_dataset
+
+    raw = make_dataset(*SIZES[size], seed=SEED)
+    scores, misses, users = prepare_data(*raw)
+    user_id = users["user_id"][0]
+    user_scores = scores.filter(scores["user_id"] == user_id)
+    return {
+        "raw": raw,
+        "scores": scores,
+        "misses": misses,
+        "user_scores": user_scores,
+        "user_misses": misses.filter(misses["user_id"] == user_id),
+        "mode_scores": user_scores.filter(
+            (user_scores["lang_id"] == 1) & (user_scores["diff_id"] == 1)
+        ).sort("created_at"),
+        "average_score": calculate_average_score(scores),
+    }
+
+
+def _analytics(name: str):
+    import analytics
+
+    return getattr(analytics, name)
+
+
+def _chart(module: str, name: str):
+    import importlib
+
+    return getattr(importlib.import_module(f"utils.charts.{module}"), name)
+
+
+def _main():
+    import main
+
+    return main
+
+
+# 処理名: 入力を受け取って処理を実行する関数
+CASES = {
+    "calculate_growth_ranking": lambda d: _analytics("calculate_growth_ranking")(
+        d["scores"]
+    ),
+    "calculate_average_score": lambda d: _analytics("calculate_average_score")(
+        d["scores"]
+    ),
+    "analyze_misses": lambda d: _analytics("analyze_misses")(d["misses"]),
+    "calculate_overall_metrics": lambda d: _analytics("calculate_overall_metrics")(
+        d["scores"], d["misses"]
+    ),
+    "calculate_user_metrics": lambda d: _analytics("calculate_user_metrics")(
+        d["user_scores"], d["user_misses"]
+    ),
+    "create_bar_chart": lambda d: _chart("bar_chart", "create_bar_chart")(
+        d["average_score"], "username", "average_score", "平均スコアランキング"
+    ),
+    "create_score_trend_chart": lambda d: _chart(
+        "line_chart", "create_score_trend_chart"
+    )(d["mode_scores"], "日本語 イージー"),
+    "create_time_heatmap": lambda d: _chart("heatmap", "create_time_heatmap")(
+        d["scores"]
+    ),
+    "create_weekday_time_heatmap": lambda d: _chart(
+        "heatmap", "create_weekday_time_heatmap"
+    )(d["scores"]),
+    "create_difficulty_language_heatmap": lambda d: _chart(
+        "heatmap", "create_difficulty_language_heatmap"
+    )(d["scores"]),
+    "create_difficulty_language_accuracy_heatmap": lambda d: _chart(
+        "heatmap", "create_difficulty_language_accuracy_heatmap"
+    )(d["scores"]),
+    "load_and_process_data": lambda d: _main().load_and_process_data(*d["raw"]),
+}
+
+
+def summarize(result):
+    """結果を比較用の要約（件数・列・数値の合計など）に変換する
+
+    行の並び順（同点の順序）によらない値にする。
+    """
+    import polars as pl
+
+    if isinstance(result, pl.DataFrame):
+        columns = {}
+        for name, dtype in result.schema.items():
+            if dtype.is_numeric():
+                columns[name] = float(result[name].fill_nan(None).sum() or 0)
+            else:
+                columns[name] = result[name].n_unique()
+        return {"shape": list(result.shape), "columns": columns}
+    if isinstance(result, (tuple, list)):
+        return [summarize(item) for item in result]
+    if isinstance(result, dict):
+        return {key: summarize(value) for key, value in result.items()}
+    if hasattr(result, "to_plotly_json"):
+        traces = []
+        for trace in result.data:
+            values = {}
+            for axis in ("x", "y", "z"):
+                data = getattr(trace, axis, None)
+                if data is not None:
+                    values[axis] = _summarize_values(data)
+            traces.append({"type": trace.type, **values})
+        return {"traces": traces}
+    if isinstance(result, (int, float)) or result is None:
+        return result
+    return float(result)
+
+
+def _summarize_values(data) -> dict:
+    """グラフの軸の値の要約（件数と、数値であれば合計）"""
+    import numpy as np
+
+    values = np.asarray(data, dtype=object).ravel()
+    numbers = [v for v in values if isinstance(v, (int, float, np.number))]
+    return {"count": len(values), "sum": float(sum(numbers)) if numbers else None}
+
+
+def current_rss() -> int:
+    """現在のRSS（バイト）。/proc がない環境では最大RSS"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure_peak_rss(func) -> tuple:
+    """処理中のRSSの増加の最大値を計測する
+
+    Returns:
+        tuple: (処理の結果, 増加の最大値（バイト）)
+    """
+    start = current_rss()
+    peak = start
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(0.001):
+            peak = max(peak, current_rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = func()
+    finally:
+        done.set()
+        sampler.join()
+    return result, max(peak, current_rss()) - start
+
+
+def measure(case: str, size: str, repeat: int) -> dict:
+    """処理を計測する（メモリは初回、時間はばらつきを抑えるため repeat 回の最小値）"""
+    func = CASES[case]
+
+    # ライブラリの読み込みや初回の初期化を計測に含めないよう、小さなデータで1回実行する
+    func(make_inputs("small"))
+    inputs = make_inputs(size)
+
+    result, peak_rss = measure_peak_rss(lambda: func(inputs))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(inputs)
+        times.append(time.perf_counter() - start)
+
+    return {
+        "seconds": min(times),
+        "peak_rss_mb": peak_rss / 1024**2,
+        "result": summarize(result),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="処理の時間・メモリ・結果の計測")
+    parser.add_argument("case", choices=list(CASES))
+    parser.add_argument("size", choices=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=7, help="時間の計測回数")
+    args = parser.parse_args()
+
+    # Streamlitの関数を実行時以外に呼んだ際の警告を抑える
+    import logging
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    print(json.dumps(measure(args.case, args.size, args.repeat), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from analytics import (
+    drop_invalid_scores,
+    flag_anomalies,
+    separate_anomalies,
+)
+from analytics.incremental import RunningAggregates, compare_with_full
+from analytics.ranking import calculate_growth_ranking
+
+
+@pytest.fixture(scope="module")
+def scores(synthetic):
+    scores, _, _ = synthetic(10, 3000, 10, seed=6)
+    return scores
+
+
+@pytest.fixture(scope="module")
+def corrupted(scores):
+    """外れたスコア・範囲外の正確度・0回のタイピング数を1行ずつ含むスコア"""
+    row = pl.int_range(pl.len())
+    return scores.with_columns(
+        pl.when(row == 10).then(99999.0).otherwise(pl.col("score")).alias("score"),
+        pl.when(row == 20).then(1.5).otherwise(pl.col("accuracy")).alias("accuracy"),
+        pl.when(row == 30)
+        .then(0)
+        .otherwise(pl.col("typing_count"))
+        .alias("typing_count"),
+    )
+
+
+def test_flag_anomalies(scores, corrupted):
+    # 一様な乱数の合成データには異常がない
+    assert flag_anomalies(scores)["anomaly"].null_count() == len(scores)
+
+    flagged = flag_anomalies(corrupted).with_row_index()
+    anomalies = flagged.filter(pl.col("anomaly").is_not_null())
+    assert anomalies.select("index", "anomaly").rows() == [
+        (10, "score_outlier"),
+        (20, "accuracy"),
+        (30, "typing_count"),
+    ]
+    assert anomalies["robust_z"][0] > 10
+
+
+def _plays(values: list) -> pl.DataFrame:
+    """1人のユーザーが1つのモードを1日1回プレイしたスコア"""
+    start = datetime(2024, 4, 1)
+    return pl.DataFrame(
+        {
+            "user_id": "u1",
+            "username": "user1",
+            "lang_id": 1,
+            "diff_id": 1,
+            "score": [float(v) for v in values],
+            "accuracy": 0.95,
+            "typing_count": 200,
+            "created_at": [start + timedelta(days=i) for i in range(len(values))],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [600, 1500, 1600, 1650, 1700],
+        # ばらつきのある上達曲線（最初の数回が低い）
+        [3000 - 2400 * 0.8**i + (-1) ** i * 60 + (i % 3) * 25 for i in range(40)],
+    ],
+)
+def test_rising_learning_curve_is_not_flagged(values):
+    """上達中のユーザーの初期の低いスコアは異常にならず、成長率も変わらない"""
+    plays = _plays(values)
+    assert flag_anomalies(plays)["anomaly"].null_count() == len(plays)
+
+    kept, anomalies = separate_anomalies(plays, action="exclude")
+    assert len(anomalies) == 0
+    assert_frame_equal(calculate_growth_ranking(kept), calculate_growth_ranking(plays))
+
+
+def test_outlier_first_and_last_scores_are_excluded():
+    """最初の飛び抜けて低いスコアと最後の飛び抜けて高いスコアは、成長率から除く"""
+    plays = _plays([520, *range(3000, 3011), 99999])
+    flagged = flag_anomalies(plays)
+    assert flagged["anomaly"].to_list() == [
+        "score_outlier",
+        *[None] * 11,
+        "score_outlier",
+    ]
+    assert flagged["robust_z"][0] < -3.5
+
+    kept, anomalies = separate_anomalies(plays, action="exclude")
+    assert anomalies["score"].to_list() == [520.0, 99999.0]
+    growth = calculate_growth_ranking(kept)
+    assert growth.select("first_score", "last_score").row(0) == (3000.0, 3010.0)
+
+    flagged, _ = separate_anomalies(plays, action="flag")
+    assert_frame_equal(flagged, plays)
+
+
+def test_separate_anomalies(scores, corrupted):
+    # 値としてありえない行と外れたスコアを除く
+    kept, anomalies = separate_anomalies(corrupted, action="exclude")
+    assert len(anomalies) == 3
+    assert kept.columns == scores.columns
+    assert_frame_equal(
+        kept,
+        corrupted.with_row_index()
+        .filter(~pl.col("index").is_in([10, 20, 30]))
+        .drop("index"),
+    )
+    # 1行だけで判定できる異常は差分の行にも適用できる（外れたスコアは残る）
+    assert_frame_equal(
+        drop_invalid_scores(corrupted, action="exclude"),
+        corrupted.with_row_index()
+        .filter(~pl.col("index").is_in([20, 30]))
+        .drop("index"),
+    )
+    assert_frame_equal(drop_invalid_scores(corrupted, action="flag"), corrupted)
+
+    flagged, anomalies = separate_anomalies(corrupted, action="flag")
+    assert_frame_equal(flagged, corrupted)
+    assert len(anomalies) == 3
+
+    kept, anomalies = separate_anomalies(corrupted, action="off")
+    assert kept is corrupted and anomalies is None
+    with pytest.raises(ValueError):
+        separate_anomalies(corrupted, action="drop")
+
+
+def test_incremental_aggregates_use_same_policy(corrupted):
+    """差分更新する集計値も、データセットと同じ行を集計から除く"""
+    corrupted = corrupted.with_columns(pl.col("created_at").alias("updated_at"))
+    users = corrupted.select("user_id", "username").unique()
+    misses = pl.DataFrame(
+        schema={"user_id": pl.String, "miss_char": pl.String, "miss_count": pl.Int64}
+    )
+    kept, _ = separate_anomalies(corrupted, action="exclude")
+
+    aggregates = RunningAggregates.from_frames(
+        corrupted, misses, users, anomaly_action="exclude", full=True
+    )
+    assert aggregates.scores["play_count"].sum() == len(kept)
+    assert aggregates.scores_watermark == corrupted["updated_at"].max()
+    assert aggregates.score_rows.height == len(corrupted)
+    assert compare_with_full(aggregates, kept, misses) == []
+
+    # 差分の行では外れたスコアを判定できないため、全件との比較で不一致になる
+    delta = RunningAggregates.from_frames(
+        corrupted, misses, users, anomaly_action="exclude"
+    )
+    assert delta.scores["play_count"].sum() == len(kept) + 1
+    assert compare_with_full(delta, kept, misses) != []
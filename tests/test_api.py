@@ -0,0 +1,203 @@
+import asyncio
+import datetime
+import json
+import time
+
+import pytest
+
+from analytics.anomaly import separate_anomalies
+from analytics.incremental import RunningAggregates
+from analytics.preprocess import filter_period
+from api import AnalyticsServer
+from cache import CircuitBreaker, Dataset
+from cohort import DEFAULT_COHORT, CohortFilter
+
+
+class FakeCache:
+    """SharedCache の代わりに、用意したデータセットと集計値を返す"""
+
+    def __init__(self, dataset: Dataset, aggregates: RunningAggregates):
+        self.dataset = dataset
+        self.aggregates = aggregates
+        self.breaker = CircuitBreaker()
+        self.last_error = None
+        self.cohorts = []
+        self.invalidated = False
+
+    def get_dataset(self, cohort=DEFAULT_COHORT):
+        self.cohorts.append(cohort)
+        return self.dataset
+
+    def get_aggregates(self, cohort=DEFAULT_COHORT):
+        self.cohorts.append(cohort)
+        return self.aggregates
+
+    def compute(self, key, func, dataset=None):
+        return func(dataset or self.dataset)
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+class FakeWriter:
+    """レスポンスを溜めておく StreamWriter"""
+
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data: bytes):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def make_cache(scores, misses, users) -> FakeCache:
+    scores, anomalies = separate_anomalies(scores)
+    dataset = Dataset(
+        scores=scores,
+        misses=misses,
+        users=users,
+        version="v1",
+        loaded_at=time.time(),
+        cohort=DEFAULT_COHORT,
+        anomalies=anomalies,
+    )
+    return FakeCache(dataset, RunningAggregates.from_frames(scores, misses, users))
+
+
+@pytest.fixture(scope="module")
+def cache(synthetic):
+    return make_cache(*synthetic(8, 1500, 600, seed=11))
+
+
+def request(cache, target: str, method: str = "GET") -> tuple:
+    """リクエストを1つ処理し、(ステータス, ヘッダー, JSON) を返す"""
+
+    async def run() -> bytes:
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"{method} {target} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        reader.feed_eof()
+        writer = FakeWriter()
+        await AnalyticsServer(cache).handle(reader, writer)
+        assert writer.closed
+        return writer.data
+
+    header, body = asyncio.run(run()).split(b"\r\n\r\n", 1)
+    lines = header.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    assert headers["Content-Type"] == "application/json; charset=utf-8"
+    assert int(headers["Content-Length"]) == len(body)
+    return int(lines[0].split(" ")[1]), headers, json.loads(body)
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        "/api/rankings/average?year=2024&month=13",
+        "/api/rankings/average?month=4",
+        "/api/rankings/growth?year=24a&month=4",
+        "/api/rankings/growth?limit=0",
+        "/api/misses?order=middle",
+        "/api/heatmaps/difficulty-language?value=speed",
+        "/api/summary?cohort=interns",
+        "/api/summary?date_from=2024-02-30",
+        "/api/summary?min_score=high",
+        "/api/export/scores?format=xlsx",
+    ],
+)
+def test_bad_params_return_400(cache, target):
+    status, _, payload = request(cache, target)
+    assert status == 400
+    assert list(payload) == ["error"]
+    assert isinstance(payload["error"], str)
+
+
+@pytest.mark.parametrize(
+    "target",
+    ["/api/unknown", "/api/rankings", "/api/users/nobody/summary", "/api/export/users"],
+)
+def test_unknown_routes_return_404(cache, target):
+    status, _, payload = request(cache, target)
+    assert status == 404
+    assert list(payload) == ["error"]
+
+
+def test_wrong_method_returns_405(cache):
+    assert request(cache, "/api/summary", "POST")[0] == 405
+    assert request(cache, "/api/refresh")[0] == 405
+
+
+def test_responses_wrap_data(cache):
+    """成功したレスポンスは {"data": ...}、データフレームは行のリストになる"""
+    status, _, payload = request(cache, "/api/summary")
+    assert status == 200
+    assert list(payload) == ["data"]
+    assert payload["data"]["total_plays"] > 0
+
+    _, _, payload = request(cache, "/api/rankings/average?limit=3&order=bottom")
+    ranking = payload["data"]
+    assert len(ranking) == 3
+    assert {"username", "average_score"} <= set(ranking[0])
+    assert ranking[0]["average_score"] <= ranking[-1]["average_score"]
+
+    _, _, payload = request(cache, "/api/heatmaps/hourly")
+    assert set(payload["data"]) == {"hours", "counts"}
+
+    user_id = cache.dataset.scores["user_id"][0]
+    status, _, payload = request(cache, f"/api/users/{user_id}/summary")
+    assert status == 200
+    assert payload["data"]["total_plays"] > 0
+
+
+def test_query_selects_cohort(cache):
+    request(cache, "/api/misses?cohort=all&date_to=2024-05-31&limit=5")
+    assert cache.cohorts[-1] == CohortFilter.from_params(
+        {"cohort": "all", "date_to": "2024-05-31"}
+    )
+
+
+def test_refresh_invalidates_cache(cache):
+    status, _, payload = request(cache, "/api/refresh", "POST")
+    assert status == 200
+    assert payload == {"data": {"version": "v1"}}
+    assert cache.invalidated
+
+
+def test_unavailable_data_returns_503(cache, monkeypatch):
+    monkeypatch.setattr(cache, "aggregates", None)
+    status, _, payload = request(cache, "/api/summary")
+    assert status == 503
+    assert list(payload) == ["error"]
+
+    status, _, payload = request(cache, "/health")
+    assert status == 200
+    assert payload == {"status": "ok", "database": "closed", "last_error": None}
+
+
+def test_rankings_filter_year_and_month(synthetic):
+    """同じ月が2回ある期間でも、指定した年の月だけを集計する"""
+    scores, misses, users = synthetic(
+        8, 3000, 600, seed=12, start=datetime.datetime(2024, 11, 1), days=420
+    )
+    cache = make_cache(scores, misses, users)
+
+    def play_counts(target: str) -> dict:
+        status, _, payload = request(cache, target)
+        assert status == 200
+        return {row["username"]: row["play_count"] for row in payload["data"]}
+
+    counts = {
+        year: play_counts(f"/api/rankings/average?year={year}&month=11")
+        for year in (2024, 2025)
+    }
+    for year, expected in counts.items():
+        period = filter_period(scores, (year, 11))
+        assert sum(expected.values()) == period.height
+        growth = request(cache, f"/api/rankings/growth?year={year}&month=11")[2]
+        assert {row["username"] for row in growth["data"]} == set(period["username"])
+    assert counts[2024] != counts[2025]
@@ -0,0 +1,238 @@
+import threading
+import time
+
+import pytest
+
+from cache import CircuitBreaker, SharedCache, SingleFlight
+from cohort import DEFAULT_COHORT
+from loader import DataLoadError
+from utils.synthetic import make_dataset
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    """裏で実行している再読み込みが終わるまで待つ"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            pytest.fail("再読み込みが終わりませんでした")
+        time.sleep(0.01)
+
+
+class FakeLoader:
+    """load_data の代わりに合成データを返す（fail を True にすると失敗する）"""
+
+    def __init__(
+        self, started: threading.Event = None, release: threading.Event = None
+    ):
+        self.frames = make_dataset(4, 200, 100, seed=3)
+        self.started = started
+        self.release = release
+        self.fail = False
+        self.calls = 0
+
+    def __call__(self, cohort):
+        self.calls += 1
+        if self.started is not None:
+            self.started.set()
+            self.release.wait(5)
+        if self.fail:
+            raise DataLoadError("データベース接続エラー: テスト")
+        return self.frames
+
+
+class FakeProbe:
+    """fetch_fingerprint の代わりに value を指紋として返す"""
+
+    def __init__(self, value: str):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self, cohort):
+        self.calls += 1
+        return self.value
+
+
+def make_cache(loader, **kwargs) -> SharedCache:
+    options = {"probe": None, "checkpoint_dir": None, "store_dir": None}
+    options.update(kwargs)
+    return SharedCache(loader=loader, **options)
+
+
+def test_single_flight_shares_running_call():
+    """実行中の呼び出しと同じキーの呼び出しは、その結果を待って受け取る"""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    flight = SingleFlight()
+    results = []
+    first = threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+    first.start()
+    started.wait(5)
+    others = [
+        threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+        for _ in range(4)
+    ]
+    for thread in others:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [first, *others]:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ["result"] * 5
+
+
+def test_concurrent_requests_load_once():
+    """データセットを保持していないときの同時の要求は、1回の読み込みにまとめる"""
+    started, release = threading.Event(), threading.Event()
+    loader = FakeLoader(started, release)
+    cache = make_cache(loader)
+
+    datasets = []
+    threads = [
+        threading.Thread(target=lambda: datasets.append(cache.get_dataset()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert loader.calls == 1
+    assert len(datasets) == 8
+    assert all(dataset is datasets[0] for dataset in datasets)
+
+
+def test_breaker_opens_and_half_opens():
+    """失敗が続くと止め、一定時間後に1回だけ試して、成功すれば戻る"""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    # 試している間は他の呼び出しを通さない
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_breaker_reopens_after_failed_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_open_breaker_skips_loader():
+    """止まっている間はデータベースに問い合わせずに読み込みを失敗させる"""
+    loader = FakeLoader()
+    loader.fail = True
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    cache = make_cache(loader, breaker=breaker)
+
+    assert cache.get_dataset() is None
+    assert cache.get_dataset() is None
+    assert loader.calls == 2
+    assert breaker.state == "open"
+
+    assert cache.get_dataset() is None
+    assert loader.calls == 2
+    # 最後に記録したのはデータベースのエラー
+    assert "テスト" in cache.last_error
+
+
+def test_stale_dataset_is_served_while_refresh_fails():
+    """期限切れの再読み込みが失敗しても、保持しているデータセットを返し続ける"""
+    loader = FakeLoader()
+    breaker = CircuitBreaker(failure_threshold=100, reset_timeout=60)
+    cache = make_cache(
+        loader, ttl=0, retry_attempts=2, retry_base_delay=0, breaker=breaker
+    )
+    dataset = cache.get_dataset()
+    assert dataset is not None
+    assert cache.last_error is None
+
+    loader.fail = True
+    assert cache.get_dataset() is dataset
+    wait_until(lambda: loader.calls == 3 and not cache._refreshing)
+    assert "テスト" in cache.last_error
+
+    assert cache.get_dataset() is dataset
+    assert cache.cached_version(DEFAULT_COHORT) == dataset.version
+
+    # 復旧すれば裏で新しいデータセットに切り替わる
+    wait_until(lambda: not cache._refreshing)
+    loader.fail = False
+    cache.get_dataset()
+    wait_until(lambda: cache.cached_version(DEFAULT_COHORT) != dataset.version)
+    assert cache.last_error is None
+
+
+def test_unchanged_fingerprint_skips_reload():
+    """指紋が変わっていなければ全件を読み込み直さず、同じバージョンを使い続ける"""
+    loader, probe = FakeLoader(), FakeProbe("v1")
+    cache = make_cache(loader, probe=probe, ttl=0)
+    dataset = cache.get_dataset()
+    assert dataset.version == "v1"
+    assert loader.calls == 1
+
+    assert cache.get_dataset() is dataset
+    wait_until(lambda: probe.calls == 2 and not cache._refreshing)
+    assert loader.calls == 1
+
+    renewed = cache.get_dataset()
+    assert renewed.version == "v1"
+    assert renewed.scores is dataset.scores
+    assert renewed.loaded_at >= dataset.loaded_at
+
+
+def test_changed_fingerprint_invalidates_results():
+    """指紋が変われば読み込み直し、前のバージョンの計算結果は使わない"""
+    loader, probe = FakeLoader(), FakeProbe("v1")
+    cache = make_cache(loader, probe=probe, ttl=0)
+    calls = []
+
+    def count_scores(dataset):
+        calls.append(dataset.version)
+        return dataset.scores.height
+
+    dataset = cache.get_dataset()
+    first = cache.compute(("count",), count_scores, dataset)
+    assert cache.compute(("count",), count_scores, dataset) == first
+    assert calls == ["v1"]
+
+    probe.value = "v2"
+    cache.get_dataset()
+    wait_until(lambda: cache.cached_version(DEFAULT_COHORT) == "v2")
+    assert loader.calls == 2
+
+    reloaded = cache.get_dataset()
+    assert cache.compute(("count",), count_scores, reloaded) == first
+    assert calls == ["v1", "v2"]
+    # 前のバージョンの結果は破棄されている
+    cache.compute(("count",), count_scores, dataset)
+    assert calls == ["v1", "v2", "v1"]
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+
+from cohort import DEFAULT_COHORT, DEFAULT_MIN_SCORE, CohortFilter, next_day
+
+
+@pytest.mark.parametrize(
+    "cohort",
+    [
+        DEFAULT_COHORT,
+        CohortFilter(newgraduate_flags=None, min_score=None),
+        CohortFilter(
+            newgraduate_flags=(0,),
+            joined_from=datetime.date(2023, 4, 1),
+            joined_to=datetime.date(2024, 3, 31),
+            min_score=250.5,
+            date_from=datetime.date(2024, 4, 1),
+            date_to=datetime.date(2024, 6, 30),
+        ),
+    ],
+)
+def test_params_round_trip(cohort):
+    assert CohortFilter.from_params(cohort.to_params()) == cohort
+
+
+def test_from_params_defaults():
+    """指定のない・空のパラメータは既定値になる"""
+    assert CohortFilter.from_params({}) == DEFAULT_COHORT
+    cohort = CohortFilter.from_params({"cohort": "all", "min_score": "", "date_to": ""})
+    assert cohort.newgraduate_flags is None
+    assert cohort.min_score == DEFAULT_MIN_SCORE
+    assert cohort.date_to is None
+    assert CohortFilter.from_params({"min_score": "none"}).min_score is None
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"cohort": "interns"},
+        {"date_from": "2024-13-01"},
+        {"joined_to": "2024/04/01"},
+        {"min_score": "high"},
+    ],
+)
+def test_invalid_params(params):
+    with pytest.raises(ValueError):
+        CohortFilter.from_params(params)
+
+
+def test_to_params_rejects_unlisted_flags():
+    with pytest.raises(ValueError):
+        CohortFilter(newgraduate_flags=(0, 1)).to_params()
+
+
+def test_next_day_is_exclusive_bound():
+    assert next_day(datetime.date(2024, 2, 28)) == datetime.date(2024, 2, 29)
+    assert next_day(datetime.date(2024, 12, 31)) == datetime.date(2025, 1, 1)
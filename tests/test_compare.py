@@ -0,0 +1,64 @@
+import polars as pl
+import pytest
+
+from analytics import (
+    UserPartitions,
+    calculate_mode_growth,
+    calculate_user_metrics,
+    compare_users,
+)
+
+
+@pytest.fixture(scope="module")
+def data(synthetic):
+    scores, misses, _ = synthetic(12, 3000, 30, seed=6)
+    return scores, misses
+
+
+def test_partitions_select_only_chosen_users(data):
+    scores, misses = data
+    user_ids = scores["user_id"].unique().sort().to_list()[:3]
+    selected_scores, selected_misses = UserPartitions(scores, misses).select(
+        [*user_ids, "missing"]
+    )
+    assert selected_scores.sort(["user_id", "created_at"]).equals(
+        scores.filter(pl.col("user_id").is_in(user_ids)).sort(["user_id", "created_at"])
+    )
+    assert selected_misses["miss_count"].sum() == (
+        misses.filter(pl.col("user_id").is_in(user_ids))["miss_count"].sum()
+    )
+    assert UserPartitions(scores, misses).select([])[0].is_empty()
+
+
+def test_compare_matches_per_user_calculation(data):
+    """1回のグループ化の結果が、ユーザーごとに計算した値と一致する"""
+    scores, misses = data
+    user_ids = scores["user_id"].unique().sort().to_list()[2:6]
+    comparison = compare_users(*UserPartitions(scores, misses).select(user_ids))
+
+    metrics = comparison["metrics"]
+    assert metrics["username"].to_list() == sorted(metrics["username"].to_list())
+    for row in metrics.iter_rows(named=True):
+        user_scores = scores.filter(pl.col("user_id") == row["user_id"])
+        user_misses = misses.filter(pl.col("user_id") == row["user_id"])
+        expected = calculate_user_metrics(user_scores, user_misses)
+        assert {name: row[name] for name in expected} == pytest.approx(expected)
+
+        growth = comparison["growth"].filter(pl.col("user_id") == row["user_id"])
+        assert growth.drop("user_id").equals(calculate_mode_growth(user_scores))
+
+        top = comparison["misses"].filter(pl.col("user_id") == row["user_id"])
+        counts = (
+            user_misses.group_by("miss_char")
+            .agg(pl.col("miss_count").sum())
+            .sort(["miss_count", "miss_char"], descending=[True, False])
+            .head(5)
+        )
+        assert top.select("miss_char", "miss_count").equals(counts)
+
+        trend = comparison["trend"].filter(pl.col("user_id") == row["user_id"])
+        assert trend["average_score"].mean() == pytest.approx(
+            user_scores.group_by(pl.col("created_at").dt.date())
+            .agg(pl.col("score").mean())["score"]
+            .mean()
+        )
@@ -0,0 +1,120 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from analytics import duckdb_backend, heatmap, miss, ranking
+from store import PartitionedStore
+
+
+@pytest.fixture(scope="module", params=["UTC", "Asia/Tokyo", None])
+def dataset(request, synthetic):
+    """タイムゾーンごとの前処理済みの合成データ"""
+    return synthetic(40, 8000, 4000, seed=7, time_zone=request.param)
+
+
+def assert_same_rows(expected: pl.DataFrame, actual: pl.DataFrame, key: str):
+    """並び順（同点の順序）によらず同じ行かを確認"""
+    assert expected.columns == actual.columns
+    assert_frame_equal(expected.sort(key), actual.sort(key), check_exact=False)
+
+
+def test_average_score(dataset):
+    scores, _, _ = dataset
+    expected = ranking.calculate_average_score(scores)
+    actual = duckdb_backend.calculate_average_score(scores)
+    assert_same_rows(expected, actual, "username")
+    assert actual["average_score"].is_sorted(descending=True)
+
+
+def test_growth_ranking(dataset):
+    scores, _, _ = dataset
+    expected = ranking.calculate_growth_ranking(scores)
+    actual = duckdb_backend.calculate_growth_ranking(scores)
+    assert_same_rows(expected, actual, "username")
+    assert actual["total_growth_rate"].is_sorted(descending=True)
+
+
+def test_growth_ranking_without_modes(dataset):
+    scores, _, _ = dataset
+    empty = scores.filter(pl.col("lang_id") > 2)
+    assert_frame_equal(
+        duckdb_backend.calculate_growth_ranking(empty),
+        ranking.calculate_growth_ranking(empty),
+    )
+
+
+def test_analyze_misses(dataset):
+    _, misses, _ = dataset
+    expected = miss.analyze_misses(misses)
+    actual = duckdb_backend.analyze_misses(misses)
+    assert_same_rows(expected, actual, "char")
+    assert_frame_equal(
+        duckdb_backend.analyze_misses(misses, limit=5),
+        miss.analyze_misses(misses, limit=5),
+    )
+
+
+def test_best_score_times(dataset):
+    scores, _, _ = dataset
+    keys = ["user_id", "diff_id", "lang_id"]
+    expected = heatmap.calculate_best_score_times(scores)
+    actual = duckdb_backend.calculate_best_score_times(scores)
+    assert expected.columns == actual.columns
+    assert_frame_equal(expected.sort(keys), actual.sort(keys))
+
+
+def test_best_score_times_with_ties_in_any_order(dataset):
+    """最高スコアが同点の場合も、行の並び順によらず最も早いプレイの時刻になる"""
+    scores, _, _ = dataset
+    keys = ["user_id", "diff_id", "lang_id"]
+    # スコアの上限を下げて、各グループに同点の最高スコアを作る
+    tied = scores.with_columns(
+        pl.col("score").clip(upper_bound=scores["score"].quantile(0.3))
+    )
+    expected = duckdb_backend.calculate_best_score_times(tied).sort(keys)
+    for seed in range(3):
+        shuffled = tied.sample(fraction=1.0, shuffle=True, seed=seed)
+        assert_frame_equal(
+            heatmap.calculate_best_score_times(shuffled).sort(keys), expected
+        )
+
+
+def test_heatmap_aggregations(dataset):
+    scores, _, _ = dataset
+    for name in ["calculate_hourly_best_counts", "calculate_weekday_hour_matrix"]:
+        assert getattr(duckdb_backend, name)(scores) == getattr(heatmap, name)(scores)
+    for is_weekday in [True, False]:
+        assert duckdb_backend.find_best_time(
+            scores, is_weekday
+        ) == heatmap.find_best_time(scores, is_weekday)
+
+
+@pytest.mark.parametrize("value_col", ["score", "accuracy"])
+def test_difficulty_language_matrix(dataset, value_col):
+    scores, _, _ = dataset
+    expected = heatmap.calculate_difficulty_language_matrix(scores, value_col)
+    actual = duckdb_backend.calculate_difficulty_language_matrix(scores, value_col)
+    assert actual[:2] == expected[:2]
+    for actual_row, expected_row in zip(actual[2], expected[2]):
+        assert actual_row == pytest.approx(expected_row)
+
+
+def test_reads_partitioned_parquet(tmp_path, synthetic):
+    """PartitionedStore の分割ファイルを直接集計しても同じ結果になる"""
+    scores, misses, users = synthetic(20, 3000, 1000, seed=3)
+    store = PartitionedStore(store_dir=tmp_path)
+    store.write(scores, misses, users)
+
+    assert_same_rows(
+        ranking.calculate_average_score(scores),
+        duckdb_backend.calculate_average_score(store.files("scores")),
+        "username",
+    )
+    assert_same_rows(
+        miss.analyze_misses(misses),
+        duckdb_backend.analyze_misses(store.files("misses")),
+        "char",
+    )
+    assert duckdb_backend.calculate_hourly_best_counts(
+        store.files("scores")
+    ) == heatmap.calculate_hourly_best_counts(scores)
@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+import io
+
+import polars as pl
+import pytest
+
+from cohort import CohortFilter
+from export import iter_export
+from utils.synthetic import make_dataset
+
+READERS = {
+    "parquet": pl.read_parquet,
+    "arrow": pl.read_ipc_stream,
+}
+
+
+@pytest.fixture(scope="module")
+def scores(synthetic):
+    return synthetic(10, 2500, 10, seed=8)[0]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_binary_export_round_trips(scores, fmt):
+    """チャンクに分けて書き出した結果を読み戻すと元のデータと一致する"""
+    chunks = list(iter_export(scores, fmt, chunk_rows=600))
+    assert len(chunks) == 6  # 5チャンク + 終端
+    assert READERS[fmt](io.BytesIO(b"".join(chunks))).equals(scores)
+    empty = b"".join(iter_export(scores.clear(), fmt))
+    assert READERS[fmt](io.BytesIO(empty)).schema == scores.schema
+
+
+def test_csv_export_writes_header_once(scores):
+    chunks = list(iter_export(scores, "csv", chunk_rows=1000))
+    assert len(chunks) == 3
+    assert sum(chunk.startswith(b"user_id,") for chunk in chunks) == 1
+    back = pl.read_csv(io.BytesIO(b"".join(chunks)))
+    assert back.height == scores.height
+    assert back["score"].to_list() == scores["score"].to_list()
+
+
+def test_export_rejects_unknown_format(scores):
+    with pytest.raises(ValueError):
+        next(iter_export(scores, "xlsx"))
+
+
+def test_cohort_params_round_trip():
+    cohort = CohortFilter(
+        newgraduate_flags=None,
+        joined_from=datetime.date(2024, 4, 1),
+        date_to=datetime.date(2024, 6, 30),
+        min_score=300,
+    )
+    assert CohortFilter.from_params(cohort.to_params()) == cohort
+    assert CohortFilter.from_params(CohortFilter().to_params()) == CohortFilter()
+
+
+def test_export_endpoint_streams_chunks(tmp_path):
+    """APIの書き出しがチャンク転送で送られ、読み戻すとデータセットと一致する"""
+    from api import AnalyticsServer
+    from cache import SharedCache
+
+    cache = SharedCache(
+        loader=lambda cohort: make_dataset(10, 2000, 10, seed=9),
+        probe=None,
+        checkpoint_dir=tmp_path / "checkpoints",
+        store_dir=tmp_path / "store",
+    )
+
+    async def request(target: str) -> bytes:
+        server = await asyncio.start_server(
+            AnalyticsServer(cache).handle, "127.0.0.1", 0
+        )
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        return response
+
+    response = asyncio.run(request("/api/export/scores?cohort=all&format=parquet"))
+    header, body = response.split(b"\r\n\r\n", 1)
+    assert b"Transfer-Encoding: chunked" in header
+    assert b'filename="scores.parquet"' in header
+
+    data, chunks = b"", 0
+    while True:
+        size, body = body.split(b"\r\n", 1)
+        if int(size, 16) == 0:
+            break
+        data += body[: int(size, 16)]
+        body = body[int(size, 16) + 2 :]
+        chunks += 1
+    dataset = cache.get_dataset(CohortFilter.from_params({"cohort": "all"}))
+    assert chunks == 2  # 行グループ + フッター
+    assert pl.read_parquet(io.BytesIO(data)).equals(dataset.scores)
+
+    response = asyncio.run(request("/api/export/users?format=csv"))
+    assert response.startswith(b"HTTP/1.1 404")
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+# モジュールごとの累積インポート時間の上限（ミリ秒）
+IMPORT_BUDGETS_MS = {
+    "analytics": 600,
+    "cache": 800,
+    "api.server": 900,
+    "report.generator": 900,
+    "main": 2500,
+}
+
+# Streamlitを使わない入口で読み込んではいけない重いモジュール
+HEADLESS_MODULES = ["analytics", "cache", "api.server", "report.generator"]
+DEFERRED_MODULES = {"plotly", "streamlit", "pandas", "matplotlib", "seaborn", "sklearn"}
+
+# どの入口でも読み込んではいけない（使っていない）モジュール
+UNUSED_MODULES = {"matplotlib", "seaborn", "sklearn", "japanize_matplotlib"}
+
+# 遅いマシン向けに上限を調整する倍率
+BUDGET_SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", "1.0"))
+RUNS = 3
+
+
+def measure_import(module: str) -> dict:
+    """新しいインタプリタで python -X importtime を実行し、累積時間（マイクロ秒）を取得"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def best_of(module: str) -> dict:
+    """ばらつきを抑えるため、複数回の計測で最も速かった結果を使う"""
+    runs = [measure_import(module) for _ in range(RUNS)]
+    return min(runs, key=lambda timings: timings[module])
+
+
+@pytest.mark.parametrize("module", list(IMPORT_BUDGETS_MS))
+def test_cold_import_within_budget(module):
+    timings = best_of(module)
+    elapsed_ms = timings[module] / 1000
+    budget_ms = IMPORT_BUDGETS_MS[module] * BUDGET_SCALE
+    assert elapsed_ms <= budget_ms, (
+        f"{module} のインポートに {elapsed_ms:.0f}ms かかりました（上限 {budget_ms:.0f}ms）"
+    )
+
+
+@pytest.mark.parametrize("module", HEADLESS_MODULES)
+def test_headless_import_defers_heavy_modules(module):
+    imported = {name.split(".")[0] for name in measure_import(module)}
+    assert not imported & DEFERRED_MODULES
+
+
+def test_dashboard_does_not_import_unused_modules():
+    imported = {name.split(".")[0] for name in measure_import("main")}
+    assert not imported & UNUSED_MODULES
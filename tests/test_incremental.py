@@ -0,0 +1,201 @@
+import datetime
+
+import polars as pl
+import pytest
+
+from aggregates import IncrementalAggregator
+from analytics import calculate_average_score, filter_period, incremental, prepare_data
+from analytics.incremental import (
+    RunningAggregates,
+    aggregate_average_score,
+    compare_with_full,
+)
+from cohort import DEFAULT_COHORT
+from utils.synthetic import make_dataset
+
+
+class FakeDatabase:
+    """load_data と同じ差分読み込み（updated_at が since 以降の行）をするデータ"""
+
+    def __init__(self, scores: pl.DataFrame, misses: pl.DataFrame, users):
+        self.scores = scores
+        self.misses = misses
+        self.users = users
+        self.loads = 0
+
+    def load(self, cohort, since: dict = None):
+        self.loads += 1
+        scores, misses = self.scores, self.misses
+        if since and since.get("scores") is not None:
+            scores = scores.filter(pl.col("updated_at") >= since["scores"])
+        if since and since.get("misses") is not None:
+            misses = misses.filter(pl.col("updated_at") >= since["misses"])
+        return scores, misses, self.users
+
+    def full(self) -> tuple:
+        """同じ時点の全件（前処理済み）"""
+        scores, misses, _ = prepare_data(self.scores, self.misses, self.users)
+        return scores, misses
+
+
+@pytest.fixture
+def rows():
+    """年をまたぐ（同じ月が2回ある）合成データを作成日時の順に3つに分けたもの"""
+    scores, misses, users = make_dataset(
+        12, 3000, 2000, seed=5, start=datetime.datetime(2024, 11, 1), days=420
+    )
+    chunks = [
+        (scores.slice(i * 1000, 1000), misses.slice(i * 700, 700)) for i in range(3)
+    ]
+    return chunks, users
+
+
+def assert_matches_full(aggregator: IncrementalAggregator, db: FakeDatabase):
+    aggregates = aggregator.refresh()
+    assert compare_with_full(aggregates, *db.full()) == []
+    return aggregates
+
+
+def test_deltas_match_full_recomputation(rows, tmp_path):
+    """差分を何回かに分けて取り込んだ集計値が、全件からの再計算と一致する"""
+    chunks, users = rows
+    (scores1, misses1), (scores2, misses2), (scores3, misses3) = chunks
+    db = FakeDatabase(scores1, misses1, users)
+    aggregator = IncrementalAggregator(DEFAULT_COHORT, db.load, tmp_path, 60)
+    first = assert_matches_full(aggregator, db)
+
+    # コミットが遅れて前回の時刻より前の行と、前回の時刻と同じ時刻の行を追加
+    watermark = first.scores_watermark
+    late = scores2.head(5).with_columns(
+        pl.Series(
+            "updated_at",
+            [watermark - datetime.timedelta(seconds=30)] * 3 + [watermark] * 2,
+        )
+    )
+    db.scores = pl.concat([scores1, late])
+    db.misses = pl.concat([misses1, misses2])
+    assert_matches_full(aggregator, db)
+
+    db.scores = pl.concat([scores1, scores2])
+    second = assert_matches_full(aggregator, db)
+    # 行のキーは遡って読み直す範囲だけを保持する
+    since = second.scores_watermark - datetime.timedelta(seconds=60)
+    assert (
+        second.score_rows.height
+        == db.scores.filter(pl.col("updated_at") >= since).height
+    )
+    assert second.score_rows.height < 10
+
+    # チェックポイントから再開しても取り込み済みの行を2回数えない
+    resumed = IncrementalAggregator(DEFAULT_COHORT, db.load, tmp_path, 60)
+    db.scores = pl.concat([scores1, scores2, scores3])
+    db.misses = pl.concat([misses1, misses2, misses3])
+    aggregates = assert_matches_full(resumed, db)
+    assert aggregates.scores["year"].n_unique() == 2
+    assert aggregates.scores["play_count"].sum() == db.scores.height
+
+
+def test_updated_rows_rebuild_from_full(rows, tmp_path):
+    """既存の行の更新を検出した場合は、全件から集計し直して一致させる"""
+    chunks, users = rows
+    (scores1, misses1), (scores2, misses2), _ = chunks
+    db = FakeDatabase(scores1, misses1, users)
+    aggregator = IncrementalAggregator(DEFAULT_COHORT, db.load, tmp_path, 60)
+    first = assert_matches_full(aggregator, db)
+
+    updated_at = first.scores_watermark + datetime.timedelta(days=1)
+    updated = pl.int_range(pl.len()) < 5
+    db.scores = pl.concat(
+        [
+            scores1.with_columns(
+                pl.when(updated)
+                .then(pl.col("score") + 1000)
+                .otherwise(pl.col("score"))
+                .alias("score"),
+                pl.when(updated)
+                .then(pl.lit(updated_at))
+                .otherwise(pl.col("updated_at"))
+                .alias("updated_at"),
+            ),
+            scores2,
+        ]
+    )
+    db.misses = pl.concat([misses1, misses2])
+    loads = db.loads
+    assert_matches_full(aggregator, db)
+    # 差分の読み込みと、全件の読み込みの2回
+    assert db.loads == loads + 2
+
+    # 更新を取り込んだ後は、再び差分だけを読み込む
+    assert_matches_full(aggregator, db)
+    assert db.loads == loads + 3
+
+
+def test_checkpoint_appends_deltas(rows, tmp_path):
+    """差分の集計値だけを追記し、保存済みの分割は書き直さない"""
+    chunks, users = rows
+    (scores1, misses1), (scores2, misses2), (scores3, misses3) = chunks
+    db = FakeDatabase(scores1, misses1, users)
+    aggregator = IncrementalAggregator(DEFAULT_COHORT, db.load, tmp_path, 60)
+    assert_matches_full(aggregator, db)
+    (checkpoint,) = tmp_path.iterdir()
+    first_part = checkpoint / "part-000000" / "scores.parquet"
+    mtime = first_part.stat().st_mtime_ns
+
+    for scores, misses in [(scores2, misses2), (scores3, misses3)]:
+        db.scores = pl.concat([db.scores, scores])
+        db.misses = pl.concat([db.misses, misses])
+        assert_matches_full(aggregator, db)
+    assert sorted(path.name for path in checkpoint.glob("part-*")) == [
+        "part-000000",
+        "part-000001",
+        "part-000002",
+    ]
+    assert first_part.stat().st_mtime_ns == mtime
+    # 行のキー・ユーザー情報は最後の分割にだけ残す
+    assert not (checkpoint / "part-000000" / "score_rows.parquet").exists()
+
+    # 分割をmergeして読み込んだ集計値も全件からの再計算と一致する
+    resumed = RunningAggregates.load(checkpoint)
+    assert compare_with_full(resumed, *db.full()) == []
+    assert resumed.watermarks == aggregator.aggregates.watermarks
+
+    # 何も変わっていなければ追記しない
+    assert_matches_full(aggregator, db)
+    assert len(list(checkpoint.glob("part-*"))) == 3
+
+
+def test_checkpoint_compacts_parts(rows, tmp_path, monkeypatch):
+    """追記した差分が上限に達したら、1つの分割にまとめ直す"""
+    monkeypatch.setattr(incremental, "CHECKPOINT_MAX_PARTS", 2)
+    chunks, users = rows
+    (scores1, misses1), *deltas = chunks
+    db = FakeDatabase(scores1, misses1, users)
+    aggregator = IncrementalAggregator(DEFAULT_COHORT, db.load, tmp_path, 60)
+    assert_matches_full(aggregator, db)
+    (checkpoint,) = tmp_path.iterdir()
+
+    parts = []
+    for scores, misses in deltas:
+        db.scores = pl.concat([db.scores, scores])
+        db.misses = pl.concat([db.misses, misses])
+        assert_matches_full(aggregator, db)
+        parts.append(sorted(path.name for path in checkpoint.glob("part-*")))
+    assert parts == [["part-000000", "part-000001"], ["part-000000"]]
+    assert compare_with_full(RunningAggregates.load(checkpoint), *db.full()) == []
+
+
+def test_periods_do_not_merge_years(rows):
+    """同じ月でも年が違えば別の期間として集計する"""
+    chunks, users = rows
+    scores = pl.concat([chunk[0] for chunk in chunks])
+    misses = pl.concat([chunk[1] for chunk in chunks])
+    scores, misses, users = prepare_data(scores, misses, users)
+    aggregates = RunningAggregates.from_frames(scores, misses, users)
+
+    for year in (2024, 2025):
+        expected = calculate_average_score(filter_period(scores, (year, 11)))
+        ranking = aggregate_average_score(aggregates, (year, 11))
+        assert ranking["play_count"].sum() == expected["play_count"].sum()
+        assert ranking.sort("username").equals(expected.sort("username"))
+    assert compare_with_full(aggregates, scores, misses) == []
@@ -0,0 +1,63 @@
+import polars as pl
+import pytest
+
+from analytics import KeyboardIndex
+from analytics.keyboard import FINGER_NAMES, char_keys
+
+
+@pytest.mark.parametrize(
+    "char, romaji, kana",
+    [
+        ("a", ["a"], ["a"]),
+        ("Ｑ", ["q"], ["q"]),
+        ("?", ["/"], ["/"]),
+        ("し", ["s", "i"], ["d"]),
+        ("ガ", ["g", "a"], ["t", "@"]),
+        ("ー", ["-"], ["¥"]),
+        (" ", ["space"], ["space"]),
+        ("漢", [], []),
+    ],
+)
+def test_char_keys(char, romaji, kana):
+    """文字を入力方式ごとのキーに対応付ける"""
+    assert char_keys(char, "romaji") == romaji
+    assert char_keys(char, "kana") == kana
+
+
+def test_char_keys_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        char_keys("a", "qwerty")
+
+
+def test_index_matches_per_user_mapping(synthetic):
+    """索引の切り出しが、ユーザーのミスタイプだけから求めた値と一致する"""
+    _, misses, _ = synthetic(10, 2000, 10, seed=3)
+    misses = pl.concat(
+        [
+            misses,
+            misses.head(1).with_columns(pl.lit("漢").alias("miss_char")),
+        ],
+        how="vertical_relaxed",
+    )
+    index = KeyboardIndex(misses, method="romaji")
+
+    total = misses["miss_count"].sum()
+    keys = index.key_misses()
+    assert keys["miss_count"].sum() + index.unmapped() == pytest.approx(total)
+    assert index.unmapped() == misses.head(1)["miss_count"][0]
+    assert index.finger_misses()["finger"].to_list() == FINGER_NAMES
+
+    user_id = misses["user_id"][0]
+    user_misses = misses.filter(pl.col("user_id") == user_id)
+    expected = {}
+    for char, count in user_misses.select("miss_char", "miss_count").rows():
+        keys_of_char = char_keys(char, "romaji")
+        for key in keys_of_char:
+            expected[key] = expected.get(key, 0) + count / len(keys_of_char)
+    actual = {
+        key: count
+        for key, count in index.key_misses(user_id).select("key", "miss_count").rows()
+        if count > 0
+    }
+    assert actual == pytest.approx(expected)
+    assert index.finger_misses(user_id)["share"].sum() == pytest.approx(1.0)
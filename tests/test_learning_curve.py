@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import polars as pl
+import pytest
+
+from analytics import (
+    calculate_learning_curves,
+    learning_curve_values,
+)
+from analytics.learning_curve import RATE_GRID
+
+
+def _plays(username, lang_id, diff_id, values):
+    start = datetime(2024, 4, 1)
+    return pl.DataFrame(
+        {
+            "username": username,
+            "lang_id": lang_id,
+            "diff_id": diff_id,
+            "score": values,
+            "created_at": [start + timedelta(hours=i) for i in range(len(values))],
+        }
+    )
+
+
+def test_recovers_power_law():
+    """べき乗則どおりのスコアから上限・伸び幅・学習率を求められる"""
+    rate = RATE_GRID[10]
+    n = np.arange(1, 41)
+    exact = 2000 - 800 * n**-rate
+    scores = pl.concat(
+        [
+            _plays("a", 1, 1, exact),
+            _plays("a", 1, 2, [1000.0, 1100.0, 1200.0]),  # プレイ回数が少ない
+            _plays("b", 1, 1, exact[::-1]),
+        ]
+    ).sample(fraction=1.0, shuffle=True, seed=1)
+
+    curves = calculate_learning_curves(scores, projection_plays=10)
+    assert curves.select("username", "diff_id").rows() == [
+        ("a", 1),
+        ("a", 2),
+        ("b", 1),
+    ]
+    fit = curves.row(0, named=True)
+    assert fit["play_count"] == 40
+    assert fit["plateau"] == pytest.approx(2000)
+    assert fit["gain"] == pytest.approx(800)
+    assert fit["learning_rate"] == pytest.approx(rate)
+    assert fit["current_score"] == pytest.approx(exact[-1])
+    assert fit["projected_score"] == pytest.approx(2000 - 800 * 50**-rate)
+    assert learning_curve_values(fit, [1, 40]) == pytest.approx(exact[[0, -1]])
+    assert fit["converged"] is True
+    assert curves.row(1, named=True)["plateau"] is None
+    assert curves.row(1, named=True)["converged"] is None
+
+
+def _least_squares(y: np.ndarray) -> tuple:
+    """1グループを学習率の候補ごとに最小二乗法で当てはめる（gainは0以上）"""
+    n = np.arange(1, len(y) + 1)
+    candidates = []
+    for rate in RATE_GRID:
+        a = np.column_stack([np.ones(len(y)), n**-rate])
+        plateau, slope = np.linalg.lstsq(a, y, rcond=None)[0]
+        if slope > 0:
+            plateau, slope = y.mean(), 0.0
+        sse = ((plateau + slope * n**-rate - y) ** 2).sum()
+        candidates.append((sse, plateau, -slope, rate))
+    return min(candidates, key=lambda c: c[0])
+
+
+def test_matches_least_squares_per_group(synthetic):
+    """全グループを1回で当てはめた結果が、グループごとの最小二乗法と一致する"""
+    scores, _, _ = synthetic(10, 3000, 10, seed=4)
+    keys = ["username", "lang_id", "diff_id"]
+    # 一様な乱数のスコアに上達の傾向を加える
+    scores = scores.sort([*keys, "created_at"]).with_columns(
+        pl.col("score")
+        + 1500 * (1 - (pl.int_range(1, pl.len() + 1).over(keys) ** -0.7))
+    )
+    curves = calculate_learning_curves(scores)
+    converged = curves.filter(pl.col("converged"))
+    assert len(converged) >= 8
+    for fit in converged.head(8).iter_rows(named=True):
+        y = (
+            scores.filter(
+                (pl.col("username") == fit["username"])
+                & (pl.col("lang_id") == fit["lang_id"])
+                & (pl.col("diff_id") == fit["diff_id"])
+            )
+            .sort("created_at")["score"]
+            .to_numpy()
+            .astype(float)
+        )
+        _, plateau, gain, rate = _least_squares(y)
+        assert fit["plateau"] == pytest.approx(plateau)
+        assert fit["gain"] == pytest.approx(gain)
+        assert fit["learning_rate"] == pytest.approx(rate)
+
+
+def test_flat_or_declining_scores_do_not_converge():
+    """伸びのないばらつきだけのスコアや下がるスコアは、当てはめた値がNoneになる"""
+    rng = np.random.default_rng(3)
+    n = np.arange(1, 61)
+    scores = pl.concat(
+        [
+            _plays(f"flat{seed}", 1, 1, 1500 + rng.normal(0, 150, len(n)))
+            for seed in range(20)
+        ]
+        + [_plays("declining", 1, 1, 1500 + 500 * n**-0.5)]
+    )
+
+    curves = calculate_learning_curves(scores)
+    assert curves["converged"].to_list() == [False] * len(curves)
+    for name in ["plateau", "gain", "learning_rate", "projected_score"]:
+        assert curves[name].null_count() == len(curves)
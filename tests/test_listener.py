@@ -0,0 +1,78 @@
+import threading
+import uuid
+
+import pytest
+
+from listener import ChangeListener, install_triggers, parse_change
+from loader import get_db_connection
+
+
+@pytest.fixture
+def conn():
+    """DB_* 環境変数のPostgresに接続（接続できない場合はスキップ）"""
+    try:
+        conn = get_db_connection()
+    except Exception as e:
+        pytest.skip(f"Postgresに接続できません: {e}")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def watched_table(conn):
+    """テスト用のテーブルにトリガーを作成し、終了後に削除する"""
+    table = f"listener_test_{uuid.uuid4().hex[:8]}"
+    channel = f"{table}_changed"
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TABLE {table} (id serial PRIMARY KEY, value int)")
+    conn.commit()
+    install_triggers(conn, channel, tables=(table,))
+    yield table, channel
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE {table}")
+    conn.commit()
+
+
+def test_parse_change():
+    assert parse_change("t_score:INSERT") == ("t_score", "INSERT")
+
+
+def test_burst_of_inserts_is_debounced(conn, watched_table):
+    table, channel = watched_table
+    received = []
+    called = threading.Event()
+
+    def on_change(changes):
+        received.append(changes)
+        called.set()
+
+    listener = ChangeListener(on_change, channel, debounce=0.5)
+    listener.start()
+    try:
+        assert listener.listening.wait(10)
+        with conn.cursor() as cur:
+            for value in range(20):
+                cur.execute(f"INSERT INTO {table} (value) VALUES (%s)", (value,))
+                conn.commit()
+            cur.execute(f"UPDATE {table} SET value = value + 1")
+            conn.commit()
+
+        assert called.wait(10)
+        # 連続した変更は1回の呼び出しにまとめられる
+        listener.stop()
+        listener.join(5)
+        assert received == [{f"{table}:INSERT", f"{table}:UPDATE"}]
+    finally:
+        listener.stop()
+
+
+def test_no_callback_without_changes(conn, watched_table):
+    _, channel = watched_table
+    called = threading.Event()
+    listener = ChangeListener(lambda changes: called.set(), channel, debounce=0.1)
+    listener.start()
+    try:
+        assert listener.listening.wait(10)
+        assert not called.wait(1.0)
+    finally:
+        listener.stop()
@@ -0,0 +1,87 @@
+import datetime
+
+import pytest
+
+from cohort import CohortFilter
+from loader import build_queries, build_table_conditions
+
+DAY = datetime.date(2024, 6, 30)
+
+
+def test_newgraduate_filters_users_in_every_table():
+    conditions = build_table_conditions(CohortFilter())
+    scores, score_params = conditions["scores"]
+    assert "s.user_id IN (SELECT u.user_id FROM m_user u WHERE " in " ".join(scores)
+    assert "s.score > %(min_score)s" in scores
+    assert score_params == {"newgraduate_flags": [1], "min_score": 500}
+
+    misses, miss_params = conditions["misses"]
+    assert "m.user_id IN (SELECT" in " ".join(misses)
+    assert miss_params == {"newgraduate_flags": [1]}
+
+    users, user_params = conditions["users"]
+    assert users == [
+        "u.user_id IS NOT NULL",
+        "u.is_newgraduate::int = ANY(%(newgraduate_flags)s)",
+    ]
+    assert user_params == {"newgraduate_flags": [1]}
+
+
+@pytest.mark.parametrize("flags", [(0,), (1,)])
+def test_cohort_flags_are_parameters(flags):
+    conditions = build_table_conditions(CohortFilter(newgraduate_flags=flags))
+    for _, params in conditions.values():
+        assert params["newgraduate_flags"] == list(flags)
+
+
+def test_all_users_has_no_user_subquery():
+    conditions = build_table_conditions(
+        CohortFilter(newgraduate_flags=None, min_score=None)
+    )
+    assert conditions["scores"] == (["s.user_id IS NOT NULL"], {})
+    assert conditions["misses"] == (["m.user_id IS NOT NULL"], {})
+    assert conditions["users"] == (["u.user_id IS NOT NULL"], {})
+
+
+def test_end_dates_are_exclusive_next_day():
+    """終了日はその日を含むよう、翌日を排他的な上限にする"""
+    cohort = CohortFilter(
+        joined_from=datetime.date(2024, 4, 1),
+        joined_to=DAY,
+        date_from=datetime.date(2024, 5, 1),
+        date_to=DAY,
+    )
+    conditions = build_table_conditions(cohort)
+    scores, params = conditions["scores"]
+    assert "s.created_at >= %(date_from)s" in scores
+    assert "s.created_at < %(date_until)s" in scores
+    assert params["date_from"] == datetime.date(2024, 5, 1)
+    assert params["date_until"] == datetime.date(2024, 7, 1)
+    assert params["joined_until"] == datetime.date(2024, 7, 1)
+
+    users, user_params = conditions["users"]
+    assert "u.date_joined >= %(joined_from)s" in users
+    assert "u.date_joined < %(joined_until)s" in users
+    assert user_params["joined_until"] == datetime.date(2024, 7, 1)
+    # 利用者の絞り込みではプレイ日を条件にしない
+    assert "date_until" not in user_params
+
+
+def test_since_reads_rows_updated_at_or_after():
+    since = datetime.datetime(2024, 6, 1, 12, 0)
+    queries = build_queries(CohortFilter(), since={"scores": since, "misses": None})
+    scores_query, score_params = queries["scores"]
+    assert "s.updated_at >= %(since)s" in scores_query
+    assert score_params["since"] == since
+
+    misses_query, miss_params = queries["misses"]
+    assert "updated_at >=" not in misses_query
+    assert "since" not in miss_params
+
+
+def test_queries_do_not_embed_values():
+    """値はすべてパラメータで渡し、SQLには埋め込まない"""
+    cohort = CohortFilter(min_score=123.0, date_from=datetime.date(2024, 5, 1))
+    for query, params in build_queries(cohort).values():
+        for value in params.values():
+            assert str(value) not in query
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import polars as pl
+
+from analytics import MissCube
+
+
+def test_cube_matches_raw_counts(synthetic):
+    """キューブの集計がミスタイプの全件の集計と一致する"""
+    scores, misses, _ = synthetic(10, 3000, 10, seed=2)
+    cube = MissCube(misses, scores)
+    user_id = scores["user_id"][0]
+
+    for target, rows in [
+        (None, misses),
+        (user_id, misses.filter(pl.col("user_id") == user_id)),
+    ]:
+        expected = dict(
+            rows.group_by("miss_char").agg(pl.col("miss_count").sum()).rows()
+        )
+        assert dict(cube.totals(target).rows()) == expected
+
+        trend = cube.trend(target)
+        assert (
+            dict(trend.group_by("miss_char").agg(pl.col("miss_count").sum()).rows())
+            == expected
+        )
+        # すべての文字がプレイのあった週ごとに1行ずつある
+        weeks = trend["week"].n_unique()
+        assert trend.group_by("miss_char").len()["len"].to_list() == [weeks] * len(
+            expected
+        )
+
+
+def test_worsening_detects_recent_increase():
+    """最近の週だけミスタイプが増えた文字を検出する"""
+    start = datetime(2024, 4, 1)  # 月曜日
+    weeks = [start + timedelta(weeks=i) for i in range(8)]
+    scores = pl.DataFrame({"user_id": "u1", "created_at": weeks})
+    misses = pl.DataFrame(
+        {
+            "user_id": "u1",
+            "created_at": weeks * 2,
+            "miss_char": ["a"] * 8 + ["b"] * 8,
+            "miss_count": [1] * 4 + [5] * 4 + [3] * 8,
+        }
+    )
+    cube = MissCube(misses, scores)
+
+    worsening = cube.worsening("u1", recent=4)
+    assert worsening.rows() == [("a", 1.0, 5.0, 4.0)]
+    assert cube.worsening("u2").is_empty()
+    assert (
+        cube.trend("u1", chars=["a"])["misses_per_play"].to_list()
+        == [1.0] * 4 + [5.0] * 4
+    )
@@ -0,0 +1,78 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from analytics import (
+    calculate_difficulty_language_matrix,
+    calculate_growth_ranking,
+    calculate_mode_growth,
+    list_modes,
+)
+
+
+@pytest.fixture(scope="module")
+def scores(synthetic):
+    """設定にない言語（lang_id=3）と、名前のないモードを含むスコア"""
+    scores, _, _ = synthetic(20, 3000, 10, seed=5)
+    added = scores.head(300).with_columns(
+        pl.lit(3).cast(scores.schema["lang_id"]).alias("lang_id"),
+        pl.lit("中国語").alias("language"),
+    )
+    unnamed = scores.slice(300, 50).with_columns(
+        pl.lit(4).cast(scores.schema["diff_id"]).alias("diff_id"),
+        pl.lit(None, dtype=pl.String).alias("difficulty"),
+    )
+    return pl.concat([scores.slice(350), added, unnamed])
+
+
+def test_list_modes(scores):
+    modes = list_modes(scores)
+    assert modes["mode_name"].to_list() == [
+        "日本語 - イージー",
+        "日本語 - ノーマル",
+        "日本語 - ハード",
+        "日本語 - 4",
+        "英語 - イージー",
+        "英語 - ノーマル",
+        "英語 - ハード",
+        "英語 - 4",
+        "中国語 - イージー",
+        "中国語 - ノーマル",
+        "中国語 - ハード",
+    ]
+
+
+def test_growth_ranking_covers_new_modes(scores):
+    """追加したモードも成長率の合計に含まれる"""
+    ranking = calculate_growth_ranking(scores)
+    expected = (
+        scores.sort("created_at")
+        .group_by(["username", "lang_id", "diff_id"])
+        .agg(
+            pl.col("score").first().alias("first"), pl.col("score").last().alias("last")
+        )
+        .group_by("username")
+        .agg(((pl.col("last") - pl.col("first")) / pl.col("first") * 100).sum())
+    )
+    actual = ranking.select("username", pl.col("total_growth_rate").alias("last"))
+    assert_frame_equal(expected.sort("username"), actual.sort("username"))
+
+
+def test_mode_growth_by_user(scores):
+    """by を指定した1回の計算が、ユーザーごとの計算と一致する"""
+    all_users = calculate_mode_growth(scores, by=["username"])
+    for username in scores["username"].unique().head(5):
+        user_scores = scores.filter(pl.col("username") == username)
+        assert_frame_equal(
+            all_users.filter(pl.col("username") == username).drop("username"),
+            calculate_mode_growth(user_scores),
+        )
+
+
+def test_difficulty_language_matrix_adds_new_names(scores):
+    difficulties, languages, z = calculate_difficulty_language_matrix(
+        scores, "score", languages=["日本語", "英語"]
+    )
+    assert difficulties == ["イージー", "ノーマル", "ハード"]
+    assert languages == ["日本語", "英語", "中国語"]
+    assert all(value > 0 for value in z[0])
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from perf_cases import CASES, SIZES
+
+pytestmark = pytest.mark.performance
+
+BASELINE_PATH = Path(__file__).parent / "performance_baselines.json"
+CASES_SCRIPT = Path(__file__).parent / "perf_cases.py"
+
+# 基準値からの許容範囲（倍率と、計測のばらつきを吸収する下限の差）
+TIME_TOLERANCE = 2.0
+TIME_FLOOR_SECONDS = 0.01
+MEMORY_TOLERANCE = 1.5
+MEMORY_FLOOR_MB = 16
+# 基準値を記録したマシンとの速度の違いを調整する倍率
+TIME_SCALE = float(os.environ.get("PERF_TIME_SCALE", "1.0"))
+
+
+@pytest.fixture(scope="session")
+def baselines(request):
+    """コミットされた基準値（--update-baselines の場合は終了時に書き出す）"""
+    data = {}
+    if BASELINE_PATH.exists():
+        data = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    yield data
+    if request.config.getoption("--update-baselines"):
+        BASELINE_PATH.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+
+
+def run_case(case: str, size: str) -> dict:
+    """処理を新しいプロセスで計測する（ほかの計測のメモリを含めないため）"""
+    result = subprocess.run(
+        [sys.executable, str(CASES_SCRIPT), case, size],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def assert_same_result(actual, expected, path: str = "result"):
+    """結果の要約が基準値と一致するか（数値は相対誤差1e-6まで許容）"""
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict) and actual.keys() == expected.keys(), path
+        for key in expected:
+            assert_same_result(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(actual) == len(expected), path
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            assert_same_result(a, e, f"{path}[{i}]")
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-6), path
+    else:
+        assert actual == expected, path
+
+
+@pytest.mark.parametrize("size", list(SIZES))
+@pytest.mark.parametrize("case", list(CASES))
+def test_performance(case, size, baselines, request):
+    measured = run_case(case, size)
+
+    if request.config.getoption("--update-baselines"):
+        baselines.setdefault(case, {})[size] = measured
+        return
+
+    baseline = baselines.get(case, {}).get(size)
+    if baseline is None:
+        pytest.fail(f"{case}/{size} の基準値がありません（--update-baselines で作成）")
+
+    assert_same_result(measured["result"], baseline["result"])
+
+    time_limit = (
+        max(
+            baseline["seconds"] * TIME_TOLERANCE,
+            baseline["seconds"] + TIME_FLOOR_SECONDS,
+        )
+        * TIME_SCALE
+    )
+    assert measured["seconds"] <= time_limit, (
+        f"{case}/{size}: {measured['seconds'] * 1000:.1f}ms "
+        f"（基準値 {baseline['seconds'] * 1000:.1f}ms、上限 {time_limit * 1000:.1f}ms）"
+    )
+
+    memory_limit = max(
+        baseline["peak_rss_mb"] * MEMORY_TOLERANCE,
+        baseline["peak_rss_mb"] + MEMORY_FLOOR_MB,
+    )
+    assert measured["peak_rss_mb"] <= memory_limit, (
+        f"{case}/{size}: {measured['peak_rss_mb']:.1f}MB "
+        f"（基準値 {baseline['peak_rss_mb']:.1f}MB、上限 {memory_limit:.1f}MB）"
+    )
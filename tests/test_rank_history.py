@@ -0,0 +1,57 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from analytics import (
+    calculate_average_score,
+    calculate_growth_ranking,
+    calculate_rank_history,
+)
+
+
+@pytest.fixture(scope="module")
+def scores(synthetic):
+    scores, _, _ = synthetic(15, 2000, 10, seed=3)
+    return scores
+
+
+@pytest.fixture(scope="module")
+def history(scores):
+    return calculate_rank_history(scores)
+
+
+def _ranked(ranking, value_col, rank_col):
+    """ランキングに同点を同じ順位とした順位の列を追加"""
+    return ranking.select(
+        "username",
+        pl.col(value_col),
+        pl.col(value_col).rank("min", descending=True).cast(pl.UInt32).alias(rank_col),
+    ).sort("username")
+
+
+def test_rank_history_matches_rankings_up_to_each_date(scores, history):
+    """各日の値と順位が、その日までのスコアで計算したランキングと一致する"""
+    dates = history["date"].unique().sort()
+    for date in [dates[0], dates[len(dates) // 2], dates[-1]]:
+        until = scores.filter(pl.col("created_at").dt.date() <= date)
+        day = history.filter(pl.col("date") == date).sort("username")
+        assert_frame_equal(
+            day.select("username", "average_score", "average_rank"),
+            _ranked(calculate_average_score(until), "average_score", "average_rank"),
+        )
+        assert_frame_equal(
+            day.select("username", "total_growth_rate", "growth_rank"),
+            _ranked(
+                calculate_growth_ranking(until), "total_growth_rate", "growth_rank"
+            ),
+            check_exact=False,
+        )
+
+
+def test_rank_history_starts_at_first_play(scores, history):
+    """最初にプレイした日より前の行はない"""
+    first_play = scores.group_by("username").agg(
+        pl.col("created_at").min().dt.date().alias("first")
+    )
+    first_row = history.group_by("username").agg(pl.col("date").min().alias("first"))
+    assert_frame_equal(first_play, first_row, check_row_order=False)
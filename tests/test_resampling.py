@@ -0,0 +1,56 @@
+import polars as pl
+import pytest
+
+from analytics import (
+    bootstrap_best_time,
+    bootstrap_difficulty_language_intervals,
+    calculate_difficulty_language_matrix,
+    find_best_time,
+)
+
+
+@pytest.fixture(scope="module")
+def scores(synthetic):
+    scores, _, _ = synthetic(80, 8000, 10, seed=2)
+    return scores
+
+
+@pytest.mark.parametrize("is_weekday", [False, True])
+def test_bootstrap_best_time(scores, is_weekday):
+    result = bootstrap_best_time(scores, is_weekday)
+    best_time = find_best_time(scores, is_weekday)
+    assert {key: result[key] for key in best_time} == best_time
+    assert result["share_low"] <= result["share"] <= result["share_high"]
+    assert 0 < result["top_probability"] <= 1
+    # 一様な乱数の合成データでは時間帯の偏りは有意にならない
+    assert not result["significant"]
+    # 乱数のシードが同じなら同じ結果
+    assert bootstrap_best_time(scores, is_weekday) == result
+
+
+def test_bootstrap_best_time_detects_concentration(scores):
+    """全員の最高スコアが同じ時間帯に集中している場合は有意になる"""
+    concentrated = scores.with_columns(
+        pl.when(
+            pl.col("score")
+            == pl.col("score").max().over("user_id", "lang_id", "diff_id")
+        )
+        .then(pl.col("created_at").dt.replace(hour=5))  # 日本時間14時
+        .otherwise(pl.col("created_at"))
+        .alias("created_at")
+    )
+    result = bootstrap_best_time(concentrated, is_weekday=False)
+    assert result["hour"] == 14
+    assert result["significant"]
+    assert result["top_probability"] == 1.0
+
+
+@pytest.mark.parametrize("value_col", ["score", "accuracy"])
+def test_difficulty_language_intervals_contain_means(scores, value_col):
+    difficulties, languages, z = calculate_difficulty_language_matrix(scores, value_col)
+    intervals = bootstrap_difficulty_language_intervals(scores, value_col)
+    assert set(intervals) == {(d, lang) for d in difficulties for lang in languages}
+    for i, difficulty in enumerate(difficulties):
+        for j, language in enumerate(languages):
+            low, high = intervals[(difficulty, language)]
+            assert low < z[i][j] < high
@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import pytest
+
+from scheduler import PanelScheduler
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=3)
+    yield executor
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_panels_run_concurrently_and_return_in_display_order(executor):
+    """パネルは同時に計算し、結果は完了した順によらず名前で受け取る"""
+    barrier = threading.Barrier(3, timeout=5)
+    finished = []
+
+    def panel(name, wait=None):
+        # 3つが同時に実行されていなければここで待ち切れずに失敗する
+        barrier.wait()
+        if wait is not None:
+            wait.wait(5)
+        finished.append(name)
+        return name.upper()
+
+    first_done = threading.Event()
+    panels = PanelScheduler(executor)
+    panels.submit("ranking", panel, "ranking", wait=first_done)
+    panels.submit("heatmap", panel, "heatmap")
+    panels.submit("misses", panel, "misses")
+
+    assert panels.result("misses") == "MISSES"
+    assert panels.result("heatmap") == "HEATMAP"
+    first_done.set()
+    assert panels.result("ranking") == "RANKING"
+    assert finished[-1] == "ranking"
+
+
+def test_submit_ignores_same_name(executor):
+    calls = []
+    panels = PanelScheduler(executor)
+    panels.submit("ranking", lambda: calls.append(1) or "first")
+    panels.submit("ranking", lambda: calls.append(2) or "second")
+    assert panels.result("ranking") == "first"
+    assert calls == [1]
+
+
+def test_panel_error_is_raised_only_for_that_panel(executor):
+    """1つのパネルの例外はその結果の取得時に送出し、他のパネルには影響しない"""
+
+    def broken():
+        raise ValueError("集計に失敗しました")
+
+    panels = PanelScheduler(executor)
+    panels.submit("broken", broken)
+    panels.submit("ranking", sum, [1, 2, 3])
+    panels.submit("misses", lambda: "ok")
+
+    with pytest.raises(ValueError, match="集計に失敗しました"):
+        panels.result("broken")
+    assert panels.result("ranking") == 6
+    assert panels.result("misses") == "ok"
+
+
+def test_cancel_skips_panels_not_started():
+    executor = ThreadPoolExecutor(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def running():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    try:
+        panels = PanelScheduler(executor)
+        panels.submit("running", running)
+        panels.submit("pending", calls.append, "pending")
+        started.wait(5)
+        panels.cancel()
+        release.set()
+
+        assert panels.result("running") == "done"
+        with pytest.raises(CancelledError):
+            panels.result("pending")
+        assert calls == []
+    finally:
+        executor.shutdown(wait=True)
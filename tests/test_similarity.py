@@ -0,0 +1,50 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from analytics import (
+    SimilarityIndex,
+    build_user_features,
+)
+
+
+@pytest.fixture(scope="module")
+def features(synthetic):
+    scores, misses, _ = synthetic(40, 4000, 4000, seed=8)
+    return build_user_features(scores, misses, miss_chars=10)
+
+
+def test_build_user_features(features):
+    kinds = {name.split(":", 1)[0] for name in features.columns[1:]}
+    assert kinds == {"score", "accuracy", "growth", "miss"}
+    assert features["username"].is_sorted()
+    # ミスタイプの割合は0〜1で、上位10文字の合計は1以下
+    shares = features.select(pl.col("^miss:.*$")).to_numpy()
+    assert shares.shape[1] == 10
+    assert (shares >= 0).all() and (shares.sum(axis=1) <= 1 + 1e-9).all()
+
+
+def test_similar_matches_brute_force(features):
+    index = SimilarityIndex(features)
+    assert len(index) == features.height
+    matrix = index.matrix.astype(np.float64)
+    for name in index.names[:5]:
+        row = index.names.index(name)
+        expected = [
+            index.names[i]
+            for i in np.argsort(-(matrix @ matrix[row]), kind="stable")
+            if i != row
+        ][:5]
+        similar = index.similar(name, 5)
+        assert similar["username"].to_list() == expected
+        assert similar["similarity"].is_sorted(descending=True)
+
+
+def test_similar_finds_identical_profile(features):
+    """特徴量が同じユーザーは類似度1で最初に見つかる"""
+    copy = features.head(1).with_columns(pl.lit("zz_copy").alias("username"))
+    index = SimilarityIndex(pl.concat([features, copy]))
+    similar = index.similar(features["username"][0], 3)
+    assert similar["username"][0] == "zz_copy"
+    assert similar["similarity"][0] == pytest.approx(1.0, abs=1e-5)
+    assert index.similar("unknown").height == 0
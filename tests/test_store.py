@@ -0,0 +1,124 @@
+import json
+import os
+
+import polars as pl
+import pytest
+
+from analytics.preprocess import filter_period
+from store import MANIFEST_NAME, PartitionedStore, partition_name
+
+
+@pytest.fixture
+def data(synthetic):
+    # 2024年4月〜6月の3か月分
+    return synthetic(6, 800, 500, seed=2)
+
+
+def in_period(frame: pl.DataFrame, periods: list) -> pl.DataFrame:
+    return pl.concat([filter_period(frame, period) for period in periods])
+
+
+def partition_mtimes(store: PartitionedStore, table: str) -> dict:
+    return {
+        path.parent.parent.name + "/" + path.parent.name: path.stat().st_mtime_ns
+        for path in store.files(table)
+    }
+
+
+def test_rewrites_only_changed_partitions(data, tmp_path):
+    """内容が変わった分割だけを書き直し、他の分割のファイルはそのまま残す"""
+    scores, misses, users = data
+    store = PartitionedStore(store_dir=tmp_path)
+    rewritten = store.write(scores, misses, users, version="v1")
+    assert store.periods() == [(2024, 4), (2024, 5), (2024, 6)]
+    assert rewritten["scores"] == [partition_name(p) for p in store.periods()]
+
+    # 書き直したかを更新時刻で確認できるよう、既存のファイルを古い時刻にする
+    for path in store.files("scores") + store.files("misses"):
+        os.utime(path, ns=(0, 0))
+
+    changed = scores.with_columns(
+        pl.when(pl.col("created_at").dt.month() == 5)
+        .then(pl.col("score") + 1)
+        .otherwise(pl.col("score"))
+        .alias("score")
+    )
+    # 行の並び順が変わっただけの分割は書き直さない
+    rewritten = store.write(changed, misses.reverse(), users, version="v2")
+    assert rewritten == {"scores": [partition_name((2024, 5))], "misses": []}
+
+    mtimes = partition_mtimes(store, "scores")
+    assert mtimes.pop(partition_name((2024, 5))) != 0
+    assert set(mtimes.values()) == {0}
+    assert set(partition_mtimes(store, "misses").values()) == {0}
+    assert (
+        store.read("scores", [(2024, 5)])["score"]
+        .sort()
+        .equals(in_period(changed, [(2024, 5)])["score"].sort())
+    )
+
+
+def test_manifest_is_written_last(data, tmp_path, monkeypatch):
+    """途中で書き込みに失敗した場合は、統計情報は以前の内容のまま残る"""
+    scores, misses, users = data
+    store = PartitionedStore(store_dir=tmp_path)
+    store.write(scores, misses, users, version="v1")
+
+    replaced = []
+    failing = {"users.parquet"}
+    original_replace = os.replace
+
+    def replace(src, dst):
+        replaced.append(os.path.basename(dst))
+        if os.path.basename(dst) in failing:
+            raise OSError("ディスクがいっぱいです")
+        original_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", replace)
+    changed = scores.with_columns(pl.col("score") + 1)
+    with pytest.raises(OSError):
+        PartitionedStore(store_dir=tmp_path).write(changed, misses, users, "v2")
+    assert MANIFEST_NAME not in replaced
+
+    manifest = json.loads((store.path / MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert manifest["version"] == "v1"
+
+    # 統計情報が以前のままのため、次の書き込みで書きかけの分割も書き直す
+    replaced.clear()
+    failing.clear()
+    rewritten = PartitionedStore(store_dir=tmp_path).write(changed, misses, users, "v2")
+    assert len(rewritten["scores"]) == 3
+    assert replaced[-1] == MANIFEST_NAME
+    assert PartitionedStore(store_dir=tmp_path).version == "v2"
+
+
+def test_reads_only_selected_periods(data, tmp_path):
+    """期間を指定した読み込みは、該当する分割の行だけを返す"""
+    scores, misses, users = data
+    PartitionedStore(store_dir=tmp_path).write(scores, misses, users, version="v1")
+    store = PartitionedStore(store_dir=tmp_path)
+    assert store.version == "v1"
+
+    periods = [(2024, 5), (2024, 6)]
+    assert [path.parent.name for path in store.files("scores", periods)] == [
+        "month=5",
+        "month=6",
+    ]
+    read = store.read("scores", periods)
+    expected = in_period(scores, periods)
+    assert read.columns == scores.columns
+    assert read.sort("created_at").equals(expected.sort("created_at"))
+    assert (
+        store.stats("scores", (2024, 5))["rows"]
+        == in_period(scores, [(2024, 5)]).height
+    )
+
+    # 保存していない期間は列だけを返す
+    empty = store.read("misses", [(2023, 1)])
+    assert empty.height == 0
+    assert empty.columns == misses.columns
+
+    assert store.read("scores").height == scores.height
+    assert store.read_users().equals(users)
+    with pytest.raises(LookupError):
+        store.files("anomalies")
@@ -0,0 +1,68 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from analytics import (
+    RankIndex,
+    analyze_misses,
+    bottom_k,
+    calculate_average_score,
+    page_count,
+    top_k,
+)
+
+
+@pytest.fixture(scope="module")
+def dataset(synthetic):
+    return synthetic(60, 6000, 3000, seed=11)
+
+
+@pytest.fixture
+def tied():
+    """同点を含むランキング"""
+    return pl.DataFrame(
+        {
+            "username": ["e", "d", "c", "b", "a", "f"],
+            "value": [10.0, 30.0, 20.0, 30.0, 20.0, None],
+        }
+    )
+
+
+def test_top_k_matches_full_sort(dataset):
+    scores, _, _ = dataset
+    ranking = calculate_average_score(scores)
+    expected = ranking.sort(["average_score", "username"], descending=[True, False])
+    for k in [1, 5, 20, len(ranking), len(ranking) + 10]:
+        assert_frame_equal(top_k(ranking, "average_score", k), expected.head(k))
+    assert top_k(ranking, "average_score", 0).height == 0
+
+
+def test_top_k_breaks_ties_by_key(tied):
+    assert top_k(tied, "value", 3)["username"].to_list() == ["b", "d", "a"]
+    assert bottom_k(tied, "value", 2)["username"].to_list() == ["e", "a"]
+
+
+def test_rank_index(tied):
+    index = RankIndex(tied, "value")
+    assert len(index) == 6
+    # 同点は同じ順位、値がない場合は順位なし
+    ranks = {name: index.rank(name) for name in "abcdef"}
+    assert ranks == {"a": 3, "b": 1, "c": 3, "d": 1, "e": 5, "f": None}
+    assert index.rank("unknown") is None
+    assert index.top(2)["username"].to_list() == ["b", "d"]
+    assert index.page(2, 4)["username"].to_list() == ["e", "f"]
+    assert index.page(3, 4).height == 0
+
+
+def test_page_count():
+    assert page_count(0, 20) == 1
+    assert page_count(20, 20) == 1
+    assert page_count(21, 20) == 2
+
+
+def test_analyze_misses_limit(dataset):
+    _, misses, _ = dataset
+    full = analyze_misses(misses)
+    limited = analyze_misses(misses, limit=5)
+    assert limited.columns == full.columns
+    assert limited["miss_count"].to_list() == full["miss_count"].head(5).to_list()